@@ -0,0 +1,234 @@
+"""
+Room availability queries over half-hour occupancy bitmaps.
+"""
+from typing import List, Dict, Any, Iterable, Optional, Tuple, Union
+
+import numpy as np
+
+from booking_table import BookingTable
+from slots import MINUTES_PER_DAY, SLOT_MINUTES, format_minutes, parse_clock
+
+# Half-hour slots in a day; bit i of a bitmap covers [i * 30, (i + 1) * 30) minutes
+SLOTS_PER_DAY = MINUTES_PER_DAY // SLOT_MINUTES
+
+# Named windows accepted wherever a start/end pair is
+PERIODS = {
+    "morning": ("08:00", "12:00"),
+    "afternoon": ("12:00", "17:00"),
+    "evening": ("17:00", "21:00"),
+}
+
+
+def window_mask(start: Union[str, int], end: Union[str, int]) -> int:
+    """
+    Bitmap of the half-hour slots touched by a time window.
+
+    Args:
+        start: Start time as HH:MM or minutes since midnight
+        end: End time as HH:MM or minutes since midnight; earlier than
+            start means the window runs to midnight
+
+    Returns:
+        Integer bitmap; slots past midnight are dropped
+    """
+    start = parse_clock(start) if isinstance(start, str) else start
+    end = parse_clock(end) if isinstance(end, str) else end
+    if end <= start:
+        end = MINUTES_PER_DAY
+
+    first = start // SLOT_MINUTES
+    last = min(-(-end // SLOT_MINUTES), SLOTS_PER_DAY)
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+class RoomAvailability:
+    """
+    Occupancy of every room on every day as 48-bit half-hour bitmaps.
+
+    A day is a (date, day_of_week) pair, the same key the conflict detector
+    uses, since weekly timetables stamp one date on every weekday. Bitmaps
+    are held in a rooms x days uint64 array, so each query is a handful of
+    numpy operations across all rooms at once. When a query matches several
+    days, a room counts as busy in a slot if it is busy on any of them.
+    """
+
+    def __init__(self, rooms: List[str], days: List[Tuple[Any, Any]], bitmaps: np.ndarray):
+        """
+        Initialize the RoomAvailability.
+
+        Args:
+            rooms: Room numbers, one per bitmap row
+            days: (date, day_of_week) pairs, one per bitmap column
+            bitmaps: uint64 array of shape (len(rooms), len(days))
+        """
+        self.rooms = list(rooms)
+        self.days = list(days)
+        self.bitmaps = bitmaps
+
+    @classmethod
+    def from_entries(cls, data: Union[List[Dict[str, Any]], BookingTable],
+                     rooms: Optional[Iterable[str]] = None) -> 'RoomAvailability':
+        """
+        Build the bitmaps from extracted entries.
+
+        Entries without a room number or with unparseable times are skipped.
+
+        Args:
+            data: List of dictionaries or a BookingTable containing timetable data
+            rooms: Extra rooms to include even if nothing books them
+
+        Returns:
+            RoomAvailability over every room and day seen
+        """
+        if isinstance(data, BookingTable):
+            columns = {name: data.column(name) for name in ("room_no", "date", "day_of_week",
+                                                            "start_time", "end_time")}
+        else:
+            columns = {name: [entry.get(name) for entry in data]
+                       for name in ("room_no", "date", "day_of_week", "start_time", "end_time")}
+
+        room_index = {room: i for i, room in enumerate(sorted(
+            {room for room in columns["room_no"] if room} | set(rooms or ())))}
+        day_index: Dict[Tuple[Any, Any], int] = {}
+        masks: Dict[Tuple[Any, Any], int] = {}
+
+        room_rows, day_cols, entry_masks = [], [], []
+        for room, date, day, start, end in zip(columns["room_no"], columns["date"], columns["day_of_week"],
+                                               columns["start_time"], columns["end_time"]):
+            if not room:
+                continue
+            mask = masks.get((start, end))
+            if mask is None:
+                try:
+                    mask = window_mask(str(start), str(end)) if start and end else 0
+                except ValueError:
+                    mask = 0
+                masks[(start, end)] = mask
+            if not mask:
+                continue
+            room_rows.append(room_index[room])
+            day_cols.append(day_index.setdefault((date, day), len(day_index)))
+            entry_masks.append(mask)
+
+        bitmaps = np.zeros((len(room_index), len(day_index)), dtype=np.uint64)
+        if entry_masks:
+            np.bitwise_or.at(bitmaps, (np.array(room_rows), np.array(day_cols)),
+                             np.array(entry_masks, dtype=np.uint64))
+        return cls(list(room_index), list(day_index), bitmaps)
+
+    def occupancy(self, date: Optional[str] = None, day: Optional[str] = None) -> np.ndarray:
+        """
+        Combined bitmap of each room over the matching days.
+
+        Args:
+            date: Only days with this date (YYYY-MM-DD)
+            day: Only days with this day of the week
+
+        Returns:
+            uint64 array with one bitmap per room
+        """
+        selected = [i for i, (day_date, day_name) in enumerate(self.days)
+                    if (date is None or str(day_date) == date)
+                    and (day is None or str(day_name).lower() == day.lower())]
+        if not selected:
+            return np.zeros(len(self.rooms), dtype=np.uint64)
+        return np.bitwise_or.reduce(self.bitmaps[:, selected], axis=1)
+
+    def free_rooms(self, start: str, end: str, date: Optional[str] = None,
+                   day: Optional[str] = None) -> List[str]:
+        """
+        Rooms with no booking anywhere in a time window.
+
+        Args:
+            start: Window start as HH:MM
+            end: Window end as HH:MM
+            date: Only consider bookings on this date
+            day: Only consider bookings on this day of the week
+
+        Returns:
+            Sorted room numbers
+        """
+        mask = np.uint64(window_mask(start, end))
+        free = (self.occupancy(date, day) & mask) == 0
+        return [self.rooms[i] for i in np.flatnonzero(free)]
+
+    def free_during(self, period: str, date: Optional[str] = None, day: Optional[str] = None) -> List[str]:
+        """
+        Rooms free for the whole of a named period such as "afternoon".
+
+        Args:
+            period: Key of PERIODS
+            date: Only consider bookings on this date
+            day: Only consider bookings on this day of the week
+
+        Returns:
+            Sorted room numbers
+        """
+        if period not in PERIODS:
+            raise ValueError(f"Unknown period '{period}'; expected one of: {', '.join(PERIODS)}")
+        return self.free_rooms(*PERIODS[period], date=date, day=day)
+
+    def first_free_slot(self, after: str = "08:00", until: str = "21:00", minutes: int = SLOT_MINUTES,
+                        date: Optional[str] = None, day: Optional[str] = None) -> Dict[str, Optional[str]]:
+        """
+        Earliest free stretch of every room.
+
+        Args:
+            after: Earliest start as HH:MM; rounded down to a half hour
+            until: Latest end as HH:MM
+            minutes: Length of the stretch; rounded up to whole half hours
+            date: Only consider bookings on this date
+            day: Only consider bookings on this day of the week
+
+        Returns:
+            Dictionary of room number to the start time (HH:MM) of its
+            first free stretch, or None when it has none
+        """
+        length = max(1, -(-minutes // SLOT_MINUTES))
+        free = ~self.occupancy(date, day) & np.uint64(window_mask(after, until))
+
+        # Bit i survives when slots i .. i + length - 1 are all free
+        runs = free.copy()
+        for shift in range(1, length):
+            runs &= free >> np.uint64(shift)
+
+        lowest = runs & (~runs + np.uint64(1))
+        first = np.zeros(len(self.rooms), dtype=np.int64)
+        found = lowest != 0
+        first[found] = np.log2(lowest[found].astype(np.float64)).astype(np.int64)
+
+        return {room: format_minutes(int(slot) * SLOT_MINUTES) if ok else None
+                for room, slot, ok in zip(self.rooms, first, found)}
+
+    def busy_slots(self, room: str, date: Optional[str] = None,
+                   day: Optional[str] = None) -> List[Tuple[str, str]]:
+        """
+        Booked half-hour slots of one room, like the frontend's slot grid.
+
+        Args:
+            room: Room number
+            date: Only consider bookings on this date
+            day: Only consider bookings on this day of the week
+
+        Returns:
+            List of (slot_start, slot_end) pairs in HH:MM format
+        """
+        bitmap = int(self.occupancy(date, day)[self.rooms.index(room)])
+        return [(format_minutes(i * SLOT_MINUTES), format_minutes((i + 1) * SLOT_MINUTES))
+                for i in range(SLOTS_PER_DAY) if bitmap >> i & 1]
+
+
+if __name__ == "__main__":
+    # Example usage
+    from processor import TimetableProcessor
+
+    processor = TimetableProcessor()
+    data = processor.process_timetable("examples/sample.xlsx", as_table=True)
+
+    availability = RoomAvailability.from_entries(data)
+    print(f"{len(availability.rooms)} rooms over {len(availability.days)} days")
+    print(f"Free on Monday 14:00-16:00: {availability.free_rooms('14:00', '16:00', day='Monday')}")
+    print(f"Free all Monday afternoon: {availability.free_during('afternoon', day='Monday')}")
+    print(f"First free hour on Monday: {availability.first_free_slot(minutes=60, day='Monday')}")
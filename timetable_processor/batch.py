@@ -0,0 +1,129 @@
+"""
+Parallel processing of several timetable workbooks.
+"""
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional
+
+from booking_table import BookingTable
+from cache import ResultCache
+from engines import create_processor
+
+
+def find_input_files(input_dir: Optional[str] = None, pattern: str = "*.xlsx") -> List[str]:
+    """
+    List the workbooks to process.
+
+    Args:
+        input_dir: Directory to search; if omitted, pattern is a path glob
+        pattern: File name pattern inside input_dir, or a full path glob
+
+    Returns:
+        Sorted list of file paths, skipping Excel lock files
+    """
+    full_pattern = os.path.join(input_dir, pattern) if input_dir else pattern
+    return sorted(
+        path for path in glob.glob(full_pattern)
+        if os.path.isfile(path) and not os.path.basename(path).startswith("~$")
+    )
+
+
+def process_file(file_path: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Process one workbook; runs inside a worker process.
+
+    Args:
+        file_path: Path to the Excel file
+        options: TimetableProcessor options (debug, engine, reader), default_date, sheets,
+            and cache_dir/cache_max_bytes to use the result cache
+
+    Returns:
+        Dictionary with the file, its entries or the error, timing, and on
+        success the processor's Metrics.to_dict()
+    """
+    start = time.perf_counter()
+    try:
+        processor = create_processor(
+            debug=options.get("debug", False),
+            engine=options.get("engine", "rows"),
+            reader=options.get("reader", "pandas"),
+        )
+        # Files are already spread over worker processes, so sheets are parsed in-process
+        if options.get("cache_dir"):
+            cache = ResultCache(options["cache_dir"], options["cache_max_bytes"], debug=processor.debug)
+            entries = cache.process(processor, file_path, default_date=options.get("default_date"),
+                                    sheets=options.get("sheets"))
+            cache_status = "hit" if cache.hits else "miss"
+            processor.metrics.incr("cache_" + ("hits" if cache.hits else "misses"))
+        else:
+            entries = processor.process_timetable(file_path, default_date=options.get("default_date"),
+                                                  as_table=True, sheets=options.get("sheets"))
+            cache_status = None
+        return {
+            "file": file_path,
+            "success": True,
+            "entries": entries,
+            "records": len(entries),
+            "cache": cache_status,
+            "seconds": time.perf_counter() - start,
+            "metrics": processor.metrics.to_dict(),
+        }
+    except Exception as e:
+        return {
+            "file": file_path,
+            "success": False,
+            "error": str(e),
+            "seconds": time.perf_counter() - start,
+        }
+
+
+def process_files(paths: List[str], options: Dict[str, Any],
+                  workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Process several workbooks in a process pool.
+
+    A failure in one file is recorded in its result and does not stop the
+    others.
+
+    Args:
+        paths: Paths to the Excel files
+        options: Options passed to process_file
+        workers: Number of worker processes (default: CPU count)
+
+    Returns:
+        List of per-file results, in the order of paths
+    """
+    if workers == 1 or len(paths) <= 1:
+        return [process_file(path, options) for path in paths]
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(process_file, path, options): path for path in paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                results[path] = future.result()
+            except Exception as e:
+                # The worker itself died (e.g. killed or out of memory)
+                results[path] = {"file": path, "success": False, "error": str(e), "seconds": 0.0}
+
+    return [results[path] for path in paths]
+
+
+def merge_results(results: List[Dict[str, Any]]) -> BookingTable:
+    """
+    Concatenate the entries of all successfully processed files.
+
+    Args:
+        results: Per-file results from process_files
+
+    Returns:
+        BookingTable with the entries of every successful file, in file order
+    """
+    merged = BookingTable()
+    for result in results:
+        if result["success"]:
+            merged.extend(result["entries"])
+    return merged
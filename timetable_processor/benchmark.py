@@ -0,0 +1,1150 @@
+"""
+Benchmarks for the timetable processor.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import random
+import tempfile
+import sys
+import time
+import tracemalloc
+from typing import List, Dict, Any, Callable, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from availability import RoomAvailability
+from booking_table import BookingTable
+from coalesce import coalesce_slots, expand_slots
+from columnar import COLUMNAR_FORMATS, load_arrow, read_columnar, write_columnar
+from conflicts import ConflictDetector
+from layout import SheetLayout, clear_layout_cache
+from mock_postgrest import MockPostgREST
+from processor import TimetableProcessor
+from readers import READERS
+from sqlite_loader import SQLiteLoader
+from sql_generator import OUTPUT_FORMATS, TIMETABLE_COLUMN_TYPES, SQLGenerator
+from uploader import SupabaseUploader
+
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+ALL_DAYS = DAYS + ["Saturday", "Sunday"]
+SUBJECTS = ["DP", "ML", "BDA", "ISIG", "GDG", "CN", "OS", "DBMS"]
+FACULTY = ["NA", "RS", "SM", "LS", "AK", "PT"]
+ROOMS = ["64", "65", "66", "Lab 1", "Lab 2", "Lab 3"]
+
+
+def make_timetable_frame(n_rows: int, fill_ratio: float = 0.6, seed: int = 0,
+                         rooms: Optional[Sequence[str]] = None,
+                         days: Sequence[str] = DAYS) -> pd.DataFrame:
+    """
+    Build a synthetic timetable sheet in the layout read_excel returns.
+
+    Args:
+        n_rows: Number of time rows
+        fill_ratio: Fraction of day cells that hold a booking
+        seed: Random seed
+        rooms: Room numbers to book; ROOMS if omitted
+        days: Day columns
+
+    Returns:
+        DataFrame with a "Period" column and one column per day
+    """
+    rng = random.Random(seed)
+    rooms = rooms or ROOMS
+    labels = []
+    for i in range(n_rows):
+        start = 8 * 60 + (i % 20) * 30
+        length = rng.choice([30, 60, 120])
+        end = start + length
+        labels.append(f"{start // 60:02d}:{start % 60:02d}-{end // 60:02d}:{end % 60:02d}")
+
+    data = {"No.": list(range(1, n_rows + 1)), "Period": labels}
+    for day in days:
+        data[day] = [
+            f"{rng.choice(SUBJECTS)} ({rng.choice(FACULTY)})({rng.choice(rooms)})"
+            if rng.random() < fill_ratio else None
+            for _ in range(n_rows)
+        ]
+    return pd.DataFrame(data)
+
+
+def _sheet_rows(df: pd.DataFrame, extra_columns: int, seed: int, unused_days: Sequence[str]) -> List[List[Any]]:
+    """
+    Lay out a synthetic sheet like examples/sample.xlsx: title rows above
+    the header, and unused day and free-text remark columns next to the days.
+
+    Args:
+        df: Sheet from make_timetable_frame
+        extra_columns: Number of unused remark columns
+        seed: Random seed of the remarks
+        unused_days: Empty day columns added after the used ones
+
+    Returns:
+        Sheet rows, header included
+    """
+    rng = random.Random(seed + 1)
+    remarks = [f"Remarks {i + 1}" for i in range(extra_columns)]
+
+    rows = [
+        [None, "Department of Information Technology"],
+        [None, "Timetable for the academic term: Jan-May 2025"],
+        list(df.columns) + list(unused_days) + remarks,
+    ]
+    for record in df.itertuples(index=False):
+        cells = [None if pd.isna(value) else value for value in record]
+        rows.append(cells + [None] * len(unused_days) + [f"note {rng.randint(0, 999)}" for _ in remarks])
+    return rows
+
+
+def write_timetable_workbook(file_path: str, n_rows: int, fill_ratio: float = 0.6,
+                             extra_columns: int = 6, seed: int = 0) -> None:
+    """
+    Write a synthetic timetable workbook laid out like examples/sample.xlsx.
+
+    The sheet has title rows above the header and unused columns (Saturday
+    and free-text remarks) next to the day columns. A path ending in .csv
+    writes the same rows as CSV instead.
+
+    Args:
+        file_path: Output .xlsx or .csv path
+        n_rows: Number of time rows
+        fill_ratio: Fraction of day cells that hold a booking
+        extra_columns: Number of unused remark columns
+        seed: Random seed
+    """
+    rows = _sheet_rows(make_timetable_frame(n_rows, fill_ratio, seed), extra_columns, seed, ["Saturday"])
+
+    if file_path.endswith(".csv"):
+        import csv
+        with open(file_path, "w", newline="") as file:
+            csv.writer(file).writerows([["" if v is None else v for v in row] for row in rows])
+        return
+
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Timetable")
+    for row in rows:
+        sheet.append(row)
+    workbook.save(file_path)
+
+
+def write_campus_workbook(file_path: str, n_classes: int = 4, n_rows: int = 20, n_rooms: int = 20,
+                          n_days: int = 5, fill_ratio: float = 0.6, extra_columns: int = 6,
+                          seed: int = 0) -> None:
+    """
+    Write a synthetic .xlsx with one timetable sheet per class.
+
+    Args:
+        file_path: Output .xlsx path
+        n_classes: Number of sheets; each sheet name is a class
+        n_rows: Number of time rows per sheet
+        n_rooms: Number of distinct rooms booked across the campus
+        n_days: Number of day columns, from Monday (at most 7)
+        fill_ratio: Fraction of day cells that hold a booking
+        extra_columns: Number of unused remark columns per sheet
+        seed: Random seed
+    """
+    from openpyxl import Workbook
+
+    days = ALL_DAYS[:n_days]
+    rooms = [f"{100 + i}" for i in range(n_rooms)]
+    workbook = Workbook(write_only=True)
+    for index in range(n_classes):
+        sheet_seed = seed + index * 7919
+        df = make_timetable_frame(n_rows, fill_ratio, sheet_seed, rooms=rooms, days=days)
+        sheet = workbook.create_sheet(f"SE-{index + 1}")
+        for row in _sheet_rows(df, extra_columns, sheet_seed, ALL_DAYS[n_days:n_days + 1]):
+            sheet.append(row)
+    workbook.save(file_path)
+
+
+def _time_engine(engine: str, df: pd.DataFrame, repeat: int) -> Dict[str, Any]:
+    """
+    Time one extraction engine on a DataFrame.
+
+    Args:
+        engine: Engine name
+        df: Synthetic timetable sheet
+        repeat: Number of runs; the best one is reported
+
+    Returns:
+        Dictionary with the best time and the extracted entries
+    """
+    processor = TimetableProcessor(engine=engine)
+    best = float("inf")
+    entries = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        entries = processor.process_dataframe(df.copy(), default_date="2025-01-27")
+        best = min(best, time.perf_counter() - start)
+    return {"seconds": best, "entries": entries}
+
+
+def bench_engines(sizes: List[int], repeat: int = 3) -> List[Dict[str, Any]]:
+    """
+    Compare the row and vectorized extraction engines.
+
+    Args:
+        sizes: Numbers of time rows to benchmark
+        repeat: Number of runs per engine and size
+
+    Returns:
+        List of result dictionaries, one per size
+    """
+    results = []
+    for n_rows in sizes:
+        df = make_timetable_frame(n_rows)
+        rows = _time_engine("rows", df, repeat)
+        vectorized = _time_engine("vectorized", df, repeat)
+        if rows["entries"] != vectorized["entries"]:
+            raise AssertionError(f"Engines disagree for {n_rows} rows")
+
+        results.append({
+            "rows": n_rows,
+            "entries": len(rows["entries"]),
+            "rows_engine_s": rows["seconds"],
+            "vectorized_engine_s": vectorized["seconds"],
+            "speedup": rows["seconds"] / vectorized["seconds"],
+        })
+    return results
+
+
+def bench_table_memory(sizes: List[int]) -> List[Dict[str, Any]]:
+    """
+    Compare the memory held by a list of entry dicts and a BookingTable.
+
+    Args:
+        sizes: Numbers of time rows to benchmark
+
+    Returns:
+        List of result dictionaries, one per size
+    """
+    processor = TimetableProcessor(engine="vectorized")
+    results = []
+    for n_rows in sizes:
+        df = make_timetable_frame(n_rows)
+        measured = {}
+        for as_table in (False, True):
+            tracemalloc.start()
+            entries = processor.process_dataframe(df.copy(), default_date="2025-01-27", as_table=as_table)
+            held, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            measured[as_table] = (len(entries), held)
+            del entries
+
+        results.append({
+            "rows": n_rows,
+            "entries": measured[False][0],
+            "dicts_bytes": measured[False][1],
+            "table_bytes": measured[True][1],
+            "ratio": measured[False][1] / measured[True][1],
+        })
+    return results
+
+
+def bench_readers(sizes: List[int], repeat: int = 1) -> List[Dict[str, Any]]:
+    """
+    Time every available reader engine on generated workbooks.
+
+    The pandas reader is the baseline; every other engine must produce the
+    same entries. Engines whose optional dependency is missing are skipped.
+
+    Args:
+        sizes: Numbers of time rows to benchmark
+        repeat: Number of runs per engine and size; the best one is reported
+
+    Returns:
+        List of result dictionaries, one per size and engine
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_rows in sizes:
+            xlsx_path = os.path.join(tmp_dir, f"timetable_{n_rows}.xlsx")
+            csv_path = os.path.join(tmp_dir, f"timetable_{n_rows}.csv")
+            write_timetable_workbook(xlsx_path, n_rows)
+            write_timetable_workbook(csv_path, n_rows)
+
+            baseline = None
+            for reader in READERS:
+                path = csv_path if reader == "csv" else xlsx_path
+                processor = TimetableProcessor(reader=reader)
+                best = float("inf")
+                try:
+                    for _ in range(repeat):
+                        start = time.perf_counter()
+                        df = processor.read_excel(path)
+                        best = min(best, time.perf_counter() - start)
+                except Exception as e:
+                    if "requires" in str(e):
+                        continue
+                    raise
+
+                entries = processor.process_dataframe(df, default_date="2025-01-27")
+                if baseline is None:
+                    baseline = entries
+                elif entries != baseline:
+                    raise AssertionError(f"Reader {reader} disagrees with pandas for {n_rows} rows")
+
+                results.append({
+                    "rows": n_rows,
+                    "reader": reader,
+                    "columns": len(df.columns),
+                    "seconds": best,
+                })
+    return results
+
+
+def _peak_memory(func) -> int:
+    """
+    Run a function under tracemalloc and return its peak allocation.
+
+    Args:
+        func: Callable taking no arguments
+
+    Returns:
+        Peak traced memory in bytes
+    """
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_stream_memory(sizes: List[int], engine: str = "rows",
+                        max_growth: float = 2.0) -> List[Dict[str, Any]]:
+    """
+    Compare peak memory of the materialised and streaming SQL pipelines.
+
+    The sheet is loaded before measuring, so the numbers cover everything
+    from entry extraction to the SQL file. Streaming peak memory must stay
+    flat as the sheet grows; an AssertionError is raised if the largest size
+    peaks more than max_growth times higher than the smallest.
+
+    Args:
+        sizes: Numbers of time rows to benchmark
+        engine: Extraction engine
+        max_growth: Allowed ratio of largest to smallest streaming peak
+
+    Returns:
+        List of result dictionaries, one per size
+    """
+    processor = TimetableProcessor(engine=engine)
+    generator = SQLGenerator("bookings")
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_file = os.path.join(tmp_dir, "inserts.sql")
+
+        def materialised(df):
+            data = processor.process_dataframe(df, default_date="2025-01-27")
+            generator.save_to_file(generator.generate_insert_statements(data), output_file)
+
+        def streaming(df):
+            entries = processor.iter_dataframe(df, default_date="2025-01-27")
+            generator.write_insert_statements(entries, output_file)
+
+        for n_rows in sizes:
+            df = make_timetable_frame(n_rows)
+            results.append({
+                "rows": n_rows,
+                "materialised_bytes": _peak_memory(lambda: materialised(df)),
+                "streaming_bytes": _peak_memory(lambda: streaming(df)),
+            })
+
+    growth = results[-1]["streaming_bytes"] / results[0]["streaming_bytes"]
+    if growth > max_growth:
+        raise AssertionError(f"Streaming peak memory grew {growth:.1f}x with sheet size")
+    return results
+
+
+def bench_sql_formats(sizes: List[int], repeat: int = 3) -> List[Dict[str, Any]]:
+    """
+    Compare generation time and file size of the SQL output formats.
+
+    Args:
+        sizes: Numbers of time rows to benchmark
+        repeat: Runs per format; the fastest is reported
+
+    Returns:
+        List of result dictionaries, one per size and format
+    """
+    processor = TimetableProcessor(engine="vectorized")
+    generator = SQLGenerator()
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_rows in sizes:
+            table = processor.process_dataframe(make_timetable_frame(n_rows), default_date="2025-01-27",
+                                                as_table=True)
+            for output_format in OUTPUT_FORMATS:
+                path = os.path.join(tmp_dir, f"out.{output_format}")
+                timings = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    generator.write(table, path, output_format=output_format)
+                    timings.append(time.perf_counter() - start)
+                results.append({
+                    "rows": n_rows,
+                    "entries": len(table),
+                    "format": output_format,
+                    "seconds": min(timings),
+                    "bytes": os.path.getsize(path),
+                })
+    return results
+
+
+def make_campus_table(n_entries: int, n_rooms: int = 300, seed: int = 0) -> BookingTable:
+    """
+    Build synthetic extracted entries for a campus of rooms over a term.
+
+    Each room holds back-to-back one hour slots from 08:00, rooms fill up
+    day by day from 2025-01-27, and about one slot in fifty starts half an
+    hour early so it overlaps the slot before it.
+
+    Args:
+        n_entries: Number of entries
+        n_rooms: Number of distinct rooms
+        seed: Random seed
+
+    Returns:
+        BookingTable with the columns process_timetable emits
+    """
+    rng = random.Random(seed)
+    slots_per_day = 10
+    first_day = datetime.date(2025, 1, 27)
+    table = BookingTable()
+    for i in range(n_entries):
+        room_day, slot = divmod(i, slots_per_day)
+        day_index, room = divmod(room_day, n_rooms)
+        date = first_day + datetime.timedelta(days=day_index)
+        start = 8 * 60 + slot * 60 - (30 if slot and rng.random() < 0.02 else 0)
+        end = start + 60
+        table.append({
+            "room_no": f"R{room}",
+            "date": date.isoformat(),
+            "day_of_week": date.strftime("%A"),
+            "start_time": f"{start // 60:02d}:{start % 60:02d}",
+            "end_time": f"{end // 60:02d}:{end % 60:02d}",
+            "time_slot": "",
+            "class": f"SE-{i % 12}",
+            "reason": rng.choice(SUBJECTS),
+            "booked_by": rng.choice(FACULTY),
+        })
+    return table
+
+
+def bench_columnar(sizes: List[int], n_rooms: int = 300, repeat: int = 3) -> List[Dict[str, Any]]:
+    """
+    Time writing and reloading campus-sized entry sets as Parquet and Arrow
+    files, next to writing them as INSERT statements.
+
+    Args:
+        sizes: Numbers of entries to benchmark
+        n_rooms: Number of distinct rooms
+        repeat: Runs per format and size; the fastest is reported
+
+    Returns:
+        List of result dictionaries, one per size and format; load_seconds
+        is the time to open the file as a pyarrow Table and table_seconds
+        the time to load it back into a BookingTable
+    """
+    def best_of(func: Callable[[], Any]) -> Tuple[Any, float]:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - start)
+        return result, min(timings)
+
+    generator = SQLGenerator(column_types=TIMETABLE_COLUMN_TYPES)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_entries in sizes:
+            table = make_campus_table(n_entries, n_rooms)
+            path = os.path.join(tmp_dir, "out.sql")
+            _, seconds = best_of(lambda: generator.write(table, path))
+            results.append({"entries": n_entries, "format": "insert", "write_seconds": seconds,
+                            "bytes": os.path.getsize(path)})
+
+            for output_format in COLUMNAR_FORMATS:
+                path = os.path.join(tmp_dir, f"out.{output_format}")
+                _, write_seconds = best_of(lambda: write_columnar(table, path, output_format))
+                _, load_seconds = best_of(lambda: load_arrow(path))
+                loaded, table_seconds = best_of(lambda: read_columnar(path))
+                if loaded.to_dicts() != table.to_dicts():
+                    raise AssertionError(f"{output_format} file does not load back the entries written")
+                results.append({
+                    "entries": n_entries,
+                    "format": output_format,
+                    "write_seconds": write_seconds,
+                    "load_seconds": load_seconds,
+                    "table_seconds": table_seconds,
+                    "bytes": os.path.getsize(path),
+                })
+    return results
+
+
+def bench_sqlite(sizes: List[int], n_rooms: int = 300, lookups: int = 500) -> List[Dict[str, Any]]:
+    """
+    Load campus-sized entry sets into SQLite and time the per-room, per-date
+    lookup, with and without the lookup index.
+
+    Args:
+        sizes: Numbers of entries to benchmark
+        n_rooms: Number of distinct rooms
+        lookups: Lookups timed per database
+
+    Returns:
+        List of result dictionaries, one per size and index setting
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_entries in sizes:
+            table = make_campus_table(n_entries, n_rooms)
+            for indexed in (False, True):
+                db_path = os.path.join(tmp_dir, f"{n_entries}-{indexed}.db")
+                with SQLiteLoader(db_path) as loader:
+                    load = loader.load_data(table, build_indexes=indexed)
+                    latency = loader.measure_lookups(lookups)
+                results.append({
+                    "entries": n_entries,
+                    "indexed": indexed,
+                    "load_seconds": load["seconds"],
+                    "rows_per_second": load["rows_per_second"],
+                    "median_ms": latency["median_ms"],
+                    "p95_ms": latency["p95_ms"],
+                    "bytes": os.path.getsize(db_path),
+                })
+    return results
+
+
+def bench_conflicts(sizes: List[int], n_rooms: int = 300, repeat: int = 3) -> List[Dict[str, Any]]:
+    """
+    Time the conflict detector on campus-sized entry sets.
+
+    Args:
+        sizes: Numbers of entries to benchmark
+        n_rooms: Number of distinct rooms
+        repeat: Runs per size; the fastest is reported
+
+    Returns:
+        List of result dictionaries, one per size
+    """
+    detector = ConflictDetector()
+    results = []
+    for n_entries in sizes:
+        table = make_campus_table(n_entries, n_rooms)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            conflicts = detector.find_conflicts(table)
+            timings.append(time.perf_counter() - start)
+        results.append({
+            "entries": n_entries,
+            "rooms": n_rooms,
+            "conflicts": len(conflicts),
+            "seconds": min(timings),
+        })
+    return results
+
+
+def bench_availability(sizes: List[int], n_rooms: int = 300, repeat: int = 3) -> List[Dict[str, Any]]:
+    """
+    Time building the availability bitmaps and querying them.
+
+    Args:
+        sizes: Numbers of entries to benchmark
+        n_rooms: Number of distinct rooms
+        repeat: Runs per size; the fastest is reported
+
+    Returns:
+        List of result dictionaries, one per size
+    """
+    results = []
+    for n_entries in sizes:
+        table = make_campus_table(n_entries, n_rooms)
+        build, query = [], []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            availability = RoomAvailability.from_entries(table)
+            build.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for day in DAYS:
+                availability.free_rooms("14:00", "16:00", day=day)
+                availability.free_during("afternoon", day=day)
+                availability.first_free_slot(minutes=60, day=day)
+            query.append((time.perf_counter() - start) / (3 * len(DAYS)))
+        results.append({
+            "entries": n_entries,
+            "rooms": n_rooms,
+            "days": len(availability.days),
+            "build_seconds": min(build),
+            "query_seconds": min(query),
+        })
+    return results
+
+
+def bench_coalesce(sizes: List[int], sample: str = "examples/sample.xlsx") -> List[Dict[str, Any]]:
+    """
+    Compare row counts and output sizes of split and coalesced slot entries.
+
+    Also checks that expanding the coalesced entries gives back the split ones.
+
+    Args:
+        sizes: Numbers of time rows of the generated sheets
+        sample: Workbook measured first; skipped if missing
+
+    Returns:
+        List of result dictionaries, one per sheet and output format
+    """
+    processor = TimetableProcessor(engine="vectorized")
+    generator = SQLGenerator()
+    sheets = []
+    if os.path.exists(sample):
+        sheets.append((os.path.basename(sample), processor.process_timetable(sample, as_table=True)))
+    for n_rows in sizes:
+        sheets.append((f"{n_rows} rows", processor.process_dataframe(
+            make_timetable_frame(n_rows), default_date="2025-01-27", as_table=True)))
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, table in sheets:
+            coalesced = coalesce_slots(table)
+            if sorted(expand_slots(coalesced).rows(), key=repr) != sorted(table.rows(), key=repr):
+                raise AssertionError(f"Expanding the coalesced entries of {name} changed them")
+            for output_format in ("insert", "csv"):
+                sizes_by_layout = {}
+                for layout, data in (("split", table), ("coalesced", coalesced)):
+                    path = os.path.join(tmp_dir, f"{layout}.{output_format}")
+                    generator.write(data, path, output_format=output_format)
+                    sizes_by_layout[layout] = os.path.getsize(path)
+                results.append({
+                    "sheet": name,
+                    "format": output_format,
+                    "split_rows": len(table),
+                    "coalesced_rows": len(coalesced),
+                    "split_bytes": sizes_by_layout["split"],
+                    "coalesced_bytes": sizes_by_layout["coalesced"],
+                })
+    return results
+
+
+def _time_cli(cli_args: Sequence[str], repeat: int) -> float:
+    """
+    Best wall time of main.py run in a fresh interpreter.
+
+    Args:
+        cli_args: Command-line arguments
+        repeat: Number of runs
+
+    Returns:
+        Best wall time in seconds, interpreter startup included
+    """
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, script, *cli_args], check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_startup(sizes: List[int], repeat: int = 5, sample: str = "examples/sample.xlsx") -> List[Dict[str, Any]]:
+    """
+    Time whole command-line runs of the pandas rows engine and the lite engine.
+
+    Each run is a new process, so module imports are paid every time, as
+    they are for a user converting one workbook; the result cache is off.
+    "--help" gives the startup floor. Also checks that both engines write
+    the same SQL.
+
+    Args:
+        sizes: Numbers of time rows of the generated workbooks
+        repeat: Runs per engine and workbook
+        sample: Workbook measured first; skipped if missing
+
+    Returns:
+        List of result dictionaries, one per workbook
+    """
+    results = [{"workbook": "--help", "rows_engine_s": _time_cli(["--help"], repeat)}]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        workbooks = [(os.path.basename(sample), sample)] if os.path.exists(sample) else []
+        for n_rows in sizes:
+            path = os.path.join(tmp_dir, f"timetable_{n_rows}.xlsx")
+            write_timetable_workbook(path, n_rows)
+            workbooks.append((f"{n_rows} rows", path))
+
+        for name, path in workbooks:
+            seconds, outputs = {}, {}
+            for engine in ("rows", "lite"):
+                outputs[engine] = os.path.join(tmp_dir, f"{engine}.sql")
+                seconds[engine] = _time_cli(["--file", path, "--engine", engine, "--no-cache",
+                                             "--date", "2025-01-27", "--output", outputs[engine]], repeat)
+            with open(outputs["rows"], "rb") as rows_file, open(outputs["lite"], "rb") as lite_file:
+                if rows_file.read() != lite_file.read():
+                    raise AssertionError(f"The lite engine wrote different SQL for {name}")
+            results.append({
+                "workbook": name,
+                "rows_engine_s": seconds["rows"],
+                "lite_engine_s": seconds["lite"],
+                "speedup": seconds["rows"] / seconds["lite"],
+            })
+    return results
+
+
+# Stages of bench_pipeline, in order
+PIPELINE_STAGES = ("read_excel", "preprocess_dataframe", "extract", "generate_insert_statements", "upload_data")
+
+
+def _measure(func: Callable[[], Any], repeat: int) -> Tuple[Any, float, int]:
+    """
+    Time a function and measure its peak allocation.
+
+    The timed runs go without tracemalloc, which slows allocation-heavy code
+    down; one extra run under tracemalloc gives the peak.
+
+    Args:
+        func: Callable taking no arguments
+        repeat: Timed runs; the fastest is reported
+
+    Returns:
+        Tuple of (last result, best wall time in seconds, peak traced bytes)
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return result, best, _peak_memory(func)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_pipeline(n_classes: int = 4, n_rows: int = 100, n_rooms: int = 40, n_days: int = 5,
+                   fill_ratio: float = 0.6, engine: str = "rows", reader: str = "pandas",
+                   batch_size: int = 100, repeat: int = 3, seed: int = 0) -> Dict[str, Any]:
+    """
+    Time every stage of the pipeline on a generated multi-sheet workbook.
+
+    The stages are reading the sheets, preprocess_dataframe, entry
+    extraction, generate_insert_statements and upload_data against an
+    in-process MockPostgREST. Each stage is fed the previous stage's output,
+    so a stage's numbers do not include the stages before it. The upload
+    peak includes the mock server, which runs in the same process.
+
+    Args:
+        n_classes: Number of sheets (one class each)
+        n_rows: Time rows per sheet
+        n_rooms: Distinct rooms across the campus
+        n_days: Day columns per sheet
+        fill_ratio: Fraction of day cells that hold a booking
+        engine: Extraction engine
+        reader: Sheet reader
+        batch_size: Rows per INSERT statement and per upload batch
+        repeat: Timed runs per stage; the fastest is reported
+        seed: Random seed
+
+    Returns:
+        JSON-serializable dictionary with the parameters, environment and
+        one result per stage
+    """
+    params = {
+        "classes": n_classes, "rows": n_rows, "rooms": n_rooms, "days": n_days, "fill_ratio": fill_ratio,
+        "engine": engine, "reader": reader, "batch_size": batch_size, "repeat": repeat, "seed": seed,
+    }
+    processor = TimetableProcessor(engine=engine, reader=reader)
+    generator = SQLGenerator(column_types=TIMETABLE_COLUMN_TYPES)
+
+    def preprocess(frames: Dict[str, pd.DataFrame]) -> Dict[str, Tuple[SheetLayout, pd.DataFrame]]:
+        # Every run starts cold; the sheets after the first share its template
+        clear_layout_cache()
+        sheets = {}
+        for name, df in frames.items():
+            layout = processor.detect_layout(df)
+            sheets[name] = (layout, layout.frame(df))
+        return sheets
+
+    def extract(sheets: Dict[str, Tuple[SheetLayout, pd.DataFrame]]) -> BookingTable:
+        table = BookingTable()
+        extractor = processor._extract_vectorized if engine == "vectorized" else processor._extract_rows
+        for name, (layout, df) in sheets.items():
+            table.extend(extractor(df, layout.time_col, layout.day_cols,
+                                   layout.find_date(df, "2025-01-27"), True, name))
+        return table
+
+    def upload(table: BookingTable, url: str) -> Dict[str, Any]:
+        uploader = SupabaseUploader(url, "benchmark-key")
+        try:
+            result = uploader.upload_data(table, batch_size=batch_size)
+        finally:
+            uploader.close()
+        if not result["success"]:
+            raise AssertionError(f"Upload to the mock server failed: {result['message']}")
+        return result
+
+    stages = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "campus.xlsx")
+        write_campus_workbook(path, n_classes, n_rows, n_rooms, n_days, fill_ratio, seed=seed)
+        workbook_bytes = os.path.getsize(path)
+
+        frames, seconds, peak = _measure(lambda: processor.read_sheets(path), repeat)
+        stages.append({"stage": "read_excel", "seconds": seconds, "peak_bytes": peak})
+
+        sheets, seconds, peak = _measure(lambda: preprocess(frames), repeat)
+        stages.append({"stage": "preprocess_dataframe", "seconds": seconds, "peak_bytes": peak})
+
+        table, seconds, peak = _measure(lambda: extract(sheets), repeat)
+        stages.append({"stage": "extract", "seconds": seconds, "peak_bytes": peak})
+
+        statements, seconds, peak = _measure(
+            lambda: generator.generate_insert_statements(table, batch_size=batch_size), repeat)
+        stages.append({"stage": "generate_insert_statements", "seconds": seconds, "peak_bytes": peak,
+                       "sql_bytes": sum(len(statement) for statement in statements)})
+
+        # Server start-up and shutdown (a poll interval) stay outside the timing
+        with MockPostgREST() as server:
+            _, seconds, peak = _measure(lambda: upload(table, server.url), repeat)
+        stages.append({"stage": "upload_data", "seconds": seconds, "peak_bytes": peak})
+
+    for stage in stages:
+        stage["entries_per_s"] = len(table) / stage["seconds"] if stage["seconds"] else None
+
+    return {
+        "benchmark": "pipeline",
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "params": params,
+        "workbook_bytes": workbook_bytes,
+        "entries": len(table),
+        "total_seconds": sum(stage["seconds"] for stage in stages),
+        "stages": stages,
+    }
+
+
+def compare_pipeline(baseline: Dict[str, Any], current: Dict[str, Any],
+                     threshold: float = 0.1) -> List[Dict[str, Any]]:
+    """
+    Compare two bench_pipeline results stage by stage.
+
+    Args:
+        baseline: Earlier result
+        current: New result
+        threshold: Relative slowdown or memory growth that counts as a regression
+
+    Returns:
+        One dictionary per stage present in both, with time and peak memory
+        ratios (current / baseline) and a regression flag
+    """
+    before = {stage["stage"]: stage for stage in baseline["stages"]}
+    rows = []
+    for stage in current["stages"]:
+        old = before.get(stage["stage"])
+        if old is None:
+            continue
+        time_ratio = stage["seconds"] / old["seconds"] if old["seconds"] else float("inf")
+        memory_ratio = stage["peak_bytes"] / old["peak_bytes"] if old["peak_bytes"] else float("inf")
+        rows.append({
+            "stage": stage["stage"],
+            "time_ratio": time_ratio,
+            "memory_ratio": memory_ratio,
+            "regression": time_ratio > 1 + threshold or memory_ratio > 1 + threshold,
+        })
+    return rows
+
+
+def _legacy_format_insert(table_name: str, columns: List[str], batch: List[Dict[str, Any]]) -> str:
+    """
+    Per-value isinstance chain SQLGenerator used before its formatters were
+    compiled per column; kept as the baseline for bench_sql_rows.
+    """
+    value_rows = []
+    for entry in batch:
+        values = []
+        for col in columns:
+            value = entry.get(col, '')
+            if value is None:
+                if col == 'date':
+                    values.append(f"'{datetime.date.today().isoformat()}'")
+                else:
+                    values.append('NULL')
+            elif isinstance(value, bool):
+                values.append('TRUE' if value else 'FALSE')
+            elif isinstance(value, (int, float)):
+                values.append(str(value))
+            elif col == 'date':
+                values.append(f"'{value}'")
+            else:
+                values.append(f"'{str(value).replace(chr(39), chr(39) * 2)}'")
+        value_rows.append(f"({', '.join(values)})")
+    return f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES\n" + ',\n'.join(value_rows) + ";"
+
+
+def bench_sql_rows(sizes: List[int], repeat: int = 3, batch_size: int = 100) -> List[Dict[str, Any]]:
+    """
+    Measure INSERT formatting throughput before and after compiling the
+    value formatters, for a BookingTable and for a list of dicts.
+
+    Args:
+        sizes: Numbers of time rows to benchmark
+        repeat: Runs per variant; the fastest is reported
+        batch_size: Rows per INSERT statement
+
+    Returns:
+        List of result dictionaries, one per size
+    """
+    processor = TimetableProcessor(engine="vectorized")
+    generator = SQLGenerator()
+    results = []
+    for n_rows in sizes:
+        table = processor.process_dataframe(make_timetable_frame(n_rows), default_date="2025-01-27",
+                                            as_table=True)
+        dicts = table.to_dicts()
+        columns = list(table.columns)
+
+        def legacy():
+            return [_legacy_format_insert(generator.table_name, columns, table[i:i + batch_size].to_dicts())
+                    for i in range(0, len(table), batch_size)]
+
+        variants = {
+            "legacy": legacy,
+            "compiled_dicts": lambda: generator.generate_insert_statements(dicts, batch_size=batch_size),
+            "compiled_table": lambda: generator.generate_insert_statements(table, batch_size=batch_size),
+        }
+        timings = {}
+        outputs = {}
+        for name, func in variants.items():
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                outputs[name] = func()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            timings[name] = best
+
+        if not outputs["legacy"] == outputs["compiled_dicts"] == outputs["compiled_table"]:
+            raise AssertionError(f"Compiled formatters changed the SQL output at {n_rows} rows")
+
+        result = {"rows": n_rows, "entries": len(table)}
+        for name, seconds in timings.items():
+            result[f"{name}_rows_per_s"] = len(table) / seconds
+        results.append(result)
+    return results
+
+
+def main():
+    """
+    Run the benchmarks from the command line.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the timetable processor")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    engines_parser = subparsers.add_parser("engines", help="Row loop vs vectorized extraction")
+    engines_parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000],
+                                help="Numbers of time rows")
+    engines_parser.add_argument("--repeat", type=int, default=3, help="Runs per engine and size")
+
+    memory_parser = subparsers.add_parser("table-memory", help="List of dicts vs BookingTable memory")
+    memory_parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000],
+                               help="Numbers of time rows")
+
+    stream_parser = subparsers.add_parser("stream-memory", help="Materialised vs streaming SQL pipeline memory")
+    stream_parser.add_argument("--sizes", type=int, nargs="+", default=[500, 2000, 8000],
+                               help="Numbers of time rows")
+    stream_parser.add_argument("--engine", default="rows", help="Extraction engine")
+
+    readers_parser = subparsers.add_parser("readers", help="Sheet reader engines on generated workbooks")
+    readers_parser.add_argument("--sizes", type=int, nargs="+", default=[500, 2000, 8000],
+                                help="Numbers of time rows")
+    readers_parser.add_argument("--repeat", type=int, default=1, help="Runs per engine and size")
+
+    formats_parser = subparsers.add_parser("sql-formats", help="INSERT vs COPY vs CSV output")
+    formats_parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000],
+                                help="Numbers of time rows")
+    formats_parser.add_argument("--repeat", type=int, default=3, help="Runs per format and size")
+
+    rows_parser = subparsers.add_parser("sql-rows", help="INSERT formatting rows/s, legacy vs compiled formatters")
+    rows_parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000],
+                             help="Numbers of time rows")
+    rows_parser.add_argument("--repeat", type=int, default=3, help="Runs per variant and size")
+
+    columnar_parser = subparsers.add_parser("columnar", help="Parquet and Arrow output: write and reload time")
+    columnar_parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000, 200000],
+                                 help="Numbers of entries")
+    columnar_parser.add_argument("--rooms", type=int, default=300, help="Number of distinct rooms")
+    columnar_parser.add_argument("--repeat", type=int, default=3, help="Runs per format and size")
+
+    sqlite_parser = subparsers.add_parser("sqlite", help="SQLite bulk load rows/s and room/date lookup latency")
+    sqlite_parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000, 200000],
+                               help="Numbers of entries")
+    sqlite_parser.add_argument("--rooms", type=int, default=300, help="Number of distinct rooms")
+    sqlite_parser.add_argument("--lookups", type=int, default=500, help="Lookups timed per database")
+
+    conflicts_parser = subparsers.add_parser("conflicts", help="Double-booking detection on campus-sized data")
+    conflicts_parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000, 200000],
+                                  help="Numbers of entries")
+    conflicts_parser.add_argument("--rooms", type=int, default=300, help="Number of distinct rooms")
+    conflicts_parser.add_argument("--repeat", type=int, default=3, help="Runs per size")
+
+    availability_parser = subparsers.add_parser("availability", help="Room availability bitmaps: build and query time")
+    availability_parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000, 200000],
+                                     help="Numbers of entries")
+    availability_parser.add_argument("--rooms", type=int, default=300, help="Number of distinct rooms")
+    availability_parser.add_argument("--repeat", type=int, default=3, help="Runs per size")
+
+    coalesce_parser = subparsers.add_parser("coalesce", help="Rows and bytes of split vs coalesced slot entries")
+    coalesce_parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000],
+                                 help="Numbers of time rows of the generated sheets")
+    coalesce_parser.add_argument("--sample", default="examples/sample.xlsx", help="Workbook measured first")
+
+    startup_parser = subparsers.add_parser("startup", help="Whole CLI runs: pandas rows engine vs lite engine")
+    startup_parser.add_argument("--sizes", type=int, nargs="+", default=[20, 100, 500],
+                                help="Numbers of time rows of the generated workbooks")
+    startup_parser.add_argument("--repeat", type=int, default=5, help="Runs per engine and workbook")
+    startup_parser.add_argument("--sample", default="examples/sample.xlsx", help="Workbook measured first")
+
+    pipeline_parser = subparsers.add_parser("pipeline", help="Per-stage time and peak memory of the whole pipeline")
+    pipeline_parser.add_argument("--classes", type=int, default=4, help="Sheets in the generated workbook")
+    pipeline_parser.add_argument("--rows", type=int, default=100, help="Time rows per sheet")
+    pipeline_parser.add_argument("--rooms", type=int, default=40, help="Distinct rooms")
+    pipeline_parser.add_argument("--days", type=int, default=5, choices=range(1, 8), help="Day columns per sheet")
+    pipeline_parser.add_argument("--fill", type=float, default=0.6, help="Fraction of day cells booked")
+    pipeline_parser.add_argument("--engine", default="rows", help="Extraction engine")
+    pipeline_parser.add_argument("--reader", choices=READERS, default="pandas", help="Sheet reader")
+    pipeline_parser.add_argument("--batch-size", type=int, default=100, help="Rows per INSERT and upload batch")
+    pipeline_parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage")
+    pipeline_parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    pipeline_parser.add_argument("--output", help="Write the results to this JSON file")
+    pipeline_parser.add_argument("--compare", metavar="BASELINE", help="JSON results of an earlier run to compare with")
+    pipeline_parser.add_argument("--threshold", type=float, default=0.1,
+                                 help="Relative slowdown or memory growth reported as a regression (default: 0.1)")
+    pipeline_parser.add_argument("--fail-on-regression", action="store_true",
+                                 help="Exit with status 1 if --compare finds a regression")
+
+    args = parser.parse_args()
+
+    if args.benchmark == "engines":
+        print(f"{'rows':>8} {'entries':>9} {'rows (s)':>10} {'vectorized (s)':>15} {'speedup':>8}")
+        for r in bench_engines(args.sizes, args.repeat):
+            print(f"{r['rows']:>8} {r['entries']:>9} {r['rows_engine_s']:>10.4f} "
+                  f"{r['vectorized_engine_s']:>15.4f} {r['speedup']:>7.1f}x")
+    elif args.benchmark == "table-memory":
+        print(f"{'rows':>8} {'entries':>9} {'dicts (KiB)':>12} {'table (KiB)':>12} {'ratio':>7}")
+        for r in bench_table_memory(args.sizes):
+            print(f"{r['rows']:>8} {r['entries']:>9} {r['dicts_bytes'] / 1024:>12.0f} "
+                  f"{r['table_bytes'] / 1024:>12.0f} {r['ratio']:>6.1f}x")
+    elif args.benchmark == "readers":
+        print(f"{'rows':>8} {'reader':>10} {'columns':>8} {'read (s)':>10}")
+        for r in bench_readers(args.sizes, args.repeat):
+            print(f"{r['rows']:>8} {r['reader']:>10} {r['columns']:>8} {r['seconds']:>10.4f}")
+    elif args.benchmark == "stream-memory":
+        print(f"{'rows':>8} {'materialised (KiB)':>19} {'streaming (KiB)':>16}")
+        for r in bench_stream_memory(args.sizes, args.engine):
+            print(f"{r['rows']:>8} {r['materialised_bytes'] / 1024:>19.0f} {r['streaming_bytes'] / 1024:>16.0f}")
+    elif args.benchmark == "sql-rows":
+        print(f"{'rows':>8} {'entries':>9} {'legacy (rows/s)':>16} {'dicts (rows/s)':>15} {'table (rows/s)':>15}")
+        for r in bench_sql_rows(args.sizes, args.repeat):
+            print(f"{r['rows']:>8} {r['entries']:>9} {r['legacy_rows_per_s']:>16,.0f} "
+                  f"{r['compiled_dicts_rows_per_s']:>15,.0f} {r['compiled_table_rows_per_s']:>15,.0f}")
+    elif args.benchmark == "sql-formats":
+        print(f"{'rows':>8} {'entries':>9} {'format':>9} {'write (s)':>10} {'size (KiB)':>11}")
+        for r in bench_sql_formats(args.sizes, args.repeat):
+            print(f"{r['rows']:>8} {r['entries']:>9} {r['format']:>9} {r['seconds']:>10.4f} "
+                  f"{r['bytes'] / 1024:>11.0f}")
+    elif args.benchmark == "columnar":
+        print(f"{'entries':>9} {'format':>8} {'write (s)':>10} {'load (ms)':>10} {'to table (ms)':>14} "
+              f"{'size (KiB)':>11}")
+        for r in bench_columnar(args.sizes, args.rooms, args.repeat):
+            if r["format"] == "insert":
+                print(f"{r['entries']:>9} {r['format']:>8} {r['write_seconds']:>10.4f} {'':>10} {'':>14} "
+                      f"{r['bytes'] / 1024:>11.0f}")
+                continue
+            print(f"{r['entries']:>9} {r['format']:>8} {r['write_seconds']:>10.4f} "
+                  f"{r['load_seconds'] * 1000:>10.2f} {r['table_seconds'] * 1000:>14.1f} "
+                  f"{r['bytes'] / 1024:>11.0f}")
+    elif args.benchmark == "sqlite":
+        print(f"{'entries':>9} {'index':>6} {'load (s)':>9} {'rows/s':>10} {'median (ms)':>12} {'p95 (ms)':>9} "
+              f"{'size (KiB)':>11}")
+        for r in bench_sqlite(args.sizes, args.rooms, args.lookups):
+            print(f"{r['entries']:>9} {'yes' if r['indexed'] else 'no':>6} {r['load_seconds']:>9.3f} "
+                  f"{r['rows_per_second']:>10,.0f} {r['median_ms']:>12.3f} {r['p95_ms']:>9.3f} "
+                  f"{r['bytes'] / 1024:>11.0f}")
+    elif args.benchmark == "conflicts":
+        print(f"{'entries':>9} {'rooms':>6} {'conflicts':>10} {'check (s)':>10} {'entries/s':>12}")
+        for r in bench_conflicts(args.sizes, args.rooms, args.repeat):
+            print(f"{r['entries']:>9} {r['rooms']:>6} {r['conflicts']:>10} {r['seconds']:>10.4f} "
+                  f"{r['entries'] / r['seconds']:>12,.0f}")
+
+    elif args.benchmark == "availability":
+        print(f"{'entries':>9} {'rooms':>6} {'days':>5} {'build (s)':>10} {'query (ms)':>11}")
+        for r in bench_availability(args.sizes, args.rooms, args.repeat):
+            print(f"{r['entries']:>9} {r['rooms']:>6} {r['days']:>5} {r['build_seconds']:>10.4f} "
+                  f"{r['query_seconds'] * 1000:>11.3f}")
+
+    elif args.benchmark == "coalesce":
+        print(f"{'sheet':>12} {'format':>7} {'split rows':>11} {'coalesced':>10} {'split (KiB)':>12} "
+              f"{'coalesced (KiB)':>16} {'bytes saved':>12}")
+        for r in bench_coalesce(args.sizes, args.sample):
+            print(f"{r['sheet']:>12} {r['format']:>7} {r['split_rows']:>11} {r['coalesced_rows']:>10} "
+                  f"{r['split_bytes'] / 1024:>12.1f} {r['coalesced_bytes'] / 1024:>16.1f} "
+                  f"{1 - r['coalesced_bytes'] / r['split_bytes']:>11.0%}")
+
+    elif args.benchmark == "startup":
+        print(f"{'workbook':>12} {'rows (s)':>9} {'lite (s)':>9} {'speedup':>8}")
+        for r in bench_startup(args.sizes, args.repeat, args.sample):
+            if "lite_engine_s" not in r:
+                print(f"{r['workbook']:>12} {r['rows_engine_s']:>9.3f}")
+                continue
+            print(f"{r['workbook']:>12} {r['rows_engine_s']:>9.3f} {r['lite_engine_s']:>9.3f} "
+                  f"{r['speedup']:>7.1f}x")
+
+    elif args.benchmark == "pipeline":
+        result = bench_pipeline(args.classes, args.rows, args.rooms, args.days, args.fill, args.engine,
+                                args.reader, args.batch_size, args.repeat, args.seed)
+        print(f"{result['entries']} entries from {args.classes} sheets "
+              f"({result['workbook_bytes'] / 1024:.0f} KiB workbook), commit {result['commit']}")
+        print(f"{'stage':>28} {'wall (s)':>10} {'peak (KiB)':>11} {'entries/s':>12}")
+        for r in result["stages"]:
+            print(f"{r['stage']:>28} {r['seconds']:>10.4f} {r['peak_bytes'] / 1024:>11.0f} "
+                  f"{r['entries_per_s']:>12,.0f}")
+        print(f"{'total':>28} {result['total_seconds']:>10.4f}")
+
+        if args.output:
+            with open(args.output, "w") as file:
+                json.dump(result, file, indent=2)
+            print(f"Results saved to {args.output}")
+
+        if args.compare:
+            with open(args.compare) as file:
+                baseline = json.load(file)
+            print(f"Compared with {args.compare} (commit {baseline.get('commit')}):")
+            if baseline.get("params") != result["params"]:
+                print("Warning: the results were produced with different parameters")
+            print(f"{'stage':>28} {'time':>8} {'memory':>8}")
+            rows = compare_pipeline(baseline, result, args.threshold)
+            for r in rows:
+                flag = "  REGRESSION" if r["regression"] else ""
+                print(f"{r['stage']:>28} {r['time_ratio']:>7.2f}x {r['memory_ratio']:>7.2f}x{flag}")
+            if args.fail_on_regression and any(r["regression"] for r in rows):
+                return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
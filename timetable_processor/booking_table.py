@@ -0,0 +1,346 @@
+"""
+Compact columnar container for extracted timetable entries.
+"""
+import sys
+from array import array
+from collections.abc import Mapping
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, Sequence, Tuple, Union
+
+# Entry fields in the order process_timetable emits them
+COLUMNS = (
+    'room_no', 'day_of_week', 'date', 'time_slot', 'start_time', 'end_time',
+    'booked_by', 'reason', 'status', 'approved_by', 'is_recurring', 'class'
+)
+
+
+class _Column:
+    """
+    Dictionary-encoded column: one array of integer codes plus the list of
+    distinct values they index. String values are interned.
+
+    Values are told apart by type as well as by value, so 1, 1.0 and True
+    keep their own codes, and every NaN shares one code. A column taken
+    from another shares its values until the first new value is encoded.
+    """
+
+    __slots__ = ('codes', 'values', 'lookup', 'shared')
+
+    def __init__(self, codes: Optional[array] = None, values: Optional[List[Any]] = None):
+        self.codes = codes if codes is not None else array('I')
+        self.values = values if values is not None else []
+        self.lookup = {_key(value): code for code, value in enumerate(self.values)}
+        self.shared = False
+
+    def encode(self, value: Any) -> int:
+        """
+        Return the code for a value, adding it to the categories if new.
+
+        Args:
+            value: Column value
+
+        Returns:
+            Integer code of the value
+        """
+        key = value if value.__class__ is str else _key(value)
+        code = self.lookup.get(key)
+        if code is None:
+            if self.shared:
+                # Copy on first write so the column taken from is unchanged
+                self.values = list(self.values)
+                self.lookup = dict(self.lookup)
+                self.shared = False
+            if isinstance(value, str):
+                value = sys.intern(value)
+            code = len(self.values)
+            self.values.append(value)
+            self.lookup[key] = code
+        return code
+
+    def append(self, value: Any) -> None:
+        self.codes.append(self.encode(value))
+
+    def extend(self, values: Iterable[Any]) -> None:
+        encode = self.encode
+        self.codes.extend(encode(value) for value in values)
+
+    def __getstate__(self):
+        # The lookup dict is rebuilt on load rather than pickled
+        return self.codes, self.values
+
+    def __setstate__(self, state):
+        self.codes, self.values = state
+        self.lookup = {_key(value): code for code, value in enumerate(self.values)}
+        self.shared = False
+
+    def take(self, index: slice) -> '_Column':
+        column = _Column.__new__(_Column)
+        column.codes = self.codes[index]
+        column.values = self.values
+        column.lookup = self.lookup
+        column.shared = True
+        # The source must not grow the shared lists either
+        self.shared = True
+        return column
+
+
+_NAN = object()
+
+
+def _key(value: Any) -> Any:
+    # Strings, by far the most common values, are their own key; a str
+    # never equals the tuples used for every other type
+    if value.__class__ is str:
+        return value
+    if isinstance(value, float) and value != value:
+        return float, _NAN
+    return type(value), value
+
+
+class BookingRow(Mapping):
+    """
+    Read-only dict-like view of one row of a BookingTable.
+    """
+
+    __slots__ = ('_table', '_index')
+
+    def __init__(self, table: 'BookingTable', index: int):
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, key: str) -> Any:
+        column = self._table._columns[key]
+        return column.values[column.codes[self._index]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._table.columns)
+
+    def __len__(self) -> int:
+        return len(self._table.columns)
+
+    def __repr__(self) -> str:
+        return f"BookingRow({self.to_dict()!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Copy the row into a plain dictionary.
+
+        Returns:
+            Dictionary with one key per column
+        """
+        return {key: self[key] for key in self._table.columns}
+
+
+class BookingTable:
+    """
+    Columnar store for timetable entries.
+
+    Every column is dictionary-encoded, so the repeated room numbers, days,
+    dates, reasons and constant fields cost one array slot per row instead of
+    one dict entry per row. Rows are exposed as BookingRow views, and
+    to_dicts() gives the list-of-dicts form process_timetable returns.
+    """
+
+    def __init__(self, columns: Sequence[str] = COLUMNS):
+        """
+        Initialize an empty BookingTable.
+
+        Args:
+            columns: Column names, in output order
+        """
+        self.columns = tuple(columns)
+        self._columns = {name: _Column() for name in self.columns}
+        self._length = 0
+
+    @classmethod
+    def from_dicts(cls, entries: Iterable[Dict[str, Any]],
+                   columns: Optional[Sequence[str]] = None) -> 'BookingTable':
+        """
+        Build a table from entry dictionaries.
+
+        Args:
+            entries: Entry dictionaries
+            columns: Column names; taken from the first entry if omitted
+
+        Returns:
+            BookingTable holding the entries
+        """
+        entries = iter(entries)
+        first = next(entries, None)
+        if columns is None:
+            columns = list(first.keys()) if first is not None else COLUMNS
+        table = cls(columns)
+        if first is not None:
+            table.append(first)
+            table.extend(entries)
+        return table
+
+    @classmethod
+    def from_columns(cls, data: Dict[str, Sequence[Any]]) -> 'BookingTable':
+        """
+        Build a table from equal-length column sequences.
+
+        Args:
+            data: Mapping of column name to its values
+
+        Returns:
+            BookingTable holding the rows
+        """
+        table = cls(list(data))
+        lengths = {len(values) for values in data.values()}
+        if len(lengths) > 1:
+            raise ValueError("All columns must have the same length")
+        for name, values in data.items():
+            table._columns[name].extend(values)
+        table._length = lengths.pop() if lengths else 0
+        return table
+
+    @classmethod
+    def from_encoded(cls, data: Dict[str, Tuple[array, List[Any]]]) -> 'BookingTable':
+        """
+        Build a table from dictionary-encoded columns, without decoding them.
+
+        Args:
+            data: Mapping of column name to (codes, distinct values), where
+                codes is an array('I') of indexes into the distinct values;
+                the codes are taken as they are, not checked
+
+        Returns:
+            BookingTable holding the rows
+        """
+        table = cls(list(data))
+        lengths = {len(codes) for codes, _ in data.values()}
+        if len(lengths) > 1:
+            raise ValueError("All columns must have the same length")
+        for name, (codes, values) in data.items():
+            table._columns[name] = _Column(codes, [sys.intern(value) if isinstance(value, str) else value
+                                                   for value in values])
+        table._length = lengths.pop() if lengths else 0
+        return table
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        """
+        Append one entry; missing columns are stored as empty strings.
+
+        Args:
+            entry: Entry dictionary
+        """
+        for name in self.columns:
+            self._columns[name].append(entry.get(name, ''))
+        self._length += 1
+
+    def extend(self, entries: Union[Iterable[Dict[str, Any]], 'BookingTable']) -> None:
+        """
+        Append several entries.
+
+        Args:
+            entries: Entry dictionaries, or another BookingTable
+        """
+        if isinstance(entries, BookingTable):
+            for name in self.columns:
+                if name in entries._columns:
+                    self._columns[name].extend(entries.column(name))
+                else:
+                    self._columns[name].extend([''] * len(entries))
+            self._length += len(entries)
+            return
+
+        for entry in entries:
+            self.append(entry)
+
+    def column(self, name: str) -> List[Any]:
+        """
+        Decode one column.
+
+        Args:
+            name: Column name
+
+        Returns:
+            List of the column's values
+        """
+        column = self._columns[name]
+        values = column.values
+        return [values[code] for code in column.codes]
+
+    def map_column(self, name: str, func: Callable[[Any], Any]) -> List[Any]:
+        """
+        Decode one column through func, calling it once per distinct value.
+
+        Args:
+            name: Column name
+            func: Function applied to each distinct value
+
+        Returns:
+            List of func(value) for every row
+        """
+        column = self._columns[name]
+        mapped = [func(value) for value in column.values]
+        return [mapped[code] for code in column.codes]
+
+    def categories(self, name: str) -> List[Any]:
+        """
+        Return the distinct values of a column.
+
+        Args:
+            name: Column name
+
+        Returns:
+            List of distinct values in first-seen order
+        """
+        return list(self._columns[name].values)
+
+    def encoded(self, name: str) -> Tuple[array, List[Any]]:
+        """
+        Return one column in its dictionary-encoded form, without copying it.
+
+        Args:
+            name: Column name
+
+        Returns:
+            Tuple of (array('I') of codes, distinct values the codes index);
+            both are the table's own storage and must not be modified
+        """
+        column = self._columns[name]
+        return column.codes, column.values
+
+    def rows(self) -> Iterator[tuple]:
+        """
+        Iterate over rows as tuples in column order.
+
+        Returns:
+            Iterator of row tuples
+        """
+        return zip(*(self.column(name) for name in self.columns))
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """
+        Convert the table to the list-of-dicts form.
+
+        Returns:
+            List of entry dictionaries
+        """
+        keys = self.columns
+        return [dict(zip(keys, values)) for values in self.rows()]
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[BookingRow]:
+        for index in range(self._length):
+            yield BookingRow(self, index)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[BookingRow, 'BookingTable']:
+        if isinstance(index, slice):
+            table = BookingTable.__new__(BookingTable)
+            table.columns = self.columns
+            table._columns = {name: column.take(index) for name, column in self._columns.items()}
+            table._length = len(range(*index.indices(self._length)))
+            return table
+
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("BookingTable index out of range")
+        return BookingRow(self, index)
+
+    def __repr__(self) -> str:
+        return f"BookingTable({self._length} rows, columns={list(self.columns)})"
@@ -0,0 +1,190 @@
+"""
+Persistent on-disk cache of extracted timetable entries.
+"""
+import datetime
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from typing import TYPE_CHECKING, Dict, Any, Optional, Sequence, Union
+
+from booking_table import BookingTable
+from engines import PROCESSOR_VERSION
+
+if TYPE_CHECKING:
+    from lite import LiteProcessor
+    from processor import TimetableProcessor
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "TIMETABLE_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "timetable_processor")
+)
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_SUFFIX = ".pkl"
+
+
+class ResultCache:
+    """
+    Cache of process_timetable results keyed by file content.
+
+    The key combines the SHA-256 of the workbook bytes, PROCESSOR_VERSION and
+    the processing options, so a hit never needs to open the workbook.
+    Entries are stored as pickled BookingTables (integer code arrays plus
+    distinct values). The directory is capped at max_bytes; the least
+    recently used entries are evicted first.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES,
+                 debug: bool = False):
+        """
+        Initialize the ResultCache.
+
+        Args:
+            cache_dir: Directory holding the cache entries
+            max_bytes: Size cap for the cache directory
+            debug: Enable debug mode for additional logging
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.debug = debug
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def make_key(self, file_path: str, options: Dict[str, Any]) -> str:
+        """
+        Build the cache key for a workbook and its processing options.
+
+        Args:
+            file_path: Path to the Excel file
+            options: Options that affect the extracted entries
+
+        Returns:
+            Hex digest identifying the result
+        """
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(chunk)
+
+        options = dict(options)
+        if not options.get("default_date"):
+            # Sheets without a date fall back to today's date
+            options["today"] = datetime.date.today().isoformat()
+
+        digest.update(PROCESSOR_VERSION.encode())
+        digest.update(json.dumps(options, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[BookingTable]:
+        """
+        Load a cached result and mark it as recently used.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached BookingTable, or None on a miss
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                table = pickle.load(file)
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            # A truncated or stale entry counts as a miss
+            if self.debug:
+                print(f"Discarding unreadable cache entry {path}: {e}")
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return table
+
+    def put(self, key: str, table: BookingTable) -> None:
+        """
+        Store a result and evict old entries beyond the size cap.
+
+        Args:
+            key: Cache key
+            table: Extracted entries
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                pickle.dump(table, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            self._remove(tmp_path)
+            raise
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Remove least recently used entries until the cache fits max_bytes.
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(_SUFFIX):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def process(self, processor: Union['TimetableProcessor', 'LiteProcessor'], file_path: str,
+                default_date: str = None, sheets: Optional[Sequence[str]] = None, sheet_workers: int = 1) -> BookingTable:
+        """
+        Return the entries of a workbook, from the cache when unchanged.
+
+        Args:
+            processor: Processor used on a miss
+            file_path: Path to the Excel file
+            default_date: Default date in YYYY-MM-DD format if no date is found
+            sheets: Sheet names to process; every sheet if omitted
+            sheet_workers: Worker processes used to parse sheets concurrently
+
+        Returns:
+            BookingTable containing booking details
+        """
+        key = self.make_key(file_path, {
+            "default_date": default_date,
+            "engine": processor.engine,
+            "reader": processor.reader.name,
+            "sheets": list(sheets) if sheets is not None else None,
+        })
+        table = self.get(key)
+        if table is not None:
+            if self.debug:
+                print(f"Cache hit for {file_path}")
+            return table
+
+        table = processor.process_timetable(file_path, default_date=default_date, as_table=True,
+                                            sheets=sheets, sheet_workers=sheet_workers)
+        self.put(key, table)
+        return table
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + _SUFFIX)
+
+    def _remove(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
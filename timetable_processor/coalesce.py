@@ -0,0 +1,128 @@
+"""
+Run-length coalescing of 30-minute slot entries into interval entries.
+
+process_timetable splits every cell into 30-minute entries, so a 2-hour lab
+becomes four entries that differ only in their times. coalesce_slots merges
+such runs back into one entry spanning the whole booking, and expand_slots
+splits interval entries into 30-minute entries again for consumers that
+need that granularity.
+"""
+from typing import List, Dict, Any, Iterable, Iterator, Union
+
+from booking_table import BookingTable
+from slots import format_minutes, parse_clock, slot_range
+
+SLOT_LAYOUTS = ("split", "coalesced")
+
+# Columns that vary between the slots of one booking
+TIME_COLUMNS = ("time_slot", "start_time", "end_time")
+
+
+def coalesce_slots(data: Union[List[Dict[str, Any]], BookingTable]) -> BookingTable:
+    """
+    Merge contiguous entries that are identical apart from their times.
+
+    An entry extends the latest run with the same other columns when it
+    starts where that run ends. Runs are kept in the order their first
+    entry appears; entries without parseable times are kept as they are.
+
+    Args:
+        data: List of dictionaries or a BookingTable of slot entries
+
+    Returns:
+        BookingTable with one entry per contiguous run
+    """
+    table = data if isinstance(data, BookingTable) else BookingTable.from_dicts(data)
+    columns = {name: table.column(name) for name in table.columns}
+    key_names = [name for name in table.columns if name not in TIME_COLUMNS]
+    keys = zip(*(columns[name] for name in key_names)) if key_names else [()] * len(table)
+
+    # Output row of the latest run per key, and each output row's first input row and end
+    latest: Dict[tuple, int] = {}
+    first_rows: List[int] = []
+    starts: List[Any] = []
+    ends: List[Any] = []
+    minute_ends: List[Any] = []
+
+    for row, (key, start, end) in enumerate(zip(keys, columns["start_time"], columns["end_time"])):
+        try:
+            start_minutes, end_minutes = parse_clock(str(start)), parse_clock(str(end))
+        except ValueError:
+            start_minutes = end_minutes = None
+
+        run = latest.get(key)
+        if start_minutes is not None and run is not None and minute_ends[run] == start_minutes:
+            ends[run] = end
+            minute_ends[run] = end_minutes
+            continue
+
+        if start_minutes is not None:
+            latest[key] = len(first_rows)
+        first_rows.append(row)
+        starts.append(start)
+        ends.append(end)
+        minute_ends.append(end_minutes)
+
+    coalesced = {name: [values[row] for row in first_rows] for name, values in columns.items()}
+    coalesced["start_time"] = starts
+    coalesced["end_time"] = ends
+    if "time_slot" in coalesced:
+        coalesced["time_slot"] = [f"{start} - {end}" if end_minutes is not None else slot
+                                  for start, end, end_minutes, slot
+                                  in zip(starts, ends, minute_ends, coalesced["time_slot"])]
+    return BookingTable.from_columns(coalesced)
+
+
+def iter_expanded_slots(data: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Split interval entries into 30-minute entries, lazily.
+
+    Entries already one slot long, and entries without parseable times,
+    come out unchanged.
+
+    Args:
+        data: Iterable of dictionaries or a BookingTable of interval entries
+
+    Yields:
+        Entry dictionaries, one per 30-minute slot
+    """
+    if isinstance(data, BookingTable):
+        data = (row.to_dict() for row in data)
+
+    for entry in data:
+        try:
+            slots = slot_range(parse_clock(str(entry.get("start_time"))), parse_clock(str(entry.get("end_time"))))
+        except ValueError:
+            slots = ()
+        if len(slots) <= 1:
+            yield entry
+            continue
+        for slot_start, slot_end in slots:
+            start, end = format_minutes(slot_start), format_minutes(slot_end)
+            yield dict(entry, time_slot=f"{start} - {end}", start_time=start, end_time=end)
+
+
+def expand_slots(data: Union[List[Dict[str, Any]], BookingTable]) -> BookingTable:
+    """
+    Split interval entries into 30-minute entries.
+
+    Args:
+        data: List of dictionaries or a BookingTable of interval entries
+
+    Returns:
+        BookingTable with one entry per 30-minute slot
+    """
+    columns = data.columns if isinstance(data, BookingTable) else None
+    return BookingTable.from_dicts(iter_expanded_slots(data), columns=columns)
+
+
+if __name__ == "__main__":
+    # Example usage
+    from processor import TimetableProcessor
+
+    processor = TimetableProcessor()
+    data = processor.process_timetable("examples/sample.xlsx", as_table=True)
+
+    coalesced = coalesce_slots(data)
+    print(f"{len(data)} slot entries coalesced into {len(coalesced)} bookings")
+    print(f"Expanded back: {sorted(expand_slots(coalesced).rows(), key=repr) == sorted(data.rows(), key=repr)}")
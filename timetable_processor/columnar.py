@@ -0,0 +1,241 @@
+"""
+Columnar output of extracted entries as Parquet or Arrow IPC files.
+
+The files are typed: dates are date32, is_recurring is a boolean and every
+text column is dictionary-encoded straight from the BookingTable codes, so
+a campus of repeated rooms, days and subjects stores each distinct string
+once. Arrow IPC files are written uncompressed so load_arrow can memory-map
+them and hand out columns that point into the file without copying it.
+
+Requires pyarrow, which is imported only when a columnar file is written
+or read.
+"""
+import datetime
+from array import array
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+from booking_table import BookingTable
+from sql_generator import TIMETABLE_COLUMN_TYPES
+
+COLUMNAR_FORMATS = ("parquet", "arrow")
+
+# First bytes of each format, used to tell the files apart on load
+_MAGIC = {b"PAR1": "parquet", b"ARROW1": "arrow"}
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Parquet and Arrow output require pyarrow (pip install pyarrow)")
+    return pyarrow
+
+
+def to_arrow(data: Iterable[Dict[str, Any]], column_types: Optional[Dict[str, str]] = None):
+    """
+    Convert entries to a typed pyarrow Table.
+
+    Args:
+        data: BookingTable, or an iterable of entry dictionaries
+        column_types: Column name to one of sql_generator.COLUMN_TYPES;
+            defaults to TIMETABLE_COLUMN_TYPES, and columns not listed are
+            text. A column whose values do not fit its type is kept as text.
+
+    Returns:
+        pyarrow.Table with one column per BookingTable column, in order
+    """
+    pa = _pyarrow()
+    table = data if isinstance(data, BookingTable) else BookingTable.from_dicts(data)
+    column_types = TIMETABLE_COLUMN_TYPES if column_types is None else column_types
+
+    arrays = []
+    for name in table.columns:
+        codes, values = table.encoded(name)
+        indices = _indices(pa, codes)
+        try:
+            arrays.append(_typed_array(pa, indices, values, column_types.get(name, "text")))
+        except (ValueError, TypeError, pa.ArrowInvalid, pa.ArrowTypeError):
+            arrays.append(_typed_array(pa, indices, values, "text"))
+    return pa.Table.from_arrays(arrays, names=list(table.columns))
+
+
+def write_columnar(data: Iterable[Dict[str, Any]], output_file: str, output_format: str = "parquet",
+                   column_types: Optional[Dict[str, str]] = None) -> int:
+    """
+    Write entries to a Parquet or Arrow IPC file.
+
+    Unlike the SQL formats the entries are collected in full first, since
+    every row shares one dictionary per column.
+
+    Args:
+        data: BookingTable, or an iterable of entry dictionaries
+        output_file: Output file path
+        output_format: One of COLUMNAR_FORMATS
+        column_types: Column types, see to_arrow
+
+    Returns:
+        Number of rows written
+    """
+    if output_format not in COLUMNAR_FORMATS:
+        raise ValueError(f"Unknown columnar format: {output_format} (expected one of {', '.join(COLUMNAR_FORMATS)})")
+    pa = _pyarrow()
+    arrow_table = to_arrow(data, column_types)
+
+    try:
+        if output_format == "parquet":
+            import pyarrow.parquet as pq
+            pq.write_table(arrow_table, output_file)
+        else:
+            # Uncompressed, so the file can be memory-mapped without decoding
+            with pa.OSFile(output_file, 'wb') as sink:
+                with pa.ipc.new_file(sink, arrow_table.schema) as writer:
+                    writer.write_table(arrow_table)
+        print(f"{output_format.capitalize()} file saved to {output_file}")
+    except Exception as e:
+        raise Exception(f"Failed to save {output_format} file: {e}")
+
+    return arrow_table.num_rows
+
+
+def load_arrow(input_file: str):
+    """
+    Load a columnar file as a pyarrow Table.
+
+    An Arrow IPC file is memory-mapped and its columns point into the
+    mapping, so loading reads no data until a column is used; a Parquet
+    file has to be decoded.
+
+    Args:
+        input_file: Path to a file written by write_columnar
+
+    Returns:
+        pyarrow.Table
+    """
+    pa = _pyarrow()
+    if columnar_format(input_file) == "arrow":
+        return pa.ipc.open_file(pa.memory_map(input_file, 'r')).read_all()
+
+    import pyarrow.parquet as pq
+    return pq.read_table(input_file, memory_map=True)
+
+
+def read_columnar(input_file: str) -> BookingTable:
+    """
+    Load a columnar file back into a BookingTable.
+
+    The table's codes are copied from the file's dictionary indices in one
+    block per column and only the distinct values are converted to Python
+    objects, so the entries are the ones that were written: dates as
+    YYYY-MM-DD strings and is_recurring as a bool.
+
+    Args:
+        input_file: Path to a file written by write_columnar
+
+    Returns:
+        BookingTable holding the entries
+    """
+    pa = _pyarrow()
+    arrow_table = load_arrow(input_file).unify_dictionaries()
+    return BookingTable.from_encoded({
+        name: _encoded(pa, arrow_table.column(name))
+        for name in arrow_table.column_names
+    })
+
+
+def columnar_format(input_file: str) -> str:
+    """
+    Tell whether a file is Parquet or Arrow IPC from its first bytes.
+
+    Args:
+        input_file: File path
+
+    Returns:
+        One of COLUMNAR_FORMATS
+    """
+    with open(input_file, 'rb') as file:
+        head = file.read(6)
+    for magic, output_format in _MAGIC.items():
+        if head.startswith(magic):
+            return output_format
+    raise ValueError(f"Not a Parquet or Arrow file: {input_file}")
+
+
+def _indices(pa, codes: array):
+    # The codes are used as the int32 dictionary indices without a copy
+    if codes.itemsize == 4:
+        return pa.Array.from_buffers(pa.int32(), len(codes), [None, pa.py_buffer(codes)])
+    return pa.array(codes, type=pa.int32())
+
+
+def _typed_array(pa, indices, values: List[Any], col_type: str):
+    """
+    Build a column from its codes and distinct values.
+
+    Args:
+        pa: pyarrow module
+        indices: int32 array of codes
+        values: Distinct values the codes index
+        col_type: Column type
+
+    Returns:
+        Dictionary array for text columns, plain typed array otherwise
+    """
+    if col_type == "text":
+        if None in values:
+            # Parquet wants nulls in the indices, not in the dictionary
+            import pyarrow.compute as pc
+            null_code = pa.scalar(values.index(None), type=pa.int32())
+            indices = pc.if_else(pc.equal(indices, null_code), pa.scalar(None, type=pa.int32()), indices)
+        dictionary = pa.array(['' if value is None else str(value) for value in values], type=pa.string())
+        return pa.DictionaryArray.from_arrays(indices, dictionary)
+    if col_type == "date":
+        dictionary = pa.array([_to_date(value) for value in values], type=pa.date32())
+    elif col_type == "bool":
+        if any(value is not None and not isinstance(value, bool) for value in values):
+            raise TypeError("Boolean column holds other values")
+        dictionary = pa.array(values, type=pa.bool_())
+    elif col_type == "int":
+        dictionary = pa.array(values, type=pa.int64())
+    else:
+        dictionary = pa.array(values, type=pa.float64())
+    return dictionary.take(indices)
+
+
+def _to_date(value: Any) -> Optional[datetime.date]:
+    if value is None or isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(value)
+
+
+def _encoded(pa, column) -> Tuple[array, List[Any]]:
+    """
+    Codes and distinct values of a loaded column.
+
+    Args:
+        pa: pyarrow module
+        column: pyarrow.ChunkedArray whose chunks share one dictionary, or
+            a plain typed column
+
+    Returns:
+        Tuple of (array('I') of codes, distinct values)
+    """
+    if not pa.types.is_dictionary(column.type):
+        column = column.dictionary_encode().unify_dictionaries()
+    if column.num_chunks == 0:
+        return array('I'), []
+
+    dictionary = column.chunk(0).dictionary
+    values = [value.isoformat() if isinstance(value, datetime.date) else value
+              for value in dictionary.to_pylist()]
+    codes = array('I')
+    for chunk in column.chunks:
+        indices = chunk.indices
+        if indices.null_count:
+            # Nulls get a code of their own after the distinct values
+            if None not in values:
+                values.append(None)
+            indices = indices.fill_null(values.index(None))
+        indices = indices.cast(pa.int32())
+        data = memoryview(indices.buffers()[1]).cast('B')
+        codes.frombytes(data[indices.offset * 4:(indices.offset + len(indices)) * 4])
+    return codes, values
@@ -0,0 +1,184 @@
+"""
+Detection of double-booked rooms in extracted timetable entries.
+"""
+import heapq
+import json
+from typing import List, Dict, Any, Sequence, Union
+
+from booking_table import BookingTable
+from slots import MINUTES_PER_DAY, format_minutes, parse_clock
+
+# Entries can only clash within the same room on the same day
+CONFLICT_KEY = ("room_no", "date", "day_of_week")
+
+# Entry fields copied into the report to identify each side of a clash
+REPORT_FIELDS = ("time_slot", "class", "reason", "booked_by")
+
+
+class ConflictDetector:
+    """
+    Finds entries that book the same room for overlapping times.
+
+    Entries are grouped by room and day, each group is sorted by start
+    time, and a sweep keeps a heap of the intervals still open. Every
+    interval overlapping the one being added is reported, so the whole
+    check is O(n log n + k) for n entries and k conflicting pairs.
+    Entries without a room number are skipped.
+    """
+
+    def __init__(self, key_columns: Sequence[str] = CONFLICT_KEY, debug: bool = False):
+        """
+        Initialize the ConflictDetector.
+
+        Args:
+            key_columns: Columns that must match for two entries to clash
+            debug: Enable debug mode for additional logging
+        """
+        self.key_columns = tuple(key_columns)
+        self.debug = debug
+
+    def find_conflicts(self, data: Union[List[Dict[str, Any]], BookingTable]) -> List[Dict[str, Any]]:
+        """
+        Find every pair of overlapping entries in the same room and day.
+
+        Args:
+            data: List of dictionaries or a BookingTable containing timetable data
+
+        Returns:
+            One dictionary per conflicting pair with the key columns, the
+            overlapping window and the indexes and details of both entries
+        """
+        columns = self._columns(data, self.key_columns + ("start_time", "end_time") + REPORT_FIELDS)
+        keys = list(zip(*(columns[name] for name in self.key_columns)))
+        room_index = self.key_columns.index("room_no") if "room_no" in self.key_columns else None
+
+        groups: Dict[tuple, List[int]] = {}
+        for index, key in enumerate(keys):
+            if room_index is not None and not key[room_index]:
+                continue
+            groups.setdefault(key, []).append(index)
+
+        starts = [self._minutes(value) for value in columns["start_time"]]
+        ends = [self._minutes(value) for value in columns["end_time"]]
+
+        conflicts = []
+        for key, indexes in groups.items():
+            if len(indexes) < 2:
+                continue
+
+            intervals = []
+            for index in indexes:
+                start, end = starts[index], ends[index]
+                if start is None or end is None:
+                    continue
+                if end <= start:
+                    # Slot running past midnight
+                    end += MINUTES_PER_DAY
+                intervals.append((start, end, index))
+            intervals.sort()
+
+            active: List[tuple] = []
+            for start, end, index in intervals:
+                while active and active[0][0] <= start:
+                    heapq.heappop(active)
+                for other_end, other in active:
+                    conflicts.append(self._conflict(key, columns, other, index,
+                                                    start, min(end, other_end)))
+                heapq.heappush(active, (end, index))
+
+        if self.debug:
+            print(f"Checked {len(groups)} room/day groups, found {len(conflicts)} conflicts")
+
+        return conflicts
+
+    def build_report(self, data: Union[List[Dict[str, Any]], BookingTable]) -> Dict[str, Any]:
+        """
+        Build a machine-readable conflict report.
+
+        Args:
+            data: List of dictionaries or a BookingTable containing timetable data
+
+        Returns:
+            Dictionary with the entry count, the conflict count, the rooms
+            involved and the conflict details
+        """
+        conflicts = self.find_conflicts(data)
+        return {
+            "entries": len(data),
+            "key_columns": list(self.key_columns),
+            "conflicts": len(conflicts),
+            "rooms": sorted({conflict["room_no"] for conflict in conflicts if "room_no" in conflict}),
+            "details": conflicts,
+        }
+
+    def save_report(self, report: Dict[str, Any], output_file: str) -> None:
+        """
+        Save a conflict report as JSON.
+
+        Args:
+            report: Report from build_report
+            output_file: Output file path
+        """
+        try:
+            with open(output_file, 'w') as file:
+                json.dump(report, file, indent=2)
+            print(f"Conflict report saved to {output_file}")
+        except Exception as e:
+            raise Exception(f"Failed to save conflict report to file: {e}")
+
+    def _conflict(self, key: tuple, columns: Dict[str, List[Any]], first: int, second: int,
+                  start: int, end: int) -> Dict[str, Any]:
+        conflict = dict(zip(self.key_columns, key))
+        conflict["start_time"] = format_minutes(start)
+        conflict["end_time"] = format_minutes(end)
+        conflict["entries"] = [
+            dict({"index": index}, **{name: columns[name][index] for name in REPORT_FIELDS if name in columns})
+            for index in (first, second)
+        ]
+        return conflict
+
+    @staticmethod
+    def _columns(data: Union[List[Dict[str, Any]], BookingTable], names: Sequence[str]) -> Dict[str, List[Any]]:
+        """
+        Extract the needed columns; missing report fields are left out.
+
+        Args:
+            data: List of dictionaries or a BookingTable
+            names: Column names
+
+        Returns:
+            Dictionary of column name to its values
+        """
+        columns = {}
+        for name in dict.fromkeys(names):
+            if isinstance(data, BookingTable):
+                if name in data.columns:
+                    columns[name] = data.column(name)
+            elif data and name in data[0]:
+                columns[name] = [entry.get(name) for entry in data]
+
+            if name not in columns and name not in REPORT_FIELDS:
+                columns[name] = [None] * len(data)
+        return columns
+
+    @staticmethod
+    def _minutes(value: Any):
+        if not value:
+            return None
+        try:
+            return parse_clock(str(value))
+        except ValueError:
+            return None
+
+
+if __name__ == "__main__":
+    # Example usage
+    from processor import TimetableProcessor
+
+    processor = TimetableProcessor()
+    data = processor.process_timetable("examples/sample.xlsx", as_table=True)
+
+    detector = ConflictDetector()
+    report = detector.build_report(data)
+    print(f"{report['conflicts']} conflicts in {report['entries']} entries")
+    print(json.dumps(report["details"][:3], indent=2))
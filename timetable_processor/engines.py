@@ -0,0 +1,232 @@
+"""
+Extraction engines and the parsing rules they share.
+
+Nothing here imports pandas, so the command line can list the engines and
+build the pandas-free "lite" processor without paying for pandas.
+"""
+import re
+import sys
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+from metrics import Metrics
+
+# Booking cell such as "DP (NA)(65)": subject, faculty and room. Anchored at
+# the end so the lazy subject group cannot match an empty prefix.
+BOOKING_PATTERN = r'^(.*?)\s*(?:\(([^)]*)\))?\s*(?:\(([^)]*)\))?\s*$'
+
+_BOOKING_RE = re.compile(BOOKING_PATTERN)
+
+# Engines of TimetableProcessor, which work on pandas DataFrames
+PANDAS_ENGINES = ("rows", "vectorized")
+
+# "lite" is lite.LiteProcessor: the rows engine over plain reader rows
+ENGINES = PANDAS_ENGINES + ("lite",)
+
+# Bump whenever a change alters the extracted entries; it is part of the result cache key
+PROCESSOR_VERSION = "10"
+
+DAYS_OF_WEEK = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday")
+
+# Sheet rows processed at a time when streaming; a time column found by
+# position must show a time range within the first block
+STREAM_CHUNK_ROWS = 200
+
+# Formats tried, in order, for a date found in a sheet
+DATE_FORMATS = (
+    '%m/%d/%Y', '%d/%m/%Y', '%Y/%m/%d',
+    '%m-%d-%Y', '%d-%m-%Y', '%Y-%m-%d',
+    '%m/%d/%y', '%d/%m/%y', '%y/%m/%d',
+    '%m-%d-%y', '%d-%m-%y', '%y-%m-%d'
+)
+
+
+def cell_text(value: Any) -> str:
+    """
+    Text of a non-empty cell, the same whichever engine or reader loaded it.
+
+    Whole numbers lose the ".0" pandas gives them in a column with blanks.
+
+    Args:
+        value: Cell value
+
+    Returns:
+        Cell text
+    """
+    if value.__class__ is str:
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def parse_booking_fields(cell_value: str) -> Tuple[str, str, str]:
+    """
+    Split a non-empty booking cell into its subject, faculty and room.
+
+    The strings are interned, so equal values from different cells are
+    one object.
+
+    Args:
+        cell_value: Cell text such as "DP (NA)(65)"
+
+    Returns:
+        Tuple of (reason, booked_by, room_no)
+    """
+    match = _BOOKING_RE.match(cell_value)
+    if match is None:
+        # If the regex pattern doesn't match, use the whole cell as reason
+        return sys.intern(cell_value.strip()), '', ''
+    reason, booked_by, room_no = match.groups()
+    return (
+        sys.intern(reason.strip()) if reason else '',
+        sys.intern(booked_by.strip()) if booked_by else '',
+        sys.intern(room_no.strip()) if room_no else '',
+    )
+
+
+def parse_booking(cell_value: str) -> Dict[str, str]:
+    """
+    Extract booking details from a non-empty booking cell.
+
+    Args:
+        cell_value: Cell value such as "DP (NA)(65)"
+
+    Returns:
+        Dictionary with reason, booked_by, room_no and status
+    """
+    reason, booked_by, room_no = parse_booking_fields(str(cell_value))
+    return {
+        'reason': reason,
+        'booked_by': booked_by,
+        'room_no': room_no,
+        'status': 'booked'
+    }
+
+
+class BookingCellParser:
+    """
+    Parses booking cells, each distinct cell text once.
+
+    A weekly timetable repeats the same cell text (a course in its room)
+    many times; every repeat gets the tuple parsed the first time, so the
+    entries of those cells share it. The number of distinct texts and the
+    time spent parsing them go to the metrics through record().
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty BookingCellParser.
+        """
+        self.fields: Dict[str, Tuple[str, str, str]] = {}
+        self.seconds = 0.0
+
+    def parse(self, cell_value: Any) -> Tuple[str, str, str]:
+        """
+        Fields of a non-empty booking cell, parsed on first sight.
+
+        Args:
+            cell_value: Cell text; other values are parsed as their cell_text
+
+        Returns:
+            Tuple of (reason, booked_by, room_no)
+        """
+        if cell_value.__class__ is not str:
+            # Also keeps True, 1 and 1.0, which are equal keys, apart
+            cell_value = cell_text(cell_value)
+        fields = self.fields.get(cell_value)
+        if fields is None:
+            start = time.perf_counter()
+            fields = self.fields[cell_value] = parse_booking_fields(cell_value)
+            self.seconds += time.perf_counter() - start
+        return fields
+
+    def parse_many(self, cells: Iterable[Any]) -> List[Tuple[str, str, str]]:
+        """
+        Fields of several cells; pass distinct texts to parse each once in one batch.
+
+        Args:
+            cells: Non-empty cell values
+
+        Returns:
+            Tuples of (reason, booked_by, room_no), in the order of cells
+        """
+        return [self.parse(cell) for cell in cells]
+
+    def record(self, metrics: Metrics) -> None:
+        """
+        Add the distinct texts parsed and the parse time to metrics.
+
+        Args:
+            metrics: Metrics receiving the booking_texts counter and the
+                parse_bookings stage
+        """
+        metrics.incr("booking_texts", len(self.fields))
+        metrics.add_time("parse_bookings", self.seconds)
+
+
+def match_date_format(date_str: str) -> str:
+    """
+    Find the first of DATE_FORMATS a date string parses with.
+
+    Only the formats using the string's separator are tried.
+
+    Args:
+        date_str: Date string such as "27/01/2025"
+
+    Returns:
+        The matching format
+    """
+    separator = '/' if '/' in date_str else '-'
+    for fmt in DATE_FORMATS:
+        if fmt[2] != separator:
+            continue
+        try:
+            datetime.strptime(date_str, fmt)
+            return fmt
+        except ValueError:
+            continue
+
+    raise ValueError(f"Could not parse date: {date_str}")
+
+
+def parse_sheet_date(date_str: str, date_format: Optional[str] = None) -> str:
+    """
+    Parse a date found in a sheet into YYYY-MM-DD format.
+
+    Args:
+        date_str: Date string in one of DATE_FORMATS
+        date_format: Format to use; found with match_date_format if omitted
+
+    Returns:
+        Date in YYYY-MM-DD format
+    """
+    date_format = date_format or match_date_format(date_str)
+    return datetime.strptime(date_str, date_format).strftime('%Y-%m-%d')
+
+
+def create_processor(debug: bool = False, engine: str = "rows", reader: str = "pandas",
+                     metrics: Optional[Metrics] = None):
+    """
+    Create the processor for an extraction engine.
+
+    pandas is only imported when a pandas engine is asked for.
+
+    Args:
+        debug: Enable debug mode for additional logging
+        engine: One of ENGINES
+        reader: Sheet reader, one of readers.READERS
+        metrics: Metrics receiving stage times and extraction counters
+
+    Returns:
+        TimetableProcessor, or LiteProcessor for the "lite" engine
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine} (expected one of {', '.join(ENGINES)})")
+    if engine == "lite":
+        from lite import LiteProcessor
+        return LiteProcessor(debug=debug, reader=reader, metrics=metrics)
+
+    from processor import TimetableProcessor
+    return TimetableProcessor(debug=debug, engine=engine, reader=reader, metrics=metrics)
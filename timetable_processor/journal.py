@@ -0,0 +1,106 @@
+"""
+Append-only journal of upload batches, used to resume interrupted uploads.
+"""
+import json
+import os
+import time
+from typing import Dict, Any
+
+
+class UploadJournal:
+    """
+    Durable record of which upload batches the server acknowledged.
+
+    Every event is one JSON line, flushed and fsynced before the upload
+    moves on, so the journal survives a crash or a killed process. A run
+    that does not resume writes a "reset" event; only acknowledgements
+    after the last reset count when resuming. A partially written last
+    line (from a crash mid-write) is ignored.
+    """
+
+    def __init__(self, path: str, debug: bool = False):
+        """
+        Initialize the UploadJournal.
+
+        Args:
+            path: Journal file, created if missing
+            debug: Enable debug mode for additional logging
+        """
+        self.path = path
+        self.debug = debug
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        if self._file.tell() > 0:
+            with open(path, "rb") as file:
+                file.seek(-1, os.SEEK_END)
+                if file.read(1) != b"\n":
+                    # Terminate a line left half-written by a crash
+                    self._file.write("\n")
+
+    def reset(self, endpoint: str) -> None:
+        """
+        Start a fresh upload; earlier acknowledgements no longer apply.
+
+        Args:
+            endpoint: Table endpoint being uploaded to
+        """
+        self._write({"event": "reset", "endpoint": endpoint})
+
+    def record(self, endpoint: str, batch_id: str, event: str, **details: Any) -> None:
+        """
+        Append a batch event.
+
+        Args:
+            endpoint: Table endpoint the batch was sent to
+            batch_id: Deterministic batch ID
+            event: "sent", "acked" or "failed"
+            **details: Extra fields stored with the event
+        """
+        self._write(dict(details, event=event, endpoint=endpoint, batch_id=batch_id))
+
+    def acknowledged(self, endpoint: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Return the batches acknowledged since the last reset.
+
+        Args:
+            endpoint: Table endpoint to consider
+
+        Returns:
+            Dictionary of batch ID to its "acked" event
+        """
+        acked: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        if self.debug:
+                            print(f"Ignoring incomplete journal line in {self.path}")
+                        continue
+                    if entry.get("endpoint") != endpoint:
+                        continue
+                    if entry["event"] == "reset":
+                        acked.clear()
+                    elif entry["event"] == "acked":
+                        acked[entry["batch_id"]] = entry
+        except FileNotFoundError:
+            pass
+        return acked
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> 'UploadJournal':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        entry["time"] = time.time()
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
@@ -0,0 +1,291 @@
+"""
+Timetable sheet layout detection, cached per template.
+
+A SheetLayout records which row holds the header and which columns hold
+the times and the days. detect_layout finds them in one pass over the top
+of the sheet and caches the result under a fingerprint of the rows down to
+the header, so later sheets exported from the same template skip
+detection. The sheet date is not part of the layout: it is looked up in
+every sheet, since a day-first or month-first reading of a date such as
+03/02/2025 depends on the value, not on the template.
+
+Detection works on plain rows, so the streaming readers and the
+pandas-free lite engine share it (and its cache) with the pandas engines;
+pandas is only imported to relabel a DataFrame in SheetLayout.frame.
+"""
+import re
+from collections import OrderedDict
+from datetime import datetime
+from typing import TYPE_CHECKING, Iterable, List, Any, Optional, Sequence, Tuple
+
+from engines import parse_sheet_date
+from slots import TIME_RANGE_PATTERN
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Sheet rows a header may sit in, counting the first row, which pandas
+# reads as the column labels
+HEADER_SEARCH_ROWS = 6
+
+# Data rows below the header that are searched for the timetable date
+DATE_SEARCH_ROWS = 5
+
+DATE_PATTERN = r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}'
+
+# Layouts kept; the least recently used template is dropped first
+LAYOUT_CACHE_SIZE = 64
+
+_TIME_COLUMN_HINTS = ('time', 'period', 'hour')
+
+_DIGITS = re.compile(r'\d')
+
+_layout_cache: 'OrderedDict[tuple, SheetLayout]' = OrderedDict()
+
+
+class SheetLayout:
+    """
+    Where a timetable sheet keeps its header, times and days.
+    """
+
+    __slots__ = ('header_row', 'time_col', 'time_index', 'time_from_label', 'day_cols', 'day_indexes',
+                 'day_names')
+
+    def __init__(self, header_row: int, labels: Sequence[Any], time_index: int, time_from_label: bool,
+                 day_indexes: List[int], day_names: List[str]):
+        """
+        Initialize the SheetLayout.
+
+        Args:
+            header_row: Sheet row holding the header; 0 is the first row,
+                which read_excel already uses as the column labels
+            labels: Header labels
+            time_index: Position of the time column
+            time_from_label: Whether the time column was recognised by its
+                label rather than by the time ranges below it
+            day_indexes: Positions of the day columns in weekday order
+            day_names: Day of the week of each day column
+        """
+        self.header_row = header_row
+        self.time_index = time_index
+        self.time_col = labels[time_index]
+        self.time_from_label = time_from_label
+        self.day_indexes = day_indexes
+        self.day_cols = [labels[i] for i in day_indexes]
+        self.day_names = day_names
+
+    def frame(self, df: 'pd.DataFrame') -> 'pd.DataFrame':
+        """
+        The sheet below its header row, labelled by the header.
+
+        Args:
+            df: Raw DataFrame as returned by read_excel
+
+        Returns:
+            DataFrame with the header row as column labels
+        """
+        if self.header_row == 0:
+            return df
+        import pandas as pd
+
+        body = df.iloc[self.header_row:]
+        body.columns = pd.Index(df.iloc[self.header_row - 1].tolist(), dtype=object)
+        return body
+
+    def find_date(self, body: 'pd.DataFrame', default_date: str = None, debug: bool = False) -> str:
+        """
+        Find the timetable date in the header labels or the first rows.
+
+        Args:
+            body: DataFrame returned by frame()
+            default_date: Default date in YYYY-MM-DD format if no date is found
+            debug: Enable debug mode for additional logging
+
+        Returns:
+            Date in YYYY-MM-DD format
+        """
+        return find_date(body.columns, body.iloc[:DATE_SEARCH_ROWS].to_numpy(dtype=object), default_date, debug)
+
+
+def detect_layout(df: 'pd.DataFrame', days_of_week: Sequence[str]) -> Tuple[SheetLayout, bool]:
+    """
+    Find the layout of a timetable sheet, from the cache when its template is known.
+
+    Args:
+        df: Raw DataFrame as returned by read_excel
+        days_of_week: Day names used to recognise the header and day columns
+
+    Returns:
+        Tuple of (layout, whether it came from the cache)
+    """
+    head = [list(df.columns)] + df.iloc[:HEADER_SEARCH_ROWS - 1].to_numpy(dtype=object).tolist()
+    layout, cached = detect_rows_layout(head, days_of_week)
+    if not layout.time_from_label:
+        check_time_column(layout.frame(df)[layout.time_col])
+    return layout, cached
+
+
+def detect_rows_layout(head: Sequence[Sequence[Any]], days_of_week: Sequence[str]) -> Tuple[SheetLayout, bool]:
+    """
+    Find the layout of a sheet given as plain rows, from the cache when its template is known.
+
+    A time column chosen by position is not checked, since the rows below
+    the header may not have been read yet; see check_time_column.
+
+    Args:
+        head: First rows of the sheet, at least HEADER_SEARCH_ROWS of them
+            unless the sheet is shorter
+        days_of_week: Day names used to recognise the header and day columns
+
+    Returns:
+        Tuple of (layout, whether it came from the cache)
+    """
+    days = [day.lower() for day in days_of_week]
+
+    # Header row: the first row that names a day
+    header_row = next((i for i, row in enumerate(head[:HEADER_SEARCH_ROWS])
+                       if any(isinstance(value, str) and any(day in value.lower() for day in days)
+                              for value in row)), None)
+    if header_row is None:
+        raise ValueError("Could not identify day columns in the Excel file")
+    labels = list(head[header_row])
+
+    # Title rows are compared with digits masked, so a new date or term in a
+    # title still matches; the header labels must match exactly
+    key = (
+        tuple(days_of_week),
+        header_row,
+        tuple(_masked(value) for row in head[:header_row] for value in row),
+        tuple(_label_key(label) for label in labels),
+    )
+
+    layout = _layout_cache.get(key)
+    if layout is not None:
+        _layout_cache.move_to_end(key)
+        return layout, True
+
+    layout = _detect(labels, header_row, days_of_week)
+    _layout_cache[key] = layout
+    if len(_layout_cache) > LAYOUT_CACHE_SIZE:
+        _layout_cache.popitem(last=False)
+    return layout, False
+
+
+def check_time_column(values: Iterable[Any]) -> None:
+    """
+    Make sure a time column chosen by position holds at least one time range.
+
+    Args:
+        values: Values of the column below the header
+
+    Raises:
+        ValueError: If no value is a time range
+    """
+    if not any(re.match(TIME_RANGE_PATTERN, str(value)) for value in values):
+        raise ValueError("Could not identify time column in Excel file")
+
+
+def find_date(labels: Sequence[Any], rows: Iterable[Sequence[Any]], default_date: str = None,
+              debug: bool = False) -> str:
+    """
+    Find the timetable date in the header labels or the first rows.
+
+    Args:
+        labels: Header labels
+        rows: First DATE_SEARCH_ROWS data rows, as sequences of cell values
+        default_date: Default date in YYYY-MM-DD format if no date is found
+        debug: Enable debug mode for additional logging
+
+    Returns:
+        Date in YYYY-MM-DD format
+    """
+    date_from_excel = _search_date(labels, rows)
+    if date_from_excel is not None:
+        if debug:
+            print(f"Found date in sheet: {date_from_excel}")
+        return date_from_excel
+
+    # Use default date or today's date if no date is found
+    if default_date:
+        return default_date
+    date_from_excel = datetime.now().strftime('%Y-%m-%d')
+    if debug:
+        print(f"Using current date: {date_from_excel}")
+    return date_from_excel
+
+
+def clear_layout_cache() -> None:
+    """
+    Forget every cached layout.
+    """
+    _layout_cache.clear()
+
+
+def _detect(labels: List[Any], header_row: int, days_of_week: Sequence[str]) -> SheetLayout:
+    """
+    Detect the time column and day columns of a sheet whose header is known.
+
+    Args:
+        labels: Header labels
+        header_row: Sheet row holding the header
+        days_of_week: Day names
+
+    Returns:
+        SheetLayout
+    """
+    # Time column: the first labelled as such, else the first column (see check_time_column)
+    time_index = next((i for i, label in enumerate(labels) if isinstance(label, str)
+                       and any(hint in label.lower() for hint in _TIME_COLUMN_HINTS)), None)
+    time_from_label = time_index is not None
+    if not time_from_label:
+        time_index = 0
+
+    # First column for each day, named after the first day its label mentions
+    day_indexes = []
+    for day in days_of_week:
+        matching = [i for i, label in enumerate(labels) if isinstance(label, str) and day.lower() in label.lower()]
+        if matching:
+            day_indexes.append(matching[0])
+    day_names = [next((day for day in days_of_week if day.lower() in str(labels[i]).lower()), str(labels[i]))
+                 for i in day_indexes]
+
+    return SheetLayout(header_row, labels, time_index, time_from_label, day_indexes, day_names)
+
+
+def _search_date(labels: Sequence[Any], rows: Any) -> Optional[str]:
+    """
+    Find the first parseable date in the header labels, then in the first data rows.
+
+    Args:
+        labels: Header labels
+        rows: First data rows, as sequences of cell values
+
+    Returns:
+        Date in YYYY-MM-DD format, or None if no date is found
+    """
+    texts = [label for label in labels if isinstance(label, str)]
+    texts += [str(value) for values in rows for value in values]
+    for text in texts:
+        # Cheap test first: every date has a separator
+        if '/' not in text and '-' not in text:
+            continue
+        date_match = re.search(DATE_PATTERN, text)
+        if date_match:
+            try:
+                return parse_sheet_date(date_match.group(0))
+            except ValueError:
+                continue
+    return None
+
+
+def _label_key(value: Any) -> Any:
+    return None if _is_missing(value) else (type(value).__name__, str(value))
+
+
+def _masked(value: Any) -> Optional[str]:
+    return None if _is_missing(value) else _DIGITS.sub('0', str(value))
+
+
+def _is_missing(value: Any) -> bool:
+    # NaN and NaT are the only cell values unequal to themselves
+    return value is None or value != value
@@ -0,0 +1,250 @@
+"""
+Pandas-free timetable extraction for small workbooks.
+
+LiteProcessor applies the rules of TimetableProcessor's "rows" engine to the
+plain header and row lists a streaming reader returns. The reader turns
+every cell into its engines.cell_text, the text the rows engine parses for
+a cell that is not a string, so the entries are identical to the rows
+engine's, whichever reader that uses. It imports neither pandas nor numpy,
+which for a small workbook take longer to import than the whole parse.
+"""
+import itertools
+import re
+from typing import List, Dict, Any, Generator, Iterable, Optional, Sequence, Tuple, Union
+
+from booking_table import BookingTable
+from engines import DAYS_OF_WEEK, STREAM_CHUNK_ROWS, BookingCellParser
+from layout import DATE_SEARCH_ROWS, HEADER_SEARCH_ROWS, check_time_column, detect_rows_layout, find_date
+from metrics import Metrics
+from readers import SheetRows, get_reader
+from slots import TIME_RANGE_PATTERN, time_range_slots
+
+
+class LiteProcessor:
+    """
+    Extracts timetable entries row by row from plain sheet rows.
+
+    Offers the parts of TimetableProcessor the command line, the batch
+    runner and the result cache use: process_timetable, iter_timetable and
+    the engine, reader, debug and metrics attributes.
+    """
+
+    engine = "lite"
+
+    def __init__(self, debug: bool = False, reader: str = "openpyxl", metrics: Optional[Metrics] = None):
+        """
+        Initialize the LiteProcessor.
+
+        Args:
+            debug: Enable debug mode for additional logging
+            reader: Sheet reader, one of readers.READERS; "pandas" is read
+                with openpyxl instead
+            metrics: Metrics receiving stage times and extraction counters; a
+                fresh one is created if omitted
+        """
+        self.debug = debug
+        self.days_of_week = list(DAYS_OF_WEEK)
+        self.reader = get_reader("openpyxl" if reader == "pandas" else reader, self.days_of_week, debug=debug)
+        self.metrics = metrics if metrics is not None else Metrics()
+
+    def read_sheets(self, file_path: str, sheets: Optional[Sequence[str]] = None) -> Dict[str, SheetRows]:
+        """
+        Read several sheets of an Excel file as plain lists, opening the workbook once.
+
+        Args:
+            file_path: Path to the Excel file
+            sheets: Sheet names to read; every sheet if omitted
+
+        Returns:
+            Dictionary of sheet name to (column labels, data rows), in workbook order
+        """
+        try:
+            tables = self.reader.read_sheet_rows(file_path, sheets)
+            if self.debug:
+                print(f"Successfully read {len(tables)} sheets from Excel file: {file_path}")
+            return tables
+        except Exception as e:
+            raise Exception(f"Failed to read Excel file: {e}")
+
+    def process_timetable(self, file_path: str, default_date: str = None, as_table: bool = False,
+                          sheets: Optional[Sequence[str]] = None,
+                          sheet_workers: int = 1) -> Union[List[Dict[str, Any]], BookingTable]:
+        """
+        Process the timetable Excel file and extract all booking details.
+
+        Args:
+            file_path: Path to the Excel file
+            default_date: Default date in YYYY-MM-DD format if no date is found
+            as_table: Return a compact BookingTable instead of a list of dicts
+            sheets: Sheet names to process; every sheet if omitted
+            sheet_workers: Ignored; small workbooks are parsed in-process
+
+        Returns:
+            List of dictionaries (or a BookingTable) containing booking details
+        """
+        with self.metrics.stage("read_excel"):
+            tables = self.read_sheets(file_path, sheets)
+
+        result = BookingTable() if as_table else []
+        with self.metrics.stage("extract"):
+            result.extend(self._iter_tables(((name, labels, rows) for name, (labels, rows) in tables.items()),
+                                            default_date, sheets))
+        return result
+
+    def iter_timetable(self, file_path: str, default_date: str = None,
+                       sheets: Optional[Sequence[str]] = None) -> Generator[Dict[str, Any], None, None]:
+        """
+        Process the timetable Excel file and yield booking entries one at a time.
+
+        The rows of one sheet at a time are streamed from the reader, so
+        memory stays flat in the workbook size.
+
+        Args:
+            file_path: Path to the Excel file
+            default_date: Default date in YYYY-MM-DD format if no date is found
+            sheets: Sheet names to process; every sheet if omitted
+
+        Yields:
+            Dictionaries containing booking details, in process_timetable order
+        """
+        yield from self._iter_tables(self.reader.iter_sheet_rows(file_path, sheets), default_date, sheets)
+
+    def _iter_tables(self, tables: Iterable[Tuple[str, List[str], Iterable[List[Optional[str]]]]],
+                     default_date: Optional[str],
+                     sheets: Optional[Sequence[str]]) -> Generator[Dict[str, Any], None, None]:
+        """
+        Yield the entries of every sheet, skipping sheets that hold no timetable
+        unless they were named.
+
+        Args:
+            tables: (sheet name, column labels, data rows) of every sheet; the
+                rows may be an iterator read while the entries are yielded
+            default_date: Default date in YYYY-MM-DD format if no date is found
+            sheets: Sheet names that were asked for, or None for every sheet
+
+        Yields:
+            Dictionaries containing booking details
+        """
+        processed = 0
+        for name, labels, rows in tables:
+            # The first block is checked and searched for the date; the rest may still be unread
+            rows = iter(rows)
+            head = list(itertools.islice(rows, STREAM_CHUNK_ROWS))
+            try:
+                time_col, day_cols = self.detect_layout(labels, head)
+            except ValueError as e:
+                # A sheet named explicitly must hold a timetable
+                if sheets is not None:
+                    raise ValueError(f"Sheet {name}: {e}")
+                if self.debug:
+                    print(f"Skipping sheet {name}: {e}")
+                self.metrics.incr("sheets_skipped")
+                continue
+            processed += 1
+            self.metrics.incr("sheets_processed")
+            date_from_excel = find_date(labels, head[:DATE_SEARCH_ROWS], default_date, debug=self.debug)
+            yield from self._iter_rows(itertools.chain(head, rows), time_col, day_cols, date_from_excel, name)
+
+        if not processed:
+            raise ValueError("Could not identify a timetable in any sheet of the Excel file")
+
+    def detect_layout(self, labels: List[str], rows: List[List[Optional[str]]]) -> Tuple[int, List[Tuple[int, str]]]:
+        """
+        Find the time column and the day columns, from the layout cache when
+        the template is known (see layout.detect_rows_layout).
+
+        Args:
+            labels: Column labels
+            rows: Data rows
+
+        Returns:
+            Tuple of (index of the time column, list of (column index, day name)
+            pairs in weekday order)
+        """
+        layout, cached = detect_rows_layout([labels] + rows[:HEADER_SEARCH_ROWS - 1], self.days_of_week)
+        self.metrics.incr("layout_cache_hits" if cached else "layout_cache_misses")
+        if not layout.time_from_label:
+            check_time_column(row[layout.time_index] for row in rows)
+        return layout.time_index, list(zip(layout.day_indexes, layout.day_names))
+
+    def _iter_rows(self, rows: Iterable[List[Optional[str]]], time_col: int, day_cols: List[Tuple[int, str]],
+                   date_from_excel: str, class_name: str = '') -> Generator[Dict[str, Any], None, None]:
+        """
+        Walk the sheet row by row and yield one entry per 30-minute slot.
+
+        Args:
+            rows: Data rows
+            time_col: Index of the time column
+            day_cols: (column index, day name) pairs
+            date_from_excel: Date stamped on every entry
+            class_name: Value of the class field
+
+        Yields:
+            Dictionaries containing booking details
+        """
+        # Counted locally and added to the metrics once the sheet is done
+        rows_scanned = rows_skipped = cells_parsed = cells_skipped = parse_errors = slots_emitted = 0
+        bookings = BookingCellParser()
+        try:
+            for row in rows:
+                rows_scanned += 1
+                time_value = row[time_col]
+                if time_value is None:
+                    rows_skipped += 1
+                    continue
+
+                # Skip header rows or rows with non-time values
+                time_str = time_value.strip()
+                if not re.search(TIME_RANGE_PATTERN, time_str):
+                    rows_skipped += 1
+                    continue
+
+                try:
+                    time_slots = time_range_slots(time_str)
+                except Exception as e:
+                    if self.debug:
+                        print(f"Error processing row with time {time_str}: {str(e)}")
+                    parse_errors += 1
+                    continue
+
+                for col, day_of_week in day_cols:
+                    cell_value = row[col]
+                    if cell_value is None or cell_value.strip() == '':
+                        cells_skipped += 1
+                        continue
+
+                    reason, booked_by, room_no = bookings.parse(cell_value)
+                    cells_parsed += 1
+
+                    for slot_start, slot_end in time_slots:
+                        slots_emitted += 1
+                        yield {
+                            'room_no': room_no,
+                            'day_of_week': day_of_week,
+                            'date': date_from_excel,
+                            'time_slot': f"{slot_start} - {slot_end}",
+                            'start_time': slot_start,
+                            'end_time': slot_end,
+                            'booked_by': booked_by,
+                            'reason': reason,
+                            'status': 'booked',
+                            'approved_by': '',
+                            'is_recurring': True,
+                            'class': class_name
+                        }
+        finally:
+            metrics = self.metrics
+            metrics.incr("rows_scanned", rows_scanned)
+            metrics.incr("rows_skipped", rows_skipped)
+            metrics.incr("cells_parsed", cells_parsed)
+            metrics.incr("cells_skipped", cells_skipped)
+            metrics.incr("parse_errors", parse_errors)
+            metrics.incr("slots_emitted", slots_emitted)
+            bookings.record(metrics)
+
+
+if __name__ == "__main__":
+    # Example usage
+    processor = LiteProcessor(debug=True)
+    results = processor.process_timetable("examples/sample.xlsx")
+    print(f"Extracted {len(results)} time slot entries")
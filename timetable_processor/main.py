@@ -2,14 +2,40 @@
 Command-line interface for the timetable processor.
 """
 import argparse
+import cProfile
+import json
 import os
 import sys
 import logging
+import pstats
 from datetime import datetime
+from typing import Any, Optional
 
-from processor import TimetableProcessor
-from sql_generator import SQLGenerator
-from uploader import SupabaseUploader
+from batch import find_input_files, merge_results, process_files
+from booking_table import BookingTable
+from cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, ResultCache
+from coalesce import SLOT_LAYOUTS, coalesce_slots
+from columnar import COLUMNAR_FORMATS, write_columnar
+from conflicts import ConflictDetector
+from engines import ENGINES, create_processor
+from readers import READERS
+from recurrence import RECURRENCE_MODES, RULE_COLUMN_TYPES, RecurringSchedule
+from sql_generator import OUTPUT_FORMATS, TIMETABLE_COLUMN_TYPES, SQLGenerator
+from journal import UploadJournal
+from metrics import METRICS_FORMATS, Metrics
+from sqlite_loader import SQLiteLoader
+from uploader import DEFAULT_JOURNAL_DIR, DEFAULT_SNAPSHOT_DIR, SYNC_KEY, SupabaseUploader
+
+
+# Default --output path for each --format
+DEFAULT_OUTPUTS = {
+    "insert": "output/inserts.sql",
+    "copy": "output/copy.sql",
+    "copy-csv": "output/copy.sql",
+    "csv": "output/timetable.csv",
+    "parquet": "output/timetable.parquet",
+    "arrow": "output/timetable.arrow",
+}
 
 
 def setup_logging(verbose: bool = False) -> logging.Logger:
@@ -47,84 +73,257 @@ def main():
     """
     # Parse command-line arguments
     parser = argparse.ArgumentParser(description="Process timetable Excel files and convert to SQL or upload to Supabase")
+    commands = parser.add_subparsers(dest="command", title="commands", metavar="COMMAND")
+    query_parser = commands.add_parser("query", help="Query room availability in a timetable "
+                                                     "(see 'main.py query --help')",
+                                       description="Query room availability in a timetable")
+    add_query_arguments(query_parser)
     
-    parser.add_argument("--file", "-f", required=True, help="Path to the Excel file to process")
-    parser.add_argument("--output", "-o", help="Path to save the SQL output file")
+    # Required unless a command is given; checked after parsing
+    input_group = parser.add_mutually_exclusive_group()
+    input_group.add_argument("--file", "-f", help="Path to the Excel file to process")
+    input_group.add_argument("--input-dir", help="Process every workbook in a directory")
+    input_group.add_argument("--glob", help="Process every workbook matching a path glob (e.g. 'terms/*.xlsx')")
+    parser.add_argument("--pattern", default="*.xlsx", help="File pattern used with --input-dir (default: *.xlsx)")
+    parser.add_argument("--workers", type=int, help="Worker processes for --input-dir/--glob (default: CPU count)")
+    parser.add_argument("--sheets", nargs="+", help="Sheet names to process (default: every timetable sheet)")
+    parser.add_argument("--sheet-workers", type=int, default=1,
+                        help="Worker processes used to parse the sheets of a workbook concurrently (default: 1)")
+    parser.add_argument("--output", "-o", help="Path of the output file (default depends on --format)")
     parser.add_argument("--upload", action="store_true", help="Upload data to Supabase")
+    parser.add_argument("--upload-workers", type=int, default=4,
+                        help="Upload requests in flight at once (default: 4)")
+    parser.add_argument("--max-retries", type=int, default=5,
+                        help="Retries per batch on 429/5xx or connection errors (default: 5)")
+    parser.add_argument("--fixed-batch-size", action="store_true",
+                        help="Upload in batches of exactly --batch-size instead of adapting to latency")
+    parser.add_argument("--gzip", action="store_true",
+                        help="Gzip-compress upload request bodies (endpoint must accept Content-Encoding: gzip)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip batches the journal records as acknowledged by an interrupted --upload")
+    parser.add_argument("--journal-dir", default=DEFAULT_JOURNAL_DIR,
+                        help=f"Directory of the upload journals (default: {DEFAULT_JOURNAL_DIR})")
+    parser.add_argument("--on-conflict", nargs="+",
+                        help="Unique key columns; rows already in the table are skipped, making resends idempotent")
+    parser.add_argument("--sync", action="store_true",
+                        help="With --upload, push only rows changed since the last sync (upserts and deletes)")
+    parser.add_argument("--snapshot-dir", default=DEFAULT_SNAPSHOT_DIR,
+                        help=f"Directory of the last-synced snapshots (default: {DEFAULT_SNAPSHOT_DIR})")
+    parser.add_argument("--sync-key", nargs="+", default=list(SYNC_KEY),
+                        help=f"Columns identifying a row for --sync (default: {' '.join(SYNC_KEY)})")
+    parser.add_argument("--sqlite", metavar="DB_PATH",
+                        help="Load the entries into a local SQLite database (created with the bookings schema) "
+                             "instead of writing SQL")
+    parser.add_argument("--replace", action="store_true",
+                        help="With --sqlite, delete the rows already in the table before loading")
     parser.add_argument("--supabase-url", help="Supabase URL")
     parser.add_argument("--supabase-key", help="Supabase API key")
     parser.add_argument("--table", default="timetable", help="Table name (default: timetable)")
     parser.add_argument("--date", help="Override date for all entries (YYYY-MM-DD format)")
     parser.add_argument("--batch-size", type=int, default=50, help="Batch size for uploads/inserts")
+    parser.add_argument("--engine", choices=ENGINES, default="rows",
+                        help="Extraction engine: row-by-row loop, vectorized pandas, or lite "
+                             "(row by row without pandas, for small workbooks; reads with openpyxl) (default: rows)")
+    parser.add_argument("--reader", choices=READERS, default="pandas",
+                        help="Sheet reader: pandas, openpyxl (read-only streaming), calamine or csv (default: pandas)")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS + COLUMNAR_FORMATS, default="insert",
+                        help="Output: multi-row INSERTs, COPY FROM STDIN (text or CSV), a CSV file plus a "
+                             "psql load script, or a typed Parquet or Arrow IPC file (needs pyarrow) "
+                             "(default: insert)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream entries straight into the SQL file instead of building them in memory (bypasses the cache)")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the result cache")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help=f"Result cache directory (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--cache-size-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help="Result cache size cap in MiB; least recently used entries are evicted")
+    parser.add_argument("--check-conflicts", action="store_true",
+                        help="Report rooms booked twice for overlapping times on the same day")
+    parser.add_argument("--conflicts-report", default="output/conflicts.json",
+                        help="Path of the JSON conflict report (default: output/conflicts.json)")
+    parser.add_argument("--fail-on-conflicts", action="store_true",
+                        help="With --check-conflicts, exit with an error and skip output when conflicts are found")
+    parser.add_argument("--slots", choices=SLOT_LAYOUTS, default="split",
+                        help="split: one row per 30-minute slot; coalesced: one row per contiguous booking "
+                             "(default: split)")
+    parser.add_argument("--recurrence", choices=RECURRENCE_MODES, default="single",
+                        help="single: each weekly slot once with the timetable date; rules: each slot once with "
+                             "its weekly rule over the term; expand: one row per occurrence (default: single)")
+    parser.add_argument("--term-start", help="First day of the term (YYYY-MM-DD), for --recurrence rules/expand")
+    parser.add_argument("--term-end", help="Last day of the term (YYYY-MM-DD), for --recurrence rules/expand")
+    parser.add_argument("--holidays", nargs="+", default=[], help="Dates without classes (YYYY-MM-DD)")
+    parser.add_argument("--window-start", help="With --recurrence expand, first date to emit (default: term start)")
+    parser.add_argument("--window-end", help="With --recurrence expand, last date to emit (default: term end)")
+    parser.add_argument("--metrics", help="Write stage timings and counters to this file")
+    parser.add_argument("--metrics-format", choices=METRICS_FORMATS, default="json",
+                        help="--metrics file format: JSON or a Prometheus textfile (default: json)")
+    parser.add_argument("--profile", metavar="STATS_FILE",
+                        help="Profile the run with cProfile, save the stats to STATS_FILE and print the top "
+                             "functions (worker processes are not profiled)")
     parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose logging")
     
     args = parser.parse_args()
     
+    if args.command == "query":
+        return run_query(args)
+    
+    if not (args.file or args.input_dir or args.glob):
+        parser.error("one of the arguments --file/-f --input-dir --glob is required")
+    
     # Set up logging
     logger = setup_logging(args.verbose)
     
     # Validate input file
-    if not os.path.exists(args.file):
+    if args.file and not os.path.exists(args.file):
         logger.error(f"Input file not found: {args.file}")
         return 1
     
+    if args.input_dir and not os.path.isdir(args.input_dir):
+        logger.error(f"Input directory not found: {args.input_dir}")
+        return 1
+    
     # If upload is requested, check Supabase credentials
     if args.upload and (not args.supabase_url or not args.supabase_key):
         logger.error("Supabase URL and API key are required for upload")
         return 1
     
+    if args.sync and not args.upload:
+        logger.error("--sync requires --upload")
+        return 1
+    
+    if args.resume and (not args.upload or args.sync):
+        logger.error("--resume applies to --upload without --sync")
+        return 1
+    
+    if args.sqlite and args.upload:
+        logger.error("--sqlite and --upload cannot be combined")
+        return 1
+    
+    if args.replace and not args.sqlite:
+        logger.error("--replace requires --sqlite")
+        return 1
+    
+    if args.stream and (args.upload or args.sqlite):
+        logger.error("--stream only applies to SQL output")
+        return 1
+    
+    if args.stream and args.check_conflicts:
+        logger.error("--check-conflicts needs every entry and cannot be combined with --stream")
+        return 1
+    
+    if args.recurrence != "single" and not (args.term_start and args.term_end):
+        logger.error("--recurrence rules/expand requires --term-start and --term-end")
+        return 1
+    
+    if args.stream and args.recurrence != "single":
+        logger.error("--recurrence rules/expand cannot be combined with --stream")
+        return 1
+    
+    if args.stream and args.slots != "split":
+        logger.error("--slots coalesced cannot be combined with --stream")
+        return 1
+    
+    if args.stream and args.format in COLUMNAR_FORMATS:
+        logger.error("--stream cannot write Parquet or Arrow files, which need every entry")
+        return 1
+    
+    if args.stream and not args.file:
+        logger.error("--stream only applies to a single --file")
+        return 1
+    
     # If output path is specified, ensure directory exists
     if args.output:
         output_dir = os.path.dirname(args.output)
         if output_dir and not os.path.exists(output_dir):
             os.makedirs(output_dir, exist_ok=True)
     
-    # Process timetable
-    # In the main() function in main.py, modify the timetable processing part:
+    # Process timetable, timing every stage and optionally under the profiler
+    metrics = Metrics()
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler is not None:
+        profiler.enable()
+    try:
+        with metrics.stage("total"):
+            exit_code = run_file(args, logger, metrics)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            save_profile(profiler, args.profile, logger)
+    
+    if args.metrics:
+        metrics_dir = os.path.dirname(args.metrics)
+        if metrics_dir:
+            os.makedirs(metrics_dir, exist_ok=True)
+        metrics.save(args.metrics, args.metrics_format)
+        logger.info(f"Metrics saved to {args.metrics}")
+    
+    return exit_code
+
+
+def save_profile(profiler: cProfile.Profile, stats_file: str, logger: logging.Logger, top: int = 25) -> None:
+    """
+    Save cProfile stats and print the functions with the most cumulative time.
+    
+    Args:
+        profiler: Stopped profiler
+        stats_file: Output path; load it with pstats or snakeviz
+        logger: Logger
+        top: Number of functions printed
+    """
+    stats_dir = os.path.dirname(stats_file)
+    if stats_dir:
+        os.makedirs(stats_dir, exist_ok=True)
+    profiler.dump_stats(stats_file)
+    logger.info(f"Profile saved to {stats_file}")
+    pstats.Stats(profiler, stream=sys.stdout).sort_stats("cumulative").print_stats(top)
 
-# Process timetable
+
+def run_file(args: argparse.Namespace, logger: logging.Logger, metrics: Metrics) -> int:
+    """
+    Process --file (or hand over to run_batch) and write the output.
+    
+    Args:
+        args: Parsed command-line arguments
+        logger: Logger
+        metrics: Metrics receiving stage timings and counters
+        
+    Returns:
+        Exit code
+    """
     try:
+        if not args.file:
+            return run_batch(args, logger, metrics)
+        
         logger.info(f"Processing file: {args.file}")
-        processor = TimetableProcessor(debug=args.verbose)
+        processor = create_processor(debug=args.verbose, engine=args.engine, reader=args.reader,
+                                     metrics=metrics)
+        
+        if args.stream:
+            # Stream entries from the workbook straight into the SQL file
+            output_file = args.output or DEFAULT_OUTPUTS[args.format]
+            logger.info(f"Streaming {args.format} output to: {output_file}")
+            
+            generator = SQLGenerator(args.table, column_types=TIMETABLE_COLUMN_TYPES)
+            entries = processor.iter_timetable(args.file, default_date=args.date, sheets=args.sheets)
+            # Parsing and writing interleave, so they are timed as one stage
+            with metrics.stage("stream"):
+                rows = generator.write(entries, output_file, output_format=args.format, batch_size=args.batch_size)
+            metrics.incr("rows_written", rows)
+            logger.info(f"Wrote {rows} time slot entries to {output_file}")
+            
+            if rows == 0:
+                logger.error("No data extracted from the file")
+                return 1
+            return 0
         
         # Pass the date parameter to the processor
-        data = processor.process_timetable(args.file, default_date=args.date)
+        data = load_entries(processor, args, logger)
         logger.info(f"Extracted {len(data)} time slot entries")
         
         if len(data) == 0:
             logger.error("No data extracted from the file")
             return 1
         
-        # Generate SQL or upload to Supabase
-        if args.upload:
-            logger.info(f"Uploading data to Supabase: {args.supabase_url}")
-            uploader = SupabaseUploader(args.supabase_url, args.supabase_key, args.table)
-            
-            # Verify connection
-            if not uploader.verify_connection():
-                logger.error("Could not connect to Supabase. Check your URL and API key.")
-                return 1
-            
-            # Upload data
-            result = uploader.upload_data(data, batch_size=args.batch_size)
-            
-            if result["success"]:
-                logger.info(result["message"])
-            else:
-                logger.error(f"Upload failed: {result['message']}")
-                logger.debug(f"Details: {result['details']}")
-                return 1
-        
-        else:
-            # Generate SQL
-            output_file = args.output or "output/inserts.sql"
-            logger.info(f"Generating SQL insert statements to: {output_file}")
-            
-            generator = SQLGenerator(args.table)
-            statements = generator.generate_insert_statements(data, batch_size=args.batch_size)
-            
-            generator.save_to_file(statements, output_file)
-            logger.info(f"SQL statements saved to {output_file}")
+        return write_output(data, args, logger, metrics)
     
     except Exception as e:
         logger.error(f"Error processing timetable: {str(e)}")
@@ -134,5 +333,335 @@ def main():
         return 1
 
 
+def load_entries(processor: Any, args: argparse.Namespace, logger: logging.Logger) -> BookingTable:
+    """
+    Extract the entries of --file, through the result cache unless --no-cache.
+    
+    Args:
+        processor: Processor returned by create_processor
+        args: Parsed command-line arguments
+        logger: Logger
+        
+    Returns:
+        Extracted entries
+    """
+    if args.no_cache:
+        return processor.process_timetable(args.file, default_date=args.date, as_table=True,
+                                           sheets=args.sheets, sheet_workers=args.sheet_workers)
+    
+    cache = ResultCache(args.cache_dir, args.cache_size_mb * 1024 * 1024, debug=args.verbose)
+    data = cache.process(processor, args.file, default_date=args.date,
+                         sheets=args.sheets, sheet_workers=args.sheet_workers)
+    processor.metrics.incr("cache_hits", cache.hits)
+    processor.metrics.incr("cache_misses", cache.misses)
+    logger.info(f"Cache: {cache.hits} hits, {cache.misses} misses")
+    return data
+
+
+def period_name(value: str) -> str:
+    """
+    argparse type for --period that only imports availability when used.
+    
+    Args:
+        value: Period name given on the command line
+        
+    Returns:
+        The period name
+    """
+    from availability import PERIODS
+    if value not in PERIODS:
+        raise argparse.ArgumentTypeError(f"invalid choice: '{value}' (choose from {', '.join(PERIODS)})")
+    return value
+
+
+def add_query_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add the options of the query command.
+    
+    Usage: main.py query --file FILE (--free START END | --period NAME | --first-free | --busy ROOM)
+    
+    Args:
+        parser: Parser of the query command
+    """
+    parser.add_argument("--file", "-f", required=True, help="Path to the Excel file to query")
+    parser.add_argument("--sheets", nargs="+", help="Sheet names to process (default: every timetable sheet)")
+    parser.add_argument("--sheet-workers", type=int, default=1,
+                        help="Worker processes used to parse the sheets of a workbook concurrently (default: 1)")
+    parser.add_argument("--date", help="Override date for all entries (YYYY-MM-DD format)")
+    parser.add_argument("--engine", choices=ENGINES, default="rows", help="Extraction engine (default: rows)")
+    parser.add_argument("--reader", choices=READERS, default="pandas", help="Sheet reader (default: pandas)")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the result cache")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help=f"Result cache directory (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--cache-size-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help="Result cache size cap in MiB; least recently used entries are evicted")
+    parser.add_argument("--on", help="Only consider bookings on this date (YYYY-MM-DD)")
+    parser.add_argument("--day", help="Only consider bookings on this day of the week")
+    
+    query_group = parser.add_mutually_exclusive_group(required=True)
+    query_group.add_argument("--free", nargs=2, metavar=("START", "END"), help="Rooms free between START and END (HH:MM)")
+    query_group.add_argument("--period", type=period_name, metavar="NAME",
+                             help="Rooms free for a whole named period: morning, afternoon or evening")
+    query_group.add_argument("--first-free", action="store_true", help="First free stretch of every room")
+    query_group.add_argument("--busy", metavar="ROOM", help="Booked half-hour slots of one room")
+    parser.add_argument("--after", default="08:00", help="With --first-free, earliest start (default: 08:00)")
+    parser.add_argument("--until", default="21:00", help="With --first-free, latest end (default: 21:00)")
+    parser.add_argument("--minutes", type=int, default=30, help="With --first-free, stretch length (default: 30)")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose logging")
+
+
+def run_query(args: argparse.Namespace) -> int:
+    """
+    Answer a room availability query about a timetable workbook.
+    
+    Args:
+        args: Parsed arguments of the query command
+        
+    Returns:
+        Exit code
+    """
+    # numpy is only needed for queries
+    from availability import RoomAvailability
+    # The answer goes to stdout as JSON; only problems are logged unless --verbose
+    logger = setup_logging(args.verbose)
+    if not args.verbose:
+        logger.setLevel(logging.WARNING)
+    
+    if not os.path.exists(args.file):
+        logger.error(f"Input file not found: {args.file}")
+        return 1
+    
+    try:
+        processor = create_processor(debug=args.verbose, engine=args.engine, reader=args.reader)
+        availability = RoomAvailability.from_entries(load_entries(processor, args, logger))
+        
+        if args.free:
+            result = {"free_rooms": availability.free_rooms(*args.free, date=args.on, day=args.day)}
+        elif args.period:
+            result = {"free_rooms": availability.free_during(args.period, date=args.on, day=args.day)}
+        elif args.first_free:
+            result = {"first_free": availability.first_free_slot(args.after, args.until, args.minutes,
+                                                                 date=args.on, day=args.day)}
+        else:
+            if args.busy not in availability.rooms:
+                logger.error(f"Room not found in timetable: {args.busy}")
+                return 1
+            result = {"busy_slots": [f"{start} - {end}" for start, end in
+                                     availability.busy_slots(args.busy, date=args.on, day=args.day)]}
+    
+    except Exception as e:
+        logger.error(f"Error querying timetable: {str(e)}")
+        return 1
+    
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+def run_batch(args: argparse.Namespace, logger: logging.Logger, metrics: Optional[Metrics] = None) -> int:
+    """
+    Process several workbooks in parallel and write one merged output.
+    
+    Args:
+        args: Parsed command-line arguments
+        logger: Logger
+        metrics: Metrics receiving stage timings and counters; the workers'
+            stage times are summed across processes
+        
+    Returns:
+        Exit code; 1 if any file failed or nothing was extracted
+    """
+    if args.input_dir:
+        paths = find_input_files(args.input_dir, args.pattern)
+    else:
+        paths = find_input_files(pattern=args.glob)
+    
+    if not paths:
+        logger.error("No input files found")
+        return 1
+    
+    logger.info(f"Processing {len(paths)} files with {args.workers or os.cpu_count()} workers")
+    options = {
+        "debug": args.verbose,
+        "engine": args.engine,
+        "reader": args.reader,
+        "default_date": args.date,
+        "sheets": args.sheets,
+        "cache_dir": None if args.no_cache else args.cache_dir,
+        "cache_max_bytes": args.cache_size_mb * 1024 * 1024,
+    }
+    metrics = metrics if metrics is not None else Metrics()
+    with metrics.stage("process_files"):
+        results = process_files(paths, options, workers=args.workers)
+    for r in results:
+        if "metrics" in r:
+            metrics.merge(r["metrics"])
+    
+    # Per-file summary
+    failed = [r for r in results if not r["success"]]
+    for r in results:
+        if r["success"]:
+            cached = " from cache" if r.get("cache") == "hit" else ""
+            logger.info(f"  {r['file']}: {r['records']} entries{cached} ({r['seconds']:.2f}s)")
+        else:
+            logger.error(f"  {r['file']}: FAILED ({r['error']})")
+    logger.info(f"Processed {len(results) - len(failed)}/{len(results)} files successfully")
+    if not args.no_cache:
+        hits = sum(1 for r in results if r.get("cache") == "hit")
+        misses = sum(1 for r in results if r.get("cache") == "miss")
+        logger.info(f"Cache: {hits} hits, {misses} misses")
+    
+    data = merge_results(results)
+    logger.info(f"Extracted {len(data)} time slot entries")
+    
+    if len(data) == 0:
+        logger.error("No data extracted from the files")
+        return 1
+    
+    exit_code = write_output(data, args, logger, metrics)
+    return 1 if failed else exit_code
+
+
+def write_output(data: BookingTable, args: argparse.Namespace, logger: logging.Logger,
+                 metrics: Optional[Metrics] = None) -> int:
+    """
+    Generate SQL, write a columnar file, or load the extracted entries into
+    SQLite or Supabase.
+    
+    Args:
+        data: Extracted entries
+        args: Parsed command-line arguments
+        logger: Logger
+        metrics: Metrics receiving stage timings and counters
+        
+    Returns:
+        Exit code
+    """
+    metrics = metrics if metrics is not None else Metrics()
+    
+    if args.check_conflicts:
+        detector = ConflictDetector(debug=args.verbose)
+        with metrics.stage("check_conflicts"):
+            report = detector.build_report(data)
+        report_dir = os.path.dirname(args.conflicts_report)
+        if report_dir:
+            os.makedirs(report_dir, exist_ok=True)
+        detector.save_report(report, args.conflicts_report)
+        if report["conflicts"]:
+            logger.warning(f"Found {report['conflicts']} conflicting bookings in {len(report['rooms'])} rooms; "
+                           f"see {args.conflicts_report}")
+            if args.fail_on_conflicts:
+                return 1
+        else:
+            logger.info("No conflicting bookings found")
+    
+    if args.slots == "coalesced":
+        slot_count = len(data)
+        with metrics.stage("coalesce_slots"):
+            data = coalesce_slots(data)
+        logger.info(f"Coalesced {slot_count} slot entries into {len(data)} bookings")
+    
+    column_types = TIMETABLE_COLUMN_TYPES
+    if args.recurrence != "single":
+        schedule = RecurringSchedule(data, args.term_start, args.term_end, args.holidays)
+        if args.recurrence == "rules":
+            data = schedule.to_rules()
+            column_types = dict(TIMETABLE_COLUMN_TYPES, **RULE_COLUMN_TYPES)
+            logger.info(f"Emitting {len(data)} weekly rules from {schedule.term_start} to {schedule.term_end}")
+        else:
+            occurrences = schedule.count_occurrences(args.window_start, args.window_end)
+            logger.info(f"Expanding {len(data)} weekly entries into {occurrences} occurrences")
+            # Uploads need the rows in memory; SQL output streams them
+            if args.upload:
+                with metrics.stage("expand_recurrence"):
+                    data = schedule.expand(args.window_start, args.window_end)
+            else:
+                data = schedule.iter_occurrences(args.window_start, args.window_end)
+    
+    if args.upload:
+        logger.info(f"Uploading data to Supabase: {args.supabase_url}")
+        uploader = SupabaseUploader(args.supabase_url, args.supabase_key, args.table,
+                                    max_workers=args.upload_workers, max_retries=args.max_retries,
+                                    compress=args.gzip)
+        
+        # Verify connection
+        if not uploader.verify_connection():
+            logger.error("Could not connect to Supabase. Check your URL and API key.")
+            return 1
+        
+        # Upload data, or only the changes since the last sync
+        with metrics.stage("upload"):
+            if args.sync:
+                result = uploader.sync_data(data, snapshot_dir=args.snapshot_dir,
+                                            key_columns=args.sync_key, batch_size=args.batch_size)
+            else:
+                journal_path = os.path.join(args.journal_dir, f"{args.table}.jsonl")
+                with UploadJournal(journal_path, debug=args.verbose) as journal:
+                    result = uploader.upload_data(data, batch_size=args.batch_size,
+                                                  adaptive=not args.fixed_batch_size,
+                                                  journal=journal, resume=args.resume,
+                                                  on_conflict=args.on_conflict)
+        for warning in result.get("warnings", []):
+            logger.warning(warning)
+        metrics.incr("batches_sent", result.get("batches_sent", 0))
+        metrics.incr("batch_retries", result.get("retries", 0))
+        metrics.incr("bytes_uploaded", result.get("bytes_after", 0))
+        metrics.incr("rows_uploaded", result.get("rows_acknowledged", 0))
+        
+        if result["success"]:
+            logger.info(result["message"])
+            logger.info(f"Payload: {result['bytes_before']} bytes serialized, {result['bytes_after']} bytes sent, "
+                        f"{result['serialize_seconds']:.3f}s serializing")
+        else:
+            logger.error(f"Upload failed: {result['message']}")
+            if not args.sync:
+                logger.error("Rerun with --resume to send only the batches that were not acknowledged")
+            logger.debug(f"Details: {result['details']}")
+            return 1
+    
+    elif args.sqlite:
+        logger.info(f"Loading data into SQLite database: {args.sqlite}")
+        db_dir = os.path.dirname(args.sqlite)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        
+        with SQLiteLoader(args.sqlite, args.table, column_types=column_types, debug=args.verbose) as loader:
+            with metrics.stage("load_sqlite"):
+                result = loader.load_data(data, replace=args.replace)
+            if not result["success"]:
+                logger.error(result["message"])
+                return 1
+            metrics.incr("rows_loaded", result["rows"])
+            logger.info(f"{result['message']} in {result['seconds']:.3f}s "
+                        f"({result['rows_per_second']:,.0f} rows/s)")
+            
+            # The lookup of one room on one date the frontend runs
+            with metrics.stage("measure_lookups"):
+                lookups = loader.measure_lookups()
+            index = "index" if lookups["uses_index"] else "full scan"
+            logger.info(f"Room/date lookup over {lookups['queries']} queries ({index}): "
+                        f"median {lookups['median_ms']:.3f} ms, p95 {lookups['p95_ms']:.3f} ms")
+    
+    elif args.format in COLUMNAR_FORMATS:
+        output_file = args.output or DEFAULT_OUTPUTS[args.format]
+        logger.info(f"Writing {args.format} output to: {output_file}")
+        
+        with metrics.stage("write_columnar"):
+            rows = write_columnar(data, output_file, output_format=args.format, column_types=column_types)
+        metrics.incr("rows_written", rows)
+        logger.info(f"Output saved to {output_file}")
+    
+    else:
+        # Generate SQL
+        output_file = args.output or DEFAULT_OUTPUTS[args.format]
+        logger.info(f"Generating {args.format} output to: {output_file}")
+        
+        generator = SQLGenerator(args.table, column_types=column_types)
+        with metrics.stage("generate_sql"):
+            rows = generator.write(data, output_file, output_format=args.format, batch_size=args.batch_size)
+        metrics.incr("rows_written", rows)
+        logger.info(f"Output saved to {output_file}")
+    
+    return 0
+
+
 if __name__ == "__main__":
     sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,197 @@
+"""
+Stage timers and counters for a timetable processing run.
+"""
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Union
+
+METRICS_FORMATS = ("json", "prometheus")
+
+# Help text of the counters, for the Prometheus output
+COUNTERS = {
+    "rows_scanned": "Sheet rows examined",
+    "rows_skipped": "Sheet rows without a time range",
+    "cells_parsed": "Non-empty booking cells parsed",
+    "cells_skipped": "Empty booking cells skipped",
+    "booking_texts": "Distinct booking cell texts parsed; repeats reuse the parsed fields",
+    "parse_errors": "Rows dropped because their time range could not be parsed",
+    "slots_emitted": "30-minute entries extracted",
+    "sheets_processed": "Sheets holding a timetable",
+    "sheets_skipped": "Sheets without a recognisable timetable",
+    "cache_hits": "Workbooks served from the result cache",
+    "cache_misses": "Workbooks parsed because the cache had no entry",
+    "layout_cache_hits": "Sheets whose layout was known from an earlier sheet of the same template",
+    "layout_cache_misses": "Sheets whose layout had to be detected",
+    "rows_written": "Rows written to the SQL, CSV, Parquet or Arrow output",
+    "rows_uploaded": "Rows acknowledged by Supabase",
+    "rows_loaded": "Rows inserted into the SQLite database",
+    "batches_sent": "Upload batches sent",
+    "batch_retries": "Upload attempts retried after a retryable failure",
+    "bytes_uploaded": "Request body bytes sent, after compression",
+}
+
+# Help text of the figures derived from counters and stages
+DERIVED = {
+    "booking_dedupe_ratio": "Booking cells per distinct cell text parsed",
+    "booking_parse_seconds_saved": "Estimated parse time saved by parsing each distinct booking text once",
+}
+
+
+class Metrics:
+    """
+    Wall time per pipeline stage plus event counters.
+
+    Stage times accumulate, so a stage entered once per sheet reports the
+    total over all sheets along with the number of calls. Metrics gathered
+    in worker processes travel back as to_dict() and are folded in with
+    merge(); their stage times are then summed across workers.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty Metrics.
+        """
+        self.counters: Dict[str, int] = {}
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        """
+        Add to a counter.
+
+        Args:
+            name: Counter name, usually a key of COUNTERS
+            amount: Amount to add
+        """
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def add_time(self, stage: str, seconds: float, calls: int = 1) -> None:
+        """
+        Add wall time to a stage.
+
+        Args:
+            stage: Stage name
+            seconds: Elapsed seconds
+            calls: Number of times the stage ran
+        """
+        totals = self.stages.setdefault(stage, {"seconds": 0.0, "calls": 0})
+        totals["seconds"] += seconds
+        totals["calls"] += calls
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Time the enclosed block as one call of a stage.
+
+        Args:
+            name: Stage name
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def merge(self, other: Union['Metrics', Dict[str, Any]]) -> None:
+        """
+        Fold in metrics from another run, such as a worker process.
+
+        Args:
+            other: Metrics, or the dictionary its to_dict() returned
+        """
+        data = other.to_dict() if isinstance(other, Metrics) else other
+        for name, amount in data.get("counters", {}).items():
+            self.incr(name, amount)
+        for name, totals in data.get("stages", {}).items():
+            self.add_time(name, totals["seconds"], totals["calls"])
+
+    def derived(self) -> Dict[str, float]:
+        """
+        Figures computed from the counters and stages, see DERIVED.
+
+        Returns:
+            Dictionary of figure name to value; figures whose inputs were
+            never recorded are left out
+        """
+        derived = {}
+        texts = self.counters.get("booking_texts")
+        if texts:
+            cells = self.counters.get("cells_parsed", 0)
+            seconds = self.stages.get("parse_bookings", {}).get("seconds", 0.0)
+            derived["booking_dedupe_ratio"] = cells / texts
+            derived["booking_parse_seconds_saved"] = seconds / texts * max(cells - texts, 0)
+        return derived
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the metrics to a JSON-serializable dictionary.
+
+        Returns:
+            Dictionary with "stages" (seconds and calls per stage), "counters"
+            and "derived" figures; merge() ignores the derived figures
+        """
+        return {
+            "stages": {name: dict(totals) for name, totals in self.stages.items()},
+            "counters": dict(self.counters),
+            "derived": self.derived(),
+        }
+
+    def to_prometheus(self, prefix: str = "timetable") -> str:
+        """
+        Render the metrics in the Prometheus text exposition format, for the
+        node_exporter textfile collector.
+
+        Args:
+            prefix: Metric name prefix
+
+        Returns:
+            Exposition text
+        """
+        lines = [
+            f"# HELP {prefix}_stage_seconds Wall time spent in each pipeline stage",
+            f"# TYPE {prefix}_stage_seconds gauge",
+        ]
+        lines += [f'{prefix}_stage_seconds{{stage="{name}"}} {totals["seconds"]:.6f}'
+                  for name, totals in self.stages.items()]
+        lines += [
+            f"# HELP {prefix}_stage_calls Number of times each pipeline stage ran",
+            f"# TYPE {prefix}_stage_calls gauge",
+        ]
+        lines += [f'{prefix}_stage_calls{{stage="{name}"}} {totals["calls"]}'
+                  for name, totals in self.stages.items()]
+        for name, value in self.counters.items():
+            metric = f"{prefix}_{name}_total"
+            lines.append(f"# HELP {metric} {COUNTERS.get(name, name.replace('_', ' ').capitalize())}")
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        for name, value in self.derived().items():
+            metric = f"{prefix}_{name}"
+            lines.append(f"# HELP {metric} {DERIVED[name]}")
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value:.6f}")
+        return "\n".join(lines) + "\n"
+
+    def save(self, output_file: str, output_format: str = "json") -> None:
+        """
+        Save the metrics as JSON or as a Prometheus textfile.
+
+        The file is written next to its final path and renamed into place,
+        so a textfile collector never reads a partial file.
+
+        Args:
+            output_file: Output file path
+            output_format: One of METRICS_FORMATS
+        """
+        if output_format not in METRICS_FORMATS:
+            raise ValueError(f"Unknown metrics format: {output_format} (expected one of {', '.join(METRICS_FORMATS)})")
+        try:
+            tmp_path = output_file + ".tmp"
+            with open(tmp_path, 'w') as file:
+                if output_format == "json":
+                    json.dump(self.to_dict(), file, indent=2)
+                else:
+                    file.write(self.to_prometheus())
+            os.replace(tmp_path, output_file)
+        except Exception as e:
+            raise Exception(f"Failed to save metrics to file: {e}")
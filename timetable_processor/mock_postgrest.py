@@ -0,0 +1,275 @@
+"""
+Minimal in-memory PostgREST server for exercising the uploader locally.
+"""
+import argparse
+import gzip
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+
+class MockPostgREST:
+    """
+    In-memory stand-in for the Supabase REST endpoint.
+
+    Supports the requests the uploader makes: HEAD for connection checks,
+    POST inserts (with on_conflict and Prefer: resolution=merge-duplicates or
+    ignore-duplicates), DELETE with an or=(and(...),...) filter, and GET with col=eq.value
+    filters. Failures and latency can be injected to exercise retries.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0):
+        """
+        Initialize the server; call start() to begin serving.
+
+        Args:
+            host: Interface to bind
+            port: Port to bind; 0 picks a free port
+            latency: Seconds to sleep before answering each request
+        """
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self.requests: List[Dict[str, Any]] = []
+        self.latency = latency
+        self._failures: List[Tuple[int, Optional[str]]] = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'MockPostgREST':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'MockPostgREST':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def fail_next(self, count: int, status: int = 503, retry_after: Optional[str] = None) -> None:
+        """
+        Answer the next count write requests with an error status.
+
+        Args:
+            count: Number of requests to fail
+            status: HTTP status to return
+            retry_after: Retry-After header value to send with the error
+        """
+        with self._lock:
+            self._failures.extend([(status, retry_after)] * count)
+
+    def rows(self, table: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(row) for row in self.tables.get(table, [])]
+
+    def _next_failure(self) -> Optional[Tuple[int, Optional[str]]]:
+        with self._lock:
+            return self._failures.pop(0) if self._failures else None
+
+    def _insert(self, table: str, rows: List[Dict[str, Any]], conflict: Optional[List[str]],
+                resolution: Optional[str]) -> int:
+        with self._lock:
+            stored = self.tables.setdefault(table, [])
+            if not conflict:
+                stored.extend(rows)
+                return 201
+
+            index = {tuple(str(row.get(c)) for c in conflict): i for i, row in enumerate(stored)}
+            for row in rows:
+                key = tuple(str(row.get(c)) for c in conflict)
+                if key in index:
+                    if resolution == "merge-duplicates":
+                        stored[index[key]] = row
+                    elif resolution != "ignore-duplicates":
+                        return 409
+                else:
+                    index[key] = len(stored)
+                    stored.append(row)
+            return 201
+
+    def _delete(self, table: str, clauses: List[Dict[str, str]]) -> None:
+        with self._lock:
+            stored = self.tables.get(table, [])
+            self.tables[table] = [
+                row for row in stored
+                if not any(all(str(row.get(c)) == v for c, v in clause.items()) for clause in clauses)
+            ]
+
+    def _handler_class(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _table(self) -> Tuple[str, Dict[str, List[str]]]:
+                parts = urlsplit(self.path)
+                return parts.path.rsplit("/", 1)[-1], parse_qs(parts.query)
+
+            def _reply(self, status: int, body: Any = None, headers: Optional[Dict[str, str]] = None) -> None:
+                payload = json.dumps(body).encode() if body is not None else b""
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                if payload and self.command != "HEAD":
+                    self.wfile.write(payload)
+
+            def _body(self) -> bytes:
+                return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+            def _decoded(self, body: bytes) -> bytes:
+                if self.headers.get("Content-Encoding") == "gzip":
+                    return gzip.decompress(body)
+                return body
+
+            def _begin(self, body: bytes = b"") -> Optional[Tuple[int, Optional[str]]]:
+                if mock.latency:
+                    time.sleep(mock.latency)
+                with mock._lock:
+                    mock.requests.append({
+                        "method": self.command,
+                        "path": self.path,
+                        "headers": dict(self.headers),
+                        "bytes": len(body),
+                    })
+                return mock._next_failure() if self.command in ("POST", "DELETE") else None
+
+            def _fail(self, status: int, retry_after: Optional[str]) -> None:
+                headers = {"Retry-After": retry_after} if retry_after else None
+                self._reply(status, {"message": "injected failure"}, headers)
+
+            def do_HEAD(self):
+                self._begin()
+                self._reply(200)
+
+            def do_GET(self):
+                self._begin()
+                table, query = self._table()
+                rows = mock.rows(table)
+                for column, values in query.items():
+                    if column == "select":
+                        continue
+                    op, _, value = values[0].partition(".")
+                    if op == "eq":
+                        rows = [row for row in rows if str(row.get(column)) == value]
+                self._reply(200, rows)
+
+            def do_POST(self):
+                body = self._body()
+                failure = self._begin(body)
+                if failure:
+                    self._fail(*failure)
+                    return
+                table, query = self._table()
+                try:
+                    rows = json.loads(self._decoded(body))
+                except (ValueError, OSError):
+                    self._reply(400, {"message": "invalid JSON body"})
+                    return
+                if isinstance(rows, dict):
+                    rows = [rows]
+                conflict = query["on_conflict"][0].split(",") if "on_conflict" in query else None
+                prefer = self.headers.get("Prefer", "")
+                resolution = next((p.split("=", 1)[1] for p in prefer.split(",")
+                                   if p.strip().startswith("resolution=")), None)
+                status = mock._insert(table, rows, conflict, resolution)
+                self._reply(status, None if status == 201 else {"message": "duplicate key"})
+
+            def do_DELETE(self):
+                failure = self._begin()
+                if failure:
+                    self._fail(*failure)
+                    return
+                table, query = self._table()
+                if "or" not in query:
+                    self._reply(400, {"message": "refusing to delete without a filter"})
+                    return
+                try:
+                    clauses = parse_or_filter(query["or"][0])
+                except ValueError as e:
+                    self._reply(400, {"message": str(e)})
+                    return
+                mock._delete(table, clauses)
+                self._reply(204)
+
+        return Handler
+
+
+def parse_or_filter(expression: str) -> List[Dict[str, str]]:
+    """
+    Parse a PostgREST or=(and(col.eq.value,...),...) filter.
+
+    Values may be double-quoted, with backslash escapes inside quotes.
+
+    Args:
+        expression: Filter expression as sent in the or= query parameter
+
+    Returns:
+        List of clauses, each a dictionary of column to required value
+    """
+    if not (expression.startswith("(") and expression.endswith(")")):
+        raise ValueError(f"Malformed or filter: {expression}")
+
+    clauses = []
+    pos = 1
+    end = len(expression) - 1
+    while pos < end:
+        if not expression.startswith("and(", pos):
+            raise ValueError(f"Expected and(...) at {pos}")
+        pos += 4
+        clause = {}
+        while True:
+            column_end = expression.index(".eq.", pos)
+            column = expression[pos:column_end]
+            pos = column_end + 4
+            if expression[pos] == '"':
+                pos += 1
+                value = []
+                while expression[pos] != '"':
+                    if expression[pos] == "\\":
+                        pos += 1
+                    value.append(expression[pos])
+                    pos += 1
+                pos += 1
+                clause[column] = "".join(value)
+            else:
+                value_end = min(i for i in (expression.find(",", pos), expression.find(")", pos)) if i >= 0)
+                clause[column] = expression[pos:value_end]
+                pos = value_end
+            if expression[pos] == ",":
+                pos += 1
+                continue
+            if expression[pos] == ")":
+                pos += 1
+                break
+            raise ValueError(f"Unexpected character at {pos}")
+        clauses.append(clause)
+        if pos < end and expression[pos] == ",":
+            pos += 1
+    return clauses
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run an in-memory PostgREST mock")
+    parser.add_argument("--port", type=int, default=54321, help="Port to listen on")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of latency per request")
+    args = parser.parse_args()
+
+    server = MockPostgREST(port=args.port, latency=args.latency)
+    print(f"Mock PostgREST listening on {server.url}")
+    server._server.serve_forever()
@@ -1,10 +1,18 @@
 """
 Module for processing Excel timetable files and extracting structured data.
 """
+import itertools
 import pandas as pd
 import re
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Tuple, Generator
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Tuple, Generator, Iterable, Iterator, Optional, Sequence, Union
+
+from booking_table import BookingTable
+from engines import DAYS_OF_WEEK, PANDAS_ENGINES, STREAM_CHUNK_ROWS, BookingCellParser, cell_text, parse_booking
+from layout import SheetLayout, detect_layout
+from metrics import Metrics
+from readers import get_reader
+from slots import TIME_RANGE_PATTERN, format_minutes, parse_clock, parse_time_range, slot_range, time_range_slots
 
 
 class TimetableProcessor:
@@ -12,15 +20,25 @@ class TimetableProcessor:
     Class for processing Excel timetable files and extracting structured data.
     """
 
-    def __init__(self, debug: bool = False):
+    def __init__(self, debug: bool = False, engine: str = "rows", reader: str = "pandas",
+                 metrics: Optional[Metrics] = None):
         """
         Initialize the TimetableProcessor.
         
         Args:
             debug: Enable debug mode for additional logging
+            engine: Extraction engine, "rows" (row by row) or "vectorized" (columnar pandas)
+            reader: Sheet reader, one of readers.READERS
+            metrics: Metrics receiving stage times and extraction counters; a
+                fresh one is created if omitted
         """
+        if engine not in PANDAS_ENGINES:
+            raise ValueError(f"Unknown engine: {engine} (expected one of {', '.join(PANDAS_ENGINES)})")
         self.debug = debug
-        self.days_of_week = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+        self.engine = engine
+        self.days_of_week = list(DAYS_OF_WEEK)
+        self.reader = get_reader(reader, self.days_of_week, debug=debug)
+        self.metrics = metrics if metrics is not None else Metrics()
         
     def read_excel(self, file_path: str) -> pd.DataFrame:
         """
@@ -33,7 +51,7 @@ class TimetableProcessor:
             DataFrame containing the Excel data
         """
         try:
-            df = pd.read_excel(file_path)
+            df = self.reader.read(file_path)
             if self.debug:
                 print(f"Successfully read Excel file: {file_path}")
             return df
@@ -50,38 +68,26 @@ class TimetableProcessor:
         Returns:
             Preprocessed DataFrame ready for data extraction
         """
-        # Check if the DataFrame has the expected columns
-        if set(self.days_of_week).issubset(df.columns):
-            # DataFrame already has the right format
-            return df
+        return self.detect_layout(df).frame(df)
+    
+    def detect_layout(self, df: pd.DataFrame) -> SheetLayout:
+        """
+        Find where the sheet keeps its header, times, days and date.
+        
+        Layouts are cached per template (see layout.detect_layout).
         
-        # Try to identify the correct column names
-        day_columns = []
-        for col in df.columns:
-            for day in self.days_of_week:
-                if isinstance(col, str) and day.lower() in col.lower():
-                    day_columns.append(col)
-                    break
-        
-        if not day_columns:
-            # If day columns are not found in headers, try to find them in the first few rows
-            for i in range(min(5, len(df))):
-                row = df.iloc[i]
-                for j, value in enumerate(row):
-                    if isinstance(value, str):
-                        for day in self.days_of_week:
-                            if day.lower() in value.lower():
-                                # Found a day in the row, use this row as header
-                                new_header = df.iloc[i]
-                                df = df[i+1:].copy()
-                                df.columns = new_header
-                                return self.preprocess_dataframe(df)
-        
-        # If we still can't find day columns, raise an error
-        if not day_columns:
-            raise ValueError("Could not identify day columns in the Excel file")
-        
-        return df
+        Args:
+            df: Raw DataFrame from Excel
+            
+        Returns:
+            SheetLayout of the sheet
+        """
+        layout, cached = detect_layout(df, self.days_of_week)
+        self.metrics.incr("layout_cache_hits" if cached else "layout_cache_misses")
+        if self.debug:
+            print(f"Layout {'from cache' if cached else 'detected'}: header row {layout.header_row}, "
+                  f"time column {layout.time_col!r}, days {dict(zip(layout.day_names, layout.day_cols))}")
+        return layout
     
     def extract_time_range(self, time_str: str) -> Tuple[str, str]:
         """
@@ -91,22 +97,10 @@ class TimetableProcessor:
             time_str: Time range string (e.g., "9:00 - 10:30")
             
         Returns:
-            Tuple of (start_time, end_time)
+            Tuple of (start_time, end_time) in HH:MM format
         """
-        # Match patterns like "9:00 - 10:30" or "9:00-10:30" or "9 - 10:30"
-        pattern = r'(\d{1,2}(?::\d{2})?\s*(?:AM|PM)?)\s*-\s*(\d{1,2}(?::\d{2})?\s*(?:AM|PM)?)'
-        match = re.search(pattern, time_str, re.IGNORECASE)
-        
-        if not match:
-            raise ValueError(f"Could not parse time range: {time_str}")
-        
-        start_time, end_time = match.groups()
-        
-        # Normalize times (ensure they have HH:MM format)
-        start_time = self._normalize_time(start_time)
-        end_time = self._normalize_time(end_time)
-        
-        return start_time, end_time
+        start, end = parse_time_range(time_str)
+        return format_minutes(start), format_minutes(end)
     
     def _normalize_time(self, time_str: str) -> str:
         """
@@ -118,41 +112,7 @@ class TimetableProcessor:
         Returns:
             Normalized time string in HH:MM format
         """
-        time_str = time_str.strip()
-        
-        # Handle case where there's no colon (e.g., "9 AM")
-        if ':' not in time_str:
-            # Check if it has AM/PM
-            if 'AM' in time_str.upper() or 'PM' in time_str.upper():
-                # Extract number and AM/PM
-                num = re.search(r'(\d+)', time_str).group(1)
-                period = re.search(r'(AM|PM)', time_str.upper()).group(1)
-                time_str = f"{num}:00 {period}"
-            else:
-                # Just a number, assume it's an hour
-                time_str = f"{time_str}:00"
-        
-        # Parse the time string
-        if ' ' in time_str and ('AM' in time_str.upper() or 'PM' in time_str.upper()):
-            try:
-                dt = datetime.strptime(time_str, '%I:%M %p')
-                return dt.strftime('%H:%M')
-            except ValueError:
-                try:
-                    dt = datetime.strptime(time_str, '%I %p')
-                    return dt.strftime('%H:%M')
-                except ValueError:
-                    pass
-        
-        # If the parsing above failed or wasn't applicable, just return the cleaned time
-        # Remove any AM/PM and just keep the time
-        time_str = re.sub(r'(?i)\s*(?:AM|PM)', '', time_str)
-        
-        # Ensure HH:MM format
-        if ':' not in time_str:
-            time_str = f"{time_str}:00"
-        
-        return time_str
+        return format_minutes(parse_clock(time_str))
     
     def generate_30min_slots(self, start_time: str, end_time: str) -> List[Tuple[str, str]]:
         """
@@ -165,34 +125,10 @@ class TimetableProcessor:
         Returns:
             List of (slot_start, slot_end) tuples for each 30-minute slot
         """
-        # Parse times
-        start_dt = datetime.strptime(start_time, '%H:%M')
-        end_dt = datetime.strptime(end_time, '%H:%M')
-        
-        # Handle case where end time is earlier than start time (next day)
-        if end_dt < start_dt:
-            end_dt += timedelta(days=1)
-        
-        slots = []
-        current = start_dt
-        
-        # Generate slots until we reach the end time
-        while current < end_dt:
-            slot_start = current
-            slot_end = current + timedelta(minutes=30)
-            
-            # If the slot would extend beyond the end time, cap it
-            if slot_end > end_dt:
-                slot_end = end_dt
-            
-            slots.append((
-                slot_start.strftime('%H:%M'),
-                slot_end.strftime('%H:%M')
-            ))
-            
-            current = slot_end
-        
-        return slots
+        return [
+            (format_minutes(slot_start), format_minutes(slot_end))
+            for slot_start, slot_end in slot_range(parse_clock(start_time), parse_clock(end_time))
+        ]
     
     def extract_booking_details(self, cell_value: str) -> Dict[str, str]:
         """
@@ -202,12 +138,13 @@ class TimetableProcessor:
         Example: "DP (NA)(65)" -> reason="DP", booked_by="NA", room_no="65"
         
         Args:
-            cell_value: Cell value containing booking details
+            cell_value: Cell value containing booking details; values other
+                than text are parsed as their cell_text
             
         Returns:
             Dictionary with extracted details
         """
-        if not cell_value or pd.isna(cell_value) or cell_value.strip() == '':
+        if cell_value is None or pd.isna(cell_value) or cell_text(cell_value).strip() == '':
             return {
                 'reason': '',
                 'booked_by': '',
@@ -215,212 +152,478 @@ class TimetableProcessor:
                 'status': 'available'
             }
         
-        # Default values
-        details = {
-            'reason': '',
-            'booked_by': '',
-            'room_no': '',
-            'status': 'booked'
-        }
-        
-        # Extract information using regex
-        # Pattern: "Subject (Faculty)(Room)" or variations
-        pattern = r'^(.*?)\s*(?:\(([^)]*)\))?(?:\(([^)]*)\))?'
-        match = re.match(pattern, str(cell_value))
+        return parse_booking(cell_text(cell_value))
+    
+    def read_sheets(self, file_path: str, sheets: Optional[Sequence[str]] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Read several sheets of an Excel file, opening the workbook once.
         
-        if match:
-            groups = match.groups()
-            details['reason'] = groups[0].strip() if groups[0] else ''
+        Args:
+            file_path: Path to the Excel file
+            sheets: Sheet names to read; every sheet if omitted
             
-            # If we have at least one parenthesis group
-            if len(groups) > 1 and groups[1]:
-                details['booked_by'] = groups[1].strip()
+        Returns:
+            Dictionary of sheet name to DataFrame, in workbook order
+        """
+        try:
+            frames = self.reader.read_sheets(file_path, sheets)
+            if self.debug:
+                print(f"Successfully read {len(frames)} sheets from Excel file: {file_path}")
+            return frames
+        except Exception as e:
+            raise Exception(f"Failed to read Excel file: {e}")
+
+    def process_timetable(self, file_path: str, default_date: str = None, as_table: bool = False,
+                          sheets: Optional[Sequence[str]] = None,
+                          sheet_workers: int = 1) -> Union[List[Dict[str, Any]], BookingTable]:
+        """
+        Process the timetable Excel file and extract all booking details.
+        
+        Every sheet (or the chosen subset) is processed, and each entry's
+        class is set to the name of its sheet. When every sheet is processed,
+        sheets that do not hold a timetable are skipped.
+        
+        Args:
+            file_path: Path to the Excel file
+            default_date: Default date in YYYY-MM-DD format if no date is found
+            as_table: Return a compact BookingTable instead of a list of dicts
+            sheets: Sheet names to process; every sheet if omitted
+            sheet_workers: Worker processes used to parse sheets concurrently
             
-            # If we have two parenthesis groups
-            if len(groups) > 2 and groups[2]:
-                details['room_no'] = groups[2].strip()
+        Returns:
+            List of dictionaries (or a BookingTable) containing booking details
+        """
+        with self.metrics.stage("read_excel"):
+            frames = self.read_sheets(file_path, sheets)
+        tasks = [(self.debug, self.engine, name, df, default_date) for name, df in frames.items()]
+        
+        if sheet_workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=min(sheet_workers, len(tasks))) as executor:
+                outcomes = list(executor.map(_process_sheet, tasks))
         else:
-            # If the regex pattern doesn't match, use the whole cell as reason
-            details['reason'] = str(cell_value).strip()
+            outcomes = [_process_sheet(task) for task in tasks]
+        
+        result = BookingTable() if as_table else []
+        processed = 0
+        for (_, _, name, _, _), (table, error, metrics) in zip(tasks, outcomes):
+            self.metrics.merge(metrics)
+            if error is not None:
+                # A sheet named explicitly must hold a timetable
+                if sheets is not None:
+                    raise ValueError(f"Sheet {name}: {error}")
+                if self.debug:
+                    print(f"Skipping sheet {name}: {error}")
+                self.metrics.incr("sheets_skipped")
+                continue
+            processed += 1
+            self.metrics.incr("sheets_processed")
+            result.extend(table if as_table else table.to_dicts())
         
-        return details
-    
-    # Add this to the TimetableProcessor class in processor.py
+        if not processed:
+            raise ValueError("Could not identify a timetable in any sheet of the Excel file")
+        
+        return result
 
-    def process_timetable(self, file_path: str, default_date: str = None) -> List[Dict[str, Any]]:
+    def process_dataframe(self, df: pd.DataFrame, default_date: str = None, as_table: bool = False,
+                          class_name: str = '') -> Union[List[Dict[str, Any]], BookingTable]:
         """
-        Process the timetable Excel file and extract all booking details.
+        Extract all booking details from an already loaded timetable sheet.
         
         Args:
-            file_path: Path to the Excel file
+            df: Raw DataFrame as returned by read_excel
             default_date: Default date in YYYY-MM-DD format if no date is found
+            as_table: Return a compact BookingTable instead of a list of dicts
+            class_name: Value of the class field, usually the sheet name
             
         Returns:
-            List of dictionaries containing booking details
-        """
-        df = self.read_excel(file_path)
-        df = self.preprocess_dataframe(df)
-        
-        # Find the column containing time slots
-        time_col = None
-        for col in df.columns:
-            if isinstance(col, str) and any(t in col.lower() for t in ['time', 'period', 'hour']):
-                time_col = col
-                break
-        
-        if not time_col:
-            # Try to identify the time column by looking for time patterns in the first column
-            first_col = df.columns[0]
-            time_pattern = r'\d{1,2}(?::\d{2})?\s*-\s*\d{1,2}(?::\d{2})?'
+            List of dictionaries (or a BookingTable) containing booking details
+        """
+        with self.metrics.stage("preprocess_dataframe"):
+            layout = self.detect_layout(df)
+            df = layout.frame(df)
+        
+        with self.metrics.stage("extract"):
+            time_col, day_cols = layout.time_col, layout.day_cols
+            date_from_excel = layout.find_date(df, default_date, debug=self.debug)
             
-            # Check if at least some values in the first column match the time pattern
-            if df[first_col].astype(str).str.match(time_pattern).any():
-                time_col = first_col
-        
-        if not time_col:
-            raise ValueError("Could not identify time column in Excel file")
-        
-        # Identify day columns
-        day_cols = []
-        for day in self.days_of_week:
-            matching_cols = [col for col in df.columns if isinstance(col, str) and day.lower() in col.lower()]
-            if matching_cols:
-                day_cols.append(matching_cols[0])
-        
-        if not day_cols:
-            raise ValueError("Could not identify day columns in Excel file")
-        
-        # Try to find a date column or header
-        date_from_excel = None
-        date_pattern = r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}'
-        
-        # Look in headers
-        for col in df.columns:
-            if isinstance(col, str) and re.search(date_pattern, col):
-                date_match = re.search(date_pattern, col)
-                if date_match:
-                    try:
-                        date_from_excel = self._parse_date(date_match.group(0))
-                        if self.debug:
-                            print(f"Found date in header: {date_from_excel}")
-                        break
-                    except:
-                        pass
-        
-        # Look in the first few rows for a date
-        if not date_from_excel:
-            for i in range(min(5, len(df))):
-                for col in df.columns:
-                    cell_value = str(df.iloc[i][col])
-                    if re.search(date_pattern, cell_value):
-                        date_match = re.search(date_pattern, cell_value)
-                        if date_match:
-                            try:
-                                date_from_excel = self._parse_date(date_match.group(0))
-                                if self.debug:
-                                    print(f"Found date in cell: {date_from_excel}")
-                                break
-                            except:
-                                pass
-                if date_from_excel:
-                    break
-        
-        # Use default date or today's date if no date is found
-        if not date_from_excel:
-            if default_date:
-                date_from_excel = default_date
-            else:
-                # Use current date as fallback
-                date_from_excel = datetime.now().strftime('%Y-%m-%d')
-                if self.debug:
-                    print(f"Using current date: {date_from_excel}")
+            if self.engine == "vectorized":
+                return self._extract_vectorized(df, time_col, day_cols, date_from_excel, as_table, class_name)
+            return self._extract_rows(df, time_col, day_cols, date_from_excel, as_table, class_name)
+
+    def iter_timetable(self, file_path: str, default_date: str = None,
+                       sheets: Optional[Sequence[str]] = None) -> Generator[Dict[str, Any], None, None]:
+        """
+        Process the timetable Excel file and yield booking entries one at a time.
+        
+        The rows of one sheet at a time are streamed from the reader (with
+        openpyxl in read-only mode for the pandas reader) and extracted in
+        blocks of STREAM_CHUNK_ROWS, so memory stays flat in the workbook size.
         
-        # Process each row
-        result = []
-        for _, row in df.iterrows():
-            time_value = row[time_col]
+        Args:
+            file_path: Path to the Excel file
+            default_date: Default date in YYYY-MM-DD format if no date is found
+            sheets: Sheet names to process; every sheet if omitted
             
-            # Skip rows without time information
-            if pd.isna(time_value) or not isinstance(time_value, (str, int, float)):
+        Yields:
+            Dictionaries containing booking details, in process_timetable order
+        """
+        processed = 0
+        for name, labels, rows in self.reader.iter_sheet_rows(file_path, sheets):
+            try:
+                entries = self._iter_chunks(labels, _chunked(rows, STREAM_CHUNK_ROWS), default_date, name)
+                first = next(entries, None)
+            except ValueError as e:
+                if sheets is not None:
+                    raise ValueError(f"Sheet {name}: {e}")
+                if self.debug:
+                    print(f"Skipping sheet {name}: {e}")
+                self.metrics.incr("sheets_skipped")
                 continue
+            processed += 1
+            self.metrics.incr("sheets_processed")
+            if first is not None:
+                yield first
+                yield from entries
+        
+        if not processed:
+            raise ValueError("Could not identify a timetable in any sheet of the Excel file")
+
+    def iter_dataframe(self, df: pd.DataFrame, default_date: str = None,
+                       class_name: str = '') -> Generator[Dict[str, Any], None, None]:
+        """
+        Yield the booking entries of an already loaded timetable sheet.
+        
+        Both engines work through the sheet in blocks of STREAM_CHUNK_ROWS
+        rows, so only one block of rows and entries is held at a time.
+        
+        Args:
+            df: Raw DataFrame as returned by read_excel
+            default_date: Default date in YYYY-MM-DD format if no date is found
+            class_name: Value of the class field, usually the sheet name
             
-            # Convert time value to string
-            time_str = str(time_value).strip()
+        Yields:
+            Dictionaries containing booking details
+        """
+        with self.metrics.stage("preprocess_dataframe"):
+            layout = self.detect_layout(df)
+            df = layout.frame(df)
+        date_from_excel = layout.find_date(df, default_date, debug=self.debug)
+        chunks = (df.iloc[start:start + STREAM_CHUNK_ROWS] for start in range(0, len(df), STREAM_CHUNK_ROWS))
+        yield from self._extract_chunks(chunks, layout, date_from_excel, class_name)
+    
+    def _iter_chunks(self, labels: List[str], chunks: Iterator[List[List[Optional[str]]]], default_date: Optional[str],
+                     class_name: str) -> Generator[Dict[str, Any], None, None]:
+        """
+        Yield the booking entries of a sheet streamed as blocks of reader rows.
+        
+        The layout and date are found in the first block.
+        
+        Args:
+            labels: Column labels from the reader
+            chunks: Blocks of data rows
+            default_date: Default date in YYYY-MM-DD format if no date is found
+            class_name: Value of the class field, usually the sheet name
             
-            # Skip header rows or rows with non-time values
-            if not re.search(r'\d{1,2}(?::\d{2})?\s*-\s*\d{1,2}(?::\d{2})?', time_str):
-                continue
+        Yields:
+            Dictionaries containing booking details
+        """
+        first = next(chunks, [])
+        df = pd.DataFrame(first, columns=labels, dtype=object)
+        with self.metrics.stage("preprocess_dataframe"):
+            layout = self.detect_layout(df)
+        date_from_excel = layout.find_date(df, default_date, debug=self.debug)
+        frames = itertools.chain([df], (pd.DataFrame(chunk, columns=labels, dtype=object) for chunk in chunks))
+        yield from self._extract_chunks(frames, layout, date_from_excel, class_name)
+    
+    def _extract_chunks(self, chunks: Iterable[pd.DataFrame], layout: SheetLayout, date_from_excel: str,
+                        class_name: str) -> Generator[Dict[str, Any], None, None]:
+        """
+        Yield the booking entries of consecutive blocks of a sheet body.
+        
+        Args:
+            chunks: Blocks of the sheet below its header, labelled by the header
+            layout: Layout of the sheet
+            date_from_excel: Date stamped on every entry
+            class_name: Value of the class field
             
-            try:
-                # Extract time range
-                start_time, end_time = self.extract_time_range(time_str)
+        Yields:
+            Dictionaries containing booking details
+        """
+        time_col, day_cols = layout.time_col, layout.day_cols
+        for chunk in chunks:
+            if self.engine == "vectorized":
+                yield from self._extract_vectorized(chunk, time_col, day_cols, date_from_excel,
+                                                    class_name=class_name)
+            else:
+                yield from self._iter_rows(chunk, time_col, day_cols, date_from_excel, class_name)
+
+    def _day_name(self, day_col: Any) -> str:
+        """
+        Resolve the day of the week a day column stands for.
+        
+        Args:
+            day_col: Day column label
+            
+        Returns:
+            Day name, or the column label itself if no day matches
+        """
+        return next((day for day in self.days_of_week if day.lower() in str(day_col).lower()), str(day_col))
+
+    def _extract_rows(self, df: pd.DataFrame, time_col: Any, day_cols: List[Any], date_from_excel: str,
+                      as_table: bool = False, class_name: str = '') -> Union[List[Dict[str, Any]], BookingTable]:
+        """
+        Extract booking entries by walking the sheet row by row.
+        
+        Args:
+            df: Preprocessed DataFrame
+            time_col: Label of the time column
+            day_cols: Day column labels
+            date_from_excel: Date stamped on every entry
+            as_table: Collect the entries into a BookingTable
+            class_name: Value of the class field
+            
+        Returns:
+            List of dictionaries (or a BookingTable) containing booking details
+        """
+        result = BookingTable() if as_table else []
+        result.extend(self._iter_rows(df, time_col, day_cols, date_from_excel, class_name))
+        return result
+
+    def _iter_rows(self, df: pd.DataFrame, time_col: Any, day_cols: List[Any], date_from_excel: str,
+                   class_name: str = '') -> Generator[Dict[str, Any], None, None]:
+        """
+        Walk the sheet row by row and yield one entry per 30-minute slot.
+        
+        Args:
+            df: Preprocessed DataFrame
+            time_col: Label of the time column
+            day_cols: Day column labels
+            date_from_excel: Date stamped on every entry
+            class_name: Value of the class field
+            
+        Yields:
+            Dictionaries containing booking details
+        """
+        # Counted locally and added to the metrics once the sheet is done
+        rows_scanned = rows_skipped = cells_parsed = cells_skipped = parse_errors = slots_emitted = 0
+        bookings = BookingCellParser()
+        try:
+            for _, row in df.iterrows():
+                rows_scanned += 1
+                time_value = row[time_col]
                 
-                # Generate 30-minute slots
-                time_slots = self.generate_30min_slots(start_time, end_time)
+                # Skip rows without time information
+                if pd.isna(time_value) or not isinstance(time_value, (str, int, float)):
+                    rows_skipped += 1
+                    continue
                 
-                # Process each day column
-                for day_col in day_cols:
-                    day_of_week = next((day for day in self.days_of_week if day.lower() in str(day_col).lower()), str(day_col))
-                    cell_value = row[day_col]
-                    
-                    # Skip empty cells
-                    if pd.isna(cell_value) or str(cell_value).strip() == '':
-                        continue
-                    
-                    # Extract booking details
-                    booking_details = self.extract_booking_details(cell_value)
+                # Convert time value to string
+                time_str = str(time_value).strip()
+                
+                # Skip header rows or rows with non-time values
+                if not re.search(TIME_RANGE_PATTERN, time_str):
+                    rows_skipped += 1
+                    continue
+                
+                try:
+                    # Extract time range and its 30-minute slots (cached per distinct label)
+                    time_slots = time_range_slots(time_str)
                     
-                    # Create entry for each time slot
-                    for slot_start, slot_end in time_slots:
-                        entry = {
-                            'room_no': booking_details['room_no'],
-                            'day_of_week': day_of_week,
-                            'date': date_from_excel,  # Add date to each entry
-                            'time_slot': f"{slot_start} - {slot_end}",
-                            'start_time': slot_start,
-                            'end_time': slot_end,
-                            'booked_by': booking_details['booked_by'],
-                            'reason': booking_details['reason'],
-                            'status': booking_details['status'],
-                            'approved_by': '',  # Could be added in future versions
-                            'is_recurring': True,  # Assuming weekly recurrence
-                            'class': ''  # Could be added in future versions
-                        }
-                        result.append(entry)
-            except Exception as e:
-                if self.debug:
-                    print(f"Error processing row with time {time_str}: {str(e)}")
-                continue
-        
-        return result
+                    # Process each day column
+                    for day_col in day_cols:
+                        day_of_week = self._day_name(day_col)
+                        cell_value = row[day_col]
+                        
+                        # Skip empty cells
+                        if pd.isna(cell_value) or str(cell_value).strip() == '':
+                            cells_skipped += 1
+                            continue
+                        
+                        # Extract booking details, once per distinct cell text
+                        reason, booked_by, room_no = bookings.parse(cell_value)
+                        cells_parsed += 1
+                        
+                        # Create entry for each time slot
+                        for slot_start, slot_end in time_slots:
+                            entry = {
+                                'room_no': room_no,
+                                'day_of_week': day_of_week,
+                                'date': date_from_excel,  # Add date to each entry
+                                'time_slot': f"{slot_start} - {slot_end}",
+                                'start_time': slot_start,
+                                'end_time': slot_end,
+                                'booked_by': booked_by,
+                                'reason': reason,
+                                'status': 'booked',
+                                'approved_by': '',  # Could be added in future versions
+                                'is_recurring': True,  # Assuming weekly recurrence
+                                'class': class_name
+                            }
+                            slots_emitted += 1
+                            yield entry
+                except Exception as e:
+                    if self.debug:
+                        print(f"Error processing row with time {time_str}: {str(e)}")
+                    parse_errors += 1
+                    continue
+        finally:
+            metrics = self.metrics
+            metrics.incr("rows_scanned", rows_scanned)
+            metrics.incr("rows_skipped", rows_skipped)
+            metrics.incr("cells_parsed", cells_parsed)
+            metrics.incr("cells_skipped", cells_skipped)
+            metrics.incr("parse_errors", parse_errors)
+            metrics.incr("slots_emitted", slots_emitted)
+            bookings.record(metrics)
 
-    def _parse_date(self, date_str: str) -> str:
+    def _extract_vectorized(self, df: pd.DataFrame, time_col: Any, day_cols: List[Any], date_from_excel: str,
+                            as_table: bool = False, class_name: str = '') -> Union[List[Dict[str, Any]], BookingTable]:
         """
-        Parse a date string into YYYY-MM-DD format.
+        Extract booking entries with columnar pandas operations.
+        
+        The day columns are melted into one long (row, day, cell) frame, time
+        ranges are matched with vectorized regex, each distinct booking text
+        is parsed once, and every cell is expanded into its 30-minute slots
+        with a single explode. The entries are identical to the row engine's, in the same
+        order; cells other than text are parsed as their engines.cell_text on both.
         
         Args:
-            date_str: Date string in various formats (MM/DD/YYYY, DD-MM-YYYY, etc.)
+            df: Preprocessed DataFrame
+            time_col: Label of the time column
+            day_cols: Day column labels
+            date_from_excel: Date stamped on every entry
+            as_table: Return the columns as a BookingTable
+            class_name: Value of the class field
             
         Returns:
-            Date in YYYY-MM-DD format
-        """
-        # Try common date formats
-        formats = [
-            '%m/%d/%Y', '%d/%m/%Y', '%Y/%m/%d',
-            '%m-%d-%Y', '%d-%m-%Y', '%Y-%m-%d',
-            '%m/%d/%y', '%d/%m/%y', '%y/%m/%d',
-            '%m-%d-%y', '%d-%m-%y', '%y-%m-%d'
-        ]
-        
-        for fmt in formats:
+            List of dictionaries (or a BookingTable) containing booking details
+        """
+        empty = BookingTable() if as_table else []
+        metrics = self.metrics
+        
+        # Keep rows whose time cell holds a time range
+        times = df[time_col]
+        usable = times.notna() & times.map(lambda value: isinstance(value, (str, int, float)))
+        time_strs = times[usable].astype(str).str.strip()
+        time_strs = time_strs[time_strs.str.contains(TIME_RANGE_PATTERN, regex=True)]
+        metrics.incr("rows_scanned", len(df))
+        metrics.incr("rows_skipped", len(df) - len(time_strs))
+        if time_strs.empty:
+            return empty
+        
+        # Parse the time ranges; every distinct label is expanded once
+        slots_by_label = {}
+        for label in time_strs.unique():
             try:
-                date_obj = datetime.strptime(date_str, fmt)
-                return date_obj.strftime('%Y-%m-%d')
-            except ValueError:
-                continue
+                slots_by_label[label] = time_range_slots(label)
+            except Exception as e:
+                if self.debug:
+                    print(f"Error processing row with time {label}: {str(e)}")
+        row_slots = [slots_by_label.get(label) for label in time_strs]
+        metrics.incr("parse_errors", sum(1 for label in time_strs if label not in slots_by_label))
+        
+        # Melt the day columns into long format, ordered by row then day
+        cells = df.loc[time_strs.index, day_cols].to_numpy(dtype=object)
+        n_rows, n_days = cells.shape
+        day_names = [self._day_name(day_col) for day_col in day_cols]
+        long = pd.DataFrame({
+            'slots': [slots for slots in row_slots for _ in range(n_days)],
+            'day_of_week': day_names * n_rows,
+            'cell': cells.ravel(),
+        })
+        
+        # Drop empty cells and rows whose time range could not be expanded
+        parsed_rows = long['slots'].notna()
+        long = long[long['cell'].notna() & parsed_rows]
+        texts = long['cell'].map(cell_text)
+        long = long[texts.str.strip() != '']
+        metrics.incr("cells_parsed", len(long))
+        metrics.incr("cells_skipped", int(parsed_rows.sum()) - len(long))
+        long = long[long['slots'].map(bool)]
+        if long.empty:
+            return empty
+        
+        # Parse each distinct booking text once and spread the fields over its cells
+        codes, texts = pd.factorize(texts[long.index])
+        bookings = BookingCellParser()
+        fields = pd.DataFrame(bookings.parse_many(texts.tolist()), columns=['reason', 'booked_by', 'room_no'])
+        bookings.record(metrics)
+        fields = fields.take(codes)
+        long = long.assign(
+            reason=fields['reason'].to_numpy(),
+            booked_by=fields['booked_by'].to_numpy(),
+            room_no=fields['room_no'].to_numpy(),
+        )
+        
+        # Expand every booking into its 30-minute slots
+        long = long.explode('slots', ignore_index=True)
+        start_times = long['slots'].str[0]
+        end_times = long['slots'].str[1]
+        
+        # Build the entry dicts straight from the column lists; DataFrame.to_dict
+        # boxes every value and would cost more than the whole parse
+        n = len(long)
+        metrics.incr("slots_emitted", n)
+        columns = {
+            'room_no': long['room_no'].tolist(),
+            'day_of_week': long['day_of_week'].tolist(),
+            'date': [date_from_excel] * n,
+            'time_slot': (start_times + ' - ' + end_times).tolist(),
+            'start_time': start_times.tolist(),
+            'end_time': end_times.tolist(),
+            'booked_by': long['booked_by'].tolist(),
+            'reason': long['reason'].tolist(),
+            'status': ['booked'] * n,
+            'approved_by': [''] * n,
+            'is_recurring': [True] * n,
+            'class': [class_name] * n,
+        }
+        if as_table:
+            return BookingTable.from_columns(columns)
+        keys = list(columns)
+        return [dict(zip(keys, values)) for values in zip(*columns.values())]
+
+
+def _chunked(rows: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """
+    Split an iterable into lists of at most size items.
+    
+    Args:
+        rows: Items to split
+        size: Items per list
         
-        # If all formats fail, raise an exception
-        raise ValueError(f"Could not parse date: {date_str}")
+    Yields:
+        Lists of consecutive items
+    """
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _process_sheet(task: Tuple[bool, str, str, pd.DataFrame, Optional[str]]
+                   ) -> Tuple[Optional[BookingTable], Optional[str], Dict[str, Any]]:
+    """
+    Extract the entries of one sheet; runs in a worker process when sheets
+    are parsed concurrently.
+    
+    Args:
+        task: Tuple of (debug, engine, sheet name, DataFrame, default date)
+        
+    Returns:
+        Tuple of (BookingTable, None, metrics), or (None, error message,
+        metrics) if the sheet holds no recognisable timetable; metrics is
+        the sheet's Metrics.to_dict()
+    """
+    debug, engine, name, df, default_date = task
+    processor = TimetableProcessor(debug=debug, engine=engine)
+    try:
+        table = processor.process_dataframe(df, default_date=default_date, as_table=True, class_name=name)
+        return table, None, processor.metrics.to_dict()
+    except ValueError as e:
+        return None, str(e), processor.metrics.to_dict()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,442 @@
+"""
+Pluggable readers that load timetable sheets into DataFrames.
+
+pandas is imported only when a DataFrame is built, so the readers also
+serve the pandas-free lite engine through read_sheet_rows.
+"""
+import csv
+import os
+import re
+from typing import TYPE_CHECKING, List, Dict, Any, Callable, Iterator, Optional, Sequence, Tuple
+
+from engines import cell_text
+from layout import DATE_PATTERN, DATE_SEARCH_ROWS, HEADER_SEARCH_ROWS, SheetLayout, detect_rows_layout
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Header labels and data rows of a sheet, as returned by read_sheet_rows
+SheetRows = Tuple[List[str], List[List[Optional[str]]]]
+
+READERS = ("pandas", "openpyxl", "calamine", "csv")
+
+
+class TimetableReader:
+    """
+    Base class for timetable sheet readers.
+
+    Subclasses only provide the raw rows of a sheet through iter_rows. The
+    first rows are used to locate the header row and the columns the
+    processor needs (time, days, and any column carrying the sheet date),
+    with the same layout detection and cache as the processor;
+    the rest of the sheet is then read in the same pass, keeping only those
+    columns and converting every value to a string.
+    """
+
+    name = None
+
+    def __init__(self, days_of_week: Sequence[str], debug: bool = False):
+        """
+        Initialize the reader.
+
+        Args:
+            days_of_week: Day names used to recognise the header row
+            debug: Enable debug mode for additional logging
+        """
+        self.days_of_week = list(days_of_week)
+        self.debug = debug
+
+    def iter_rows(self, file_path: str) -> Iterator[Sequence[Any]]:
+        """
+        Yield the raw cell values of the first sheet, row by row.
+
+        Args:
+            file_path: Path to the timetable file
+
+        Yields:
+            Sequences of cell values
+        """
+        sheets = self.iter_sheets(file_path)
+        try:
+            for _, rows in sheets:
+                yield from rows
+                return
+        finally:
+            sheets.close()
+
+    def iter_sheets(self, file_path: str) -> Iterator[Tuple[str, Iterator[Sequence[Any]]]]:
+        """
+        Yield every sheet of the workbook with its raw rows, opening it once.
+
+        Args:
+            file_path: Path to the timetable file
+
+        Yields:
+            Tuples of (sheet name, iterator of row value sequences)
+        """
+        raise NotImplementedError
+
+    def read(self, file_path: str) -> 'pd.DataFrame':
+        """
+        Read the first sheet as strings, pruned to the columns in use.
+
+        Args:
+            file_path: Path to the timetable file
+
+        Returns:
+            DataFrame whose columns are the header labels of the kept columns
+        """
+        return self._frame_from_rows(self.iter_rows(file_path))
+
+    def read_sheets(self, file_path: str, sheets: Optional[Sequence[str]] = None) -> Dict[str, 'pd.DataFrame']:
+        """
+        Read several sheets of a workbook, opening it once.
+
+        When every sheet is requested, sheets without a recognisable header
+        row (notes, cover pages) are skipped. A sheet named explicitly must
+        hold a timetable.
+
+        Args:
+            file_path: Path to the timetable file
+            sheets: Sheet names to read; every sheet if omitted
+
+        Returns:
+            Dictionary of sheet name to DataFrame, in workbook order
+        """
+        return self._collect_sheets(file_path, sheets, self._frame_from_rows)
+
+    def read_sheet_rows(self, file_path: str, sheets: Optional[Sequence[str]] = None) -> Dict[str, SheetRows]:
+        """
+        Like read_sheets, but keep each sheet as plain lists instead of a DataFrame.
+
+        Args:
+            file_path: Path to the timetable file
+            sheets: Sheet names to read; every sheet if omitted
+
+        Returns:
+            Dictionary of sheet name to (column labels, data rows), in workbook order
+        """
+        return self._collect_sheets(file_path, sheets, self._table_from_rows)
+
+    def iter_sheet_rows(self, file_path: str, sheets: Optional[Sequence[str]] = None
+                        ) -> Iterator[Tuple[str, List[str], Iterator[List[Optional[str]]]]]:
+        """
+        Like read_sheet_rows, but one sheet at a time, with its data rows read lazily.
+
+        Only the first rows of a sheet are held while its header is located,
+        so a sheet of any size is read in constant memory. Consume a sheet's
+        rows before asking for the next sheet.
+
+        Args:
+            file_path: Path to the timetable file
+            sheets: Sheet names to read, in this order; every sheet if omitted
+
+        Yields:
+            Tuples of (sheet name, column labels, iterator of data rows)
+        """
+        if sheets is None:
+            for name, rows in self.iter_sheets(file_path):
+                try:
+                    labels, data = self._stream_table(rows)
+                except ValueError as e:
+                    if self.debug:
+                        print(f"Skipping sheet {name}: {e}")
+                    continue
+                yield name, labels, data
+            return
+
+        # The workbook is reopened for every sheet, so they come in the order asked for
+        for wanted in sheets:
+            workbook_sheets = self.iter_sheets(file_path)
+            try:
+                for name, rows in workbook_sheets:
+                    if name != wanted:
+                        continue
+                    try:
+                        labels, data = self._stream_table(rows)
+                    except ValueError as e:
+                        raise ValueError(f"Sheet {name}: {e}")
+                    yield name, labels, data
+                    break
+                else:
+                    raise ValueError(f"Sheets not found: {wanted}")
+            finally:
+                workbook_sheets.close()
+
+    def _collect_sheets(self, file_path: str, sheets: Optional[Sequence[str]],
+                        build: Callable[[Iterator[Sequence[Any]]], Any]) -> Dict[str, Any]:
+        """
+        Build every wanted sheet of a workbook, skipping non-timetable sheets
+        unless they were named.
+
+        Args:
+            file_path: Path to the timetable file
+            sheets: Sheet names to read; every sheet if omitted
+            build: Builds a sheet from its raw rows
+
+        Returns:
+            Dictionary of sheet name to built sheet, in workbook order
+        """
+        wanted = set(sheets) if sheets is not None else None
+        frames = {}
+        for name, rows in self.iter_sheets(file_path):
+            if wanted is not None and name not in wanted:
+                continue
+            try:
+                frames[name] = build(rows)
+            except ValueError as e:
+                if wanted is not None:
+                    raise ValueError(f"Sheet {name}: {e}")
+                if self.debug:
+                    print(f"Skipping sheet {name}: {e}")
+
+        if wanted is not None:
+            missing = [name for name in sheets if name not in frames]
+            if missing:
+                raise ValueError(f"Sheets not found: {', '.join(missing)}")
+            return {name: frames[name] for name in sheets}
+        return frames
+
+    def _frame_from_rows(self, rows: Iterator[Sequence[Any]]) -> 'pd.DataFrame':
+        """
+        Build the pruned string DataFrame from raw sheet rows.
+
+        Args:
+            rows: Iterator of row value sequences
+
+        Returns:
+            DataFrame whose columns are the header labels of the kept columns
+        """
+        import pandas as pd
+
+        labels, data = self._table_from_rows(rows)
+        return pd.DataFrame(data, columns=labels, dtype=object)
+
+    def _table_from_rows(self, rows: Iterator[Sequence[Any]]) -> SheetRows:
+        """
+        Locate the header in raw sheet rows and keep the columns in use, as strings.
+
+        Args:
+            rows: Iterator of row value sequences
+
+        Returns:
+            Tuple of (labels of the kept columns, data rows below the header)
+        """
+        labels, data = self._stream_table(rows)
+        return labels, list(data)
+
+    def _stream_table(self, rows: Iterator[Sequence[Any]]) -> Tuple[List[str], Iterator[List[Optional[str]]]]:
+        """
+        Locate the header in raw sheet rows; the data rows below it are read on demand.
+
+        Args:
+            rows: Iterator of row value sequences
+
+        Returns:
+            Tuple of (labels of the kept columns, iterator of data rows below
+            the header, pruned to those columns and converted to strings)
+        """
+        rows = iter(rows)
+        head = []
+        for row in rows:
+            head.append([_to_text(value) for value in row])
+            if len(head) == HEADER_SEARCH_ROWS + DATE_SEARCH_ROWS:
+                break
+
+        layout, _ = detect_rows_layout(head, self.days_of_week)
+        header_row = layout.header_row
+        header = head[header_row]
+        keep = self._select_columns(layout, header, head[header_row + 1:])
+        labels = _column_labels(header, keep)
+
+        if self.debug:
+            print(f"{self.name} reader: header in row {header_row}, kept columns {labels}")
+
+        def data() -> Iterator[List[Optional[str]]]:
+            for row in head[header_row + 1:]:
+                yield [row[i] if i < len(row) else None for i in keep]
+            for row in rows:
+                yield [_to_text(row[i]) if i < len(row) else None for i in keep]
+
+        return labels, data()
+
+    def _select_columns(self, layout: SheetLayout, header: List[Optional[str]],
+                        below: List[List[Optional[str]]]) -> List[int]:
+        """
+        Choose the columns the processor reads.
+
+        Args:
+            layout: Layout of the sheet
+            header: Header row labels
+            below: Data rows following the header
+
+        Returns:
+            Sorted column indexes to keep
+        """
+        # Time column and the first column for each day
+        keep = {layout.time_index, *layout.day_indexes}
+
+        # Columns that may carry the sheet date
+        for i, label in enumerate(header):
+            if label and re.search(DATE_PATTERN, label):
+                keep.add(i)
+        for row in below[:DATE_SEARCH_ROWS]:
+            for i, value in enumerate(row):
+                if value and re.search(DATE_PATTERN, value):
+                    keep.add(i)
+
+        return sorted(keep)
+
+
+class PandasReader(TimetableReader):
+    """
+    Default reader: the whole first sheet through pandas.read_excel, with
+    header detection left to TimetableProcessor.preprocess_dataframe.
+
+    Columns are read as objects, so cells keep the values the streaming
+    readers see; otherwise a boolean in a numeric column would become 1.0.
+    Row streaming (iter_sheet_rows) goes through openpyxl in read-only mode,
+    which read_excel also uses for .xlsx files.
+    """
+
+    name = "pandas"
+
+    def iter_sheets(self, file_path: str) -> Iterator[Tuple[str, Iterator[Sequence[Any]]]]:
+        return _iter_openpyxl_sheets(file_path)
+
+    def read(self, file_path: str) -> 'pd.DataFrame':
+        import pandas as pd
+
+        return pd.read_excel(file_path, dtype=object)
+
+    def read_sheets(self, file_path: str, sheets: Optional[Sequence[str]] = None) -> Dict[str, 'pd.DataFrame']:
+        import pandas as pd
+
+        return pd.read_excel(file_path, sheet_name=list(sheets) if sheets is not None else None, dtype=object)
+
+
+class OpenpyxlReader(TimetableReader):
+    """
+    Streams rows with openpyxl in read-only mode.
+    """
+
+    name = "openpyxl"
+
+    def iter_sheets(self, file_path: str) -> Iterator[Tuple[str, Iterator[Sequence[Any]]]]:
+        return _iter_openpyxl_sheets(file_path)
+
+
+class CalamineReader(TimetableReader):
+    """
+    Reads rows with the Rust calamine parser (requires python-calamine).
+    """
+
+    name = "calamine"
+
+    def iter_sheets(self, file_path: str) -> Iterator[Tuple[str, Iterator[Sequence[Any]]]]:
+        try:
+            from python_calamine import CalamineWorkbook
+        except ImportError:
+            raise ImportError("The calamine reader requires python-calamine (pip install python-calamine)")
+
+        workbook = CalamineWorkbook.from_path(file_path)
+        for name in workbook.sheet_names:
+            yield name, workbook.get_sheet_by_name(name).iter_rows()
+
+
+class CsvReader(TimetableReader):
+    """
+    Reads a sheet exported as CSV.
+    """
+
+    name = "csv"
+
+    def iter_sheets(self, file_path: str) -> Iterator[Tuple[str, Iterator[Sequence[Any]]]]:
+        # A CSV export holds one sheet, named after the file
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        with open(file_path, newline='', encoding='utf-8-sig') as file:
+            yield name, csv.reader(file)
+
+
+_READER_CLASSES = {
+    "pandas": PandasReader,
+    "openpyxl": OpenpyxlReader,
+    "calamine": CalamineReader,
+    "csv": CsvReader,
+}
+
+
+def get_reader(name: str, days_of_week: Sequence[str], debug: bool = False) -> TimetableReader:
+    """
+    Create a reader by engine name.
+
+    Args:
+        name: Reader engine, one of READERS
+        days_of_week: Day names used to recognise the header row
+        debug: Enable debug mode for additional logging
+
+    Returns:
+        Reader instance
+    """
+    if name not in _READER_CLASSES:
+        raise ValueError(f"Unknown reader: {name} (expected one of {', '.join(READERS)})")
+    return _READER_CLASSES[name](days_of_week, debug=debug)
+
+
+def _iter_openpyxl_sheets(file_path: str) -> Iterator[Tuple[str, Iterator[Sequence[Any]]]]:
+    """
+    Yield every sheet of a workbook with its raw rows, read with openpyxl in read-only mode.
+
+    Args:
+        file_path: Path to the .xlsx file
+
+    Yields:
+        Tuples of (sheet name, iterator of row value sequences)
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            yield sheet.title, sheet.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def _to_text(value: Any) -> Optional[str]:
+    """
+    Convert a raw cell value to its engines.cell_text; empty cells become None.
+
+    Args:
+        value: Raw cell value
+
+    Returns:
+        String value or None
+    """
+    if value is None or value == '':
+        return None
+    return cell_text(value)
+
+
+def _column_labels(header: List[Optional[str]], keep: List[int]) -> List[str]:
+    """
+    Build unique column labels for the kept columns, pandas style.
+
+    Args:
+        header: Header row labels
+        keep: Kept column indexes
+
+    Returns:
+        Column labels
+    """
+    labels = []
+    seen: Dict[str, int] = {}
+    for i in keep:
+        label = header[i] if i < len(header) and header[i] is not None else f"Unnamed: {i}"
+        if label in seen:
+            seen[label] += 1
+            label = f"{label}.{seen[label]}"
+        else:
+            seen[label] = 0
+        labels.append(label)
+    return labels
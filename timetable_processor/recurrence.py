@@ -0,0 +1,341 @@
+"""
+Weekly recurrence of timetable entries over a term.
+
+process_timetable emits each weekly slot once, stamped with a single date.
+A RecurringSchedule keeps those entries as they are and attaches a term
+(start, end, excluded holidays), so concrete occurrences are only produced
+on demand for the window that is asked for.
+"""
+import datetime
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Union
+
+from booking_table import BookingTable
+
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+# Columns added to each entry when emitting rules instead of occurrences
+RULE_COLUMNS = ("recurrence_end", "recurrence_rule", "excluded_dates")
+
+# SQLGenerator column types of the rule columns. recurrence_end is written as
+# text so a one-off entry's NULL stays NULL instead of becoming today's date.
+RULE_COLUMN_TYPES = {"recurrence_end": "text", "recurrence_rule": "text", "excluded_dates": "text"}
+
+RECURRENCE_MODES = ("single", "rules", "expand")
+
+_RRULE_DAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+
+def parse_date(value: Union[str, datetime.date]) -> datetime.date:
+    """
+    Parse a YYYY-MM-DD date.
+
+    Args:
+        value: Date string or date
+
+    Returns:
+        The date
+    """
+    if isinstance(value, datetime.date):
+        return value
+    try:
+        return datetime.date.fromisoformat(value.strip())
+    except ValueError:
+        raise ValueError(f"Invalid date '{value}'; expected YYYY-MM-DD")
+
+
+def weekday_index(day_name: Any) -> Optional[int]:
+    """
+    Weekday number (Monday is 0) of a day name such as "monday" or "Mon".
+
+    Args:
+        day_name: Day name
+
+    Returns:
+        Weekday number, or None if the name is not a weekday
+    """
+    name = str(day_name or '').strip().lower()
+    if len(name) < 3:
+        return None
+    for index, weekday in enumerate(WEEKDAYS):
+        if weekday.lower().startswith(name):
+            return index
+    return None
+
+
+class RecurrenceRule:
+    """
+    Weekly recurrence on one weekday between two dates, minus exclusions.
+
+    Occurrences are computed arithmetically, so counting them or iterating a
+    window never touches dates outside the window.
+    """
+
+    __slots__ = ('weekday', 'start', 'end', 'exclude')
+
+    def __init__(self, weekday: int, start: datetime.date, end: datetime.date,
+                 exclude: Iterable[datetime.date] = ()):
+        """
+        Initialize the RecurrenceRule.
+
+        Args:
+            weekday: Weekday number, Monday is 0
+            start: First day of the term
+            end: Last day of the term, inclusive
+            exclude: Dates with no occurrence (holidays)
+        """
+        self.weekday = weekday
+        self.start = start
+        self.end = end
+        self.exclude = frozenset(date for date in exclude if date.weekday() == weekday and start <= date <= end)
+
+    def first(self, after: Optional[datetime.date] = None) -> Optional[datetime.date]:
+        """
+        First occurrence on or after a date, ignoring exclusions.
+
+        Args:
+            after: Earliest date; the term start if omitted
+
+        Returns:
+            The date, or None if it falls after the term
+        """
+        day = max(after or self.start, self.start)
+        day += datetime.timedelta(days=(self.weekday - day.weekday()) % 7)
+        return day if day <= self.end else None
+
+    def occurrences(self, start: Optional[datetime.date] = None,
+                    end: Optional[datetime.date] = None) -> Iterator[datetime.date]:
+        """
+        Iterate the occurrences within a window.
+
+        Args:
+            start: First date of the window; the term start if omitted
+            end: Last date of the window, inclusive; the term end if omitted
+
+        Yields:
+            Occurrence dates in order
+        """
+        last = min(end or self.end, self.end)
+        day = self.first(start)
+        week = datetime.timedelta(days=7)
+        while day is not None and day <= last:
+            if day not in self.exclude:
+                yield day
+            day += week
+
+    def count(self, start: Optional[datetime.date] = None, end: Optional[datetime.date] = None) -> int:
+        """
+        Number of occurrences within a window, without iterating them.
+
+        Args:
+            start: First date of the window; the term start if omitted
+            end: Last date of the window, inclusive; the term end if omitted
+
+        Returns:
+            Occurrence count
+        """
+        start = max(start or self.start, self.start)
+        last = min(end or self.end, self.end)
+        first = self.first(start)
+        if first is None or first > last:
+            return 0
+        weeks = (last - first).days // 7 + 1
+        return weeks - sum(1 for date in self.exclude if start <= date <= last)
+
+    def to_rrule(self) -> str:
+        """
+        iCalendar RRULE of the rule; exclusions are not part of it.
+
+        Returns:
+            Rule string such as "FREQ=WEEKLY;BYDAY=MO;UNTIL=20250510"
+        """
+        return f"FREQ=WEEKLY;BYDAY={_RRULE_DAYS[self.weekday]};UNTIL={self.end:%Y%m%d}"
+
+    def __repr__(self) -> str:
+        return f"RecurrenceRule({WEEKDAYS[self.weekday]}, {self.start} - {self.end}, {len(self.exclude)} excluded)"
+
+
+class RecurringSchedule:
+    """
+    Weekly timetable entries repeated over a term.
+
+    Each entry is stored once. Entries whose day_of_week is a weekday recur
+    on that weekday from term_start to term_end, skipping holidays; any
+    other entry keeps its own date and is emitted once.
+    """
+
+    def __init__(self, data: Union[List[Dict[str, Any]], BookingTable],
+                 term_start: Union[str, datetime.date], term_end: Union[str, datetime.date],
+                 holidays: Iterable[Union[str, datetime.date]] = ()):
+        """
+        Initialize the RecurringSchedule.
+
+        Args:
+            data: List of dictionaries or a BookingTable of weekly entries
+            term_start: First day of the term (YYYY-MM-DD)
+            term_end: Last day of the term, inclusive (YYYY-MM-DD)
+            holidays: Dates with no classes (YYYY-MM-DD)
+        """
+        self.term_start = parse_date(term_start)
+        self.term_end = parse_date(term_end)
+        if self.term_end < self.term_start:
+            raise ValueError(f"Term ends ({self.term_end}) before it starts ({self.term_start})")
+        self.holidays = frozenset(parse_date(date) for date in holidays)
+
+        self.data = data if isinstance(data, BookingTable) else BookingTable.from_dicts(data)
+        self.rules = [RecurrenceRule(weekday, self.term_start, self.term_end, self.holidays)
+                      for weekday in range(len(WEEKDAYS))]
+
+        # Row numbers of the entries recurring on each weekday, and of the one-off entries
+        self._by_weekday: List[List[int]] = [[] for _ in WEEKDAYS]
+        self._single: List[int] = []
+        for row, weekday in enumerate(self.data.map_column("day_of_week", weekday_index)):
+            if weekday is None:
+                self._single.append(row)
+            else:
+                self._by_weekday[weekday].append(row)
+
+    def _window(self, start: Optional[Union[str, datetime.date]],
+                end: Optional[Union[str, datetime.date]]) -> tuple:
+        start = max(parse_date(start), self.term_start) if start else self.term_start
+        end = min(parse_date(end), self.term_end) if end else self.term_end
+        return start, end
+
+    def count_occurrences(self, start: Optional[Union[str, datetime.date]] = None,
+                          end: Optional[Union[str, datetime.date]] = None) -> int:
+        """
+        Number of rows expanding a window would produce, without expanding it.
+
+        Args:
+            start: First date of the window (YYYY-MM-DD); the term start if omitted
+            end: Last date of the window, inclusive; the term end if omitted
+
+        Returns:
+            Row count, including the one-off entries
+        """
+        start, end = self._window(start, end)
+        return len(self._single) + sum(len(rows) * rule.count(start, end)
+                                       for rows, rule in zip(self._by_weekday, self.rules))
+
+    def dates(self, start: Optional[Union[str, datetime.date]] = None,
+              end: Optional[Union[str, datetime.date]] = None) -> Iterator[datetime.date]:
+        """
+        Iterate the class days within a window: weekdays with entries, minus holidays.
+
+        Args:
+            start: First date of the window (YYYY-MM-DD); the term start if omitted
+            end: Last date of the window, inclusive; the term end if omitted
+
+        Yields:
+            Dates in order
+        """
+        start, end = self._window(start, end)
+        day = start
+        while day <= end:
+            if self._by_weekday[day.weekday()] and day not in self.holidays:
+                yield day
+            day += datetime.timedelta(days=1)
+
+    def iter_occurrences(self, start: Optional[Union[str, datetime.date]] = None,
+                         end: Optional[Union[str, datetime.date]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily expand the entries into one entry per occurrence, in date order.
+
+        One-off entries come first. Only one day's entries exist at a time,
+        so the result can be streamed into SQLGenerator.write.
+
+        Args:
+            start: First date of the window (YYYY-MM-DD); the term start if omitted
+            end: Last date of the window, inclusive; the term end if omitted
+
+        Yields:
+            Entry dictionaries with date set to the occurrence
+        """
+        entries = self.data.to_dicts()
+        for row in self._single:
+            yield dict(entries[row])
+        for day in self.dates(start, end):
+            iso = day.isoformat()
+            for row in self._by_weekday[day.weekday()]:
+                yield dict(entries[row], date=iso)
+
+    def expand(self, start: Optional[Union[str, datetime.date]] = None,
+               end: Optional[Union[str, datetime.date]] = None) -> BookingTable:
+        """
+        Expand a window into a BookingTable, column by column.
+
+        Args:
+            start: First date of the window (YYYY-MM-DD); the term start if omitted
+            end: Last date of the window, inclusive; the term end if omitted
+
+        Returns:
+            BookingTable with one row per occurrence, in iter_occurrences order
+        """
+        columns = {name: self.data.column(name) for name in self.data.columns}
+        order = list(self._single)
+        dates = [columns["date"][row] for row in self._single]
+        for day in self.dates(start, end):
+            rows = self._by_weekday[day.weekday()]
+            order.extend(rows)
+            dates.extend([day.isoformat()] * len(rows))
+
+        expanded = {name: [values[row] for row in order] for name, values in columns.items()}
+        expanded["date"] = dates
+        return BookingTable.from_columns(expanded)
+
+    def to_rules(self) -> BookingTable:
+        """
+        One row per weekly entry, carrying its recurrence instead of its occurrences.
+
+        Recurring rows get date set to their first occurrence, recurrence_end
+        to the last day of the term, recurrence_rule to an iCalendar RRULE and
+        excluded_dates to the comma-separated holidays that fall on their
+        weekday. One-off rows keep their date and leave the rule columns empty.
+
+        Returns:
+            BookingTable with the entry columns plus RULE_COLUMNS
+        """
+        columns = {name: self.data.column(name) for name in self.data.columns}
+        weekdays = self.data.map_column("day_of_week", weekday_index)
+
+        rule_values = {}
+        for weekday, rule in enumerate(self.rules):
+            first = next(rule.occurrences(), None)
+            rule_values[weekday] = (
+                first.isoformat() if first else None,
+                rule.end.isoformat(),
+                rule.to_rrule(),
+                ",".join(date.isoformat() for date in sorted(rule.exclude)),
+            )
+
+        dates, ends, rrules, excluded = [], [], [], []
+        for row, weekday in enumerate(weekdays):
+            if weekday is None:
+                dates.append(columns["date"][row])
+                ends.append(None)
+                rrules.append('')
+                excluded.append('')
+            else:
+                first, end, rrule, exclude = rule_values[weekday]
+                dates.append(first or columns["date"][row])
+                ends.append(end)
+                rrules.append(rrule)
+                excluded.append(exclude)
+
+        columns["date"] = dates
+        columns["recurrence_end"] = ends
+        columns["recurrence_rule"] = rrules
+        columns["excluded_dates"] = excluded
+        return BookingTable.from_columns(columns)
+
+
+if __name__ == "__main__":
+    # Example usage
+    from processor import TimetableProcessor
+
+    processor = TimetableProcessor()
+    data = processor.process_timetable("examples/sample.xlsx", as_table=True)
+
+    schedule = RecurringSchedule(data, "2025-01-06", "2025-05-02", holidays=["2025-03-14", "2025-04-18"])
+    print(f"{len(data)} weekly entries stand for {schedule.count_occurrences()} occurrences")
+    print(f"First week: {schedule.count_occurrences('2025-01-06', '2025-01-12')} occurrences")
+    print(schedule.to_rules()[0].to_dict())
@@ -0,0 +1,130 @@
+"""
+Integer-minute time slot model with memoized time range parsing.
+
+Times are held as minutes since midnight and only formatted as HH:MM strings
+when an entry is built. A timetable only has a handful of distinct time
+labels, so parsed ranges and generated slot lists are cached per label.
+"""
+import re
+from functools import lru_cache
+from typing import Tuple
+
+# Time range such as "9:00 - 10:30"; used to recognise rows that hold a time slot
+TIME_RANGE_PATTERN = r'\d{1,2}(?::\d{2})?\s*-\s*\d{1,2}(?::\d{2})?'
+
+# Start and end of a time range, with optional AM/PM markers
+TIME_BOUNDS_PATTERN = r'(\d{1,2}(?::\d{2})?\s*(?:AM|PM)?)\s*-\s*(\d{1,2}(?::\d{2})?\s*(?:AM|PM)?)'
+
+SLOT_MINUTES = 30
+MINUTES_PER_DAY = 24 * 60
+
+# Upper bound on the number of distinct labels kept by each cache
+CACHE_SIZE = 1024
+
+_TIME_BOUNDS_RE = re.compile(TIME_BOUNDS_PATTERN, re.IGNORECASE)
+_CLOCK_RE = re.compile(r'^(\d{1,2})(?::(\d{2}))?\s*(AM|PM)?$', re.IGNORECASE)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_clock(time_str: str) -> int:
+    """
+    Parse a clock time into minutes since midnight.
+
+    Accepts "9", "9:30", "09:30", "9 AM", "9AM", "9:30 PM" and "9:30PM".
+    AM/PM markers only apply to 12-hour values; "13:00 PM" is read as 13:00.
+
+    Args:
+        time_str: Time string to parse
+
+    Returns:
+        Minutes since midnight
+    """
+    match = _CLOCK_RE.match(time_str.strip())
+    if not match:
+        raise ValueError(f"Could not parse time: {time_str}")
+
+    hours_str, minutes_str, period = match.groups()
+    hours = int(hours_str)
+    minutes = int(minutes_str) if minutes_str else 0
+
+    if period and 1 <= hours <= 12:
+        hours = hours % 12 + (12 if period.upper() == 'PM' else 0)
+
+    if hours > 23 or minutes > 59:
+        raise ValueError(f"Time out of range: {time_str}")
+
+    return hours * 60 + minutes
+
+
+def format_minutes(minutes: int) -> str:
+    """
+    Format minutes since midnight as HH:MM.
+
+    Args:
+        minutes: Minutes since midnight; values past midnight wrap around
+
+    Returns:
+        Time string in HH:MM format
+    """
+    hours, mins = divmod(minutes % MINUTES_PER_DAY, 60)
+    return f"{hours:02d}:{mins:02d}"
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_time_range(time_str: str) -> Tuple[int, int]:
+    """
+    Extract start and end times from a time range label.
+
+    Args:
+        time_str: Time range string (e.g., "9:00 - 10:30")
+
+    Returns:
+        Tuple of (start, end) in minutes since midnight
+    """
+    match = _TIME_BOUNDS_RE.search(time_str)
+    if not match:
+        raise ValueError(f"Could not parse time range: {time_str}")
+
+    start, end = match.groups()
+    return parse_clock(start), parse_clock(end)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def slot_range(start: int, end: int) -> Tuple[Tuple[int, int], ...]:
+    """
+    Split a time range into 30-minute slots.
+
+    An end time earlier than the start time is taken to be on the next day.
+    The last slot is shortened if the range is not a multiple of 30 minutes.
+
+    Args:
+        start: Start time in minutes since midnight
+        end: End time in minutes since midnight
+
+    Returns:
+        Tuple of (slot_start, slot_end) pairs in minutes
+    """
+    if end < start:
+        end += MINUTES_PER_DAY
+
+    return tuple(
+        (current, min(current + SLOT_MINUTES, end))
+        for current in range(start, end, SLOT_MINUTES)
+    )
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def time_range_slots(time_str: str) -> Tuple[Tuple[str, str], ...]:
+    """
+    Parse a time range label and return its formatted 30-minute slots.
+
+    Args:
+        time_str: Time range string (e.g., "9:00 - 10:30")
+
+    Returns:
+        Tuple of (slot_start, slot_end) pairs in HH:MM format
+    """
+    return tuple(
+        (format_minutes(slot_start), format_minutes(slot_end))
+        for slot_start, slot_end in slot_range(*parse_time_range(time_str))
+    )
@@ -1,8 +1,27 @@
 """
 Module for generating SQL insert statements from timetable data.
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Callable, Optional, Union, Iterable, Iterator, Tuple
+from itertools import islice
 import datetime
+import os
+
+from booking_table import BookingTable, COLUMNS
+
+# Output formats: multi-row INSERTs, a COPY ... FROM STDIN block in text or
+# CSV format, or a standalone CSV file plus a psql load script
+OUTPUT_FORMATS = ("insert", "copy", "copy-csv", "csv")
+
+# COPY text format escapes; everything else is taken literally
+_COPY_TEXT_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+_CSV_SPECIAL = (',', '"', '\n', '\r', '\\')
+
+# Column types the compiled value formatters know
+COLUMN_TYPES = ("text", "date", "bool", "int", "float")
+
+# Types of the columns process_timetable emits
+TIMETABLE_COLUMN_TYPES = dict({col: "text" for col in COLUMNS}, date="date", is_recurring="bool")
 
 
 class SQLGenerator:
@@ -10,93 +29,468 @@ class SQLGenerator:
     Class for generating SQL insert statements from timetable data.
     """
 
-    def __init__(self, table_name: str = "timetable"):
+    def __init__(self, table_name: str = "timetable", columns: Optional[List[str]] = None,
+                 column_types: Optional[Dict[str, str]] = None):
         """
         Initialize the SQLGenerator.
         
+        Value formatting is compiled once per output: each column gets a
+        formatter for its type, taken from column_types or inferred from the
+        first batch. A value of an unexpected type still goes through the
+        general formatting rules, so inference never changes the output.
+        
         Args:
             table_name: Name of the table to insert data into
+            columns: Column order; taken from the first entry if omitted
+            column_types: Column name to one of COLUMN_TYPES; columns not
+                listed are inferred
         """
         self.table_name = table_name
-    
-    # In the generate_insert_statements method of SQLGenerator class:
+        self.columns = list(columns) if columns is not None else None
+        self.column_types = dict(column_types or {})
+        unknown = set(self.column_types.values()) - set(COLUMN_TYPES)
+        if unknown:
+            raise ValueError(f"Unknown column types: {', '.join(sorted(unknown))} "
+                             f"(expected {', '.join(COLUMN_TYPES)})")
 
-    def generate_insert_statements(self, data: List[Dict[str, Any]], 
+    def generate_insert_statements(self, data: Union[List[Dict[str, Any]], BookingTable],
                                 batch_size: int = 100) -> List[str]:
         """
         Generate SQL insert statements from timetable data.
         
         Args:
-            data: List of dictionaries containing timetable data
+            data: List of dictionaries or a BookingTable containing timetable data
             batch_size: Number of rows per insert statement
             
         Returns:
             List of SQL insert statements
         """
-        if not data:
-            return []
-        
-        statements = []
-        
-        # Get column names from the first data entry
-        columns = list(data[0].keys())
-        
-        # Ensure 'date' is in the columns
-        if 'date' not in columns:
-            # Add current date as fallback
-            for entry in data:
-                entry['date'] = datetime.date.today().isoformat()
-            columns.append('date')
-        
-        # Process data in batches
-        for i in range(0, len(data), batch_size):
-            batch = data[i:i + batch_size]
-            
-            # Create the insert statement header
-            insert_stmt = f"INSERT INTO {self.table_name} ({', '.join(columns)}) VALUES\n"
-            
-            # Add value rows
-            value_rows = []
-            
-            for entry in batch:
-                values = []
-                for col in columns:
-                    value = entry.get(col, '')
-                    
-                    # Format value based on its type
-                    if value is None:
-                        # For NOT NULL constraints, provide a default value
-                        if col == 'date':
-                            today = datetime.date.today().isoformat()
-                            values.append(f"'{today}'")
-                        else:
-                            values.append('NULL')
-                    elif isinstance(value, bool):
-                        values.append('TRUE' if value else 'FALSE')
-                    elif isinstance(value, (int, float)):
-                        values.append(str(value))
-                    elif col == 'date':
-                        # Ensure date is in YYYY-MM-DD format
-                        values.append(f"'{value}'")
-                    else:
-                        # Escape single quotes in string values
-                        escaped_value = str(value).replace("'", "''")
-                        values.append(f"'{escaped_value}'")
+        return list(self.iter_insert_statements(data, batch_size=batch_size))
+    
+    def iter_insert_statements(self, data: Iterable[Dict[str, Any]],
+                               batch_size: int = 100) -> Iterator[str]:
+        """
+        Generate SQL insert statements lazily from any iterable of entries.
+        
+        Only one batch of entries is held at a time, so entries can be fed
+        straight from TimetableProcessor.iter_timetable.
+        
+        Args:
+            data: Iterable of dictionaries or a BookingTable containing timetable data
+            batch_size: Number of rows per insert statement
+            
+        Yields:
+            SQL insert statements
+        """
+        for columns, rows in self._iter_value_rows(data, batch_size):
+            yield self._format_insert(columns, rows)
+    
+    def write_insert_statements(self, data: Iterable[Dict[str, Any]], output_file: str,
+                                batch_size: int = 100) -> int:
+        """
+        Stream SQL insert statements to a file, writing each batch as it fills.
+        
+        Args:
+            data: Iterable of dictionaries or a BookingTable containing timetable data
+            output_file: Output file path
+            batch_size: Number of rows per insert statement
+            
+        Returns:
+            Number of rows written
+        """
+        rows = 0
+        try:
+            with open(output_file, 'w') as file:
+                for columns, value_rows in self._iter_value_rows(data, batch_size):
+                    file.write(self._format_insert(columns, value_rows) + "\n\n")
+                    rows += len(value_rows)
+            print(f"SQL statements saved to {output_file}")
+        except Exception as e:
+            raise Exception(f"Failed to save SQL statements to file: {e}")
+        
+        return rows
+    
+    def write(self, data: Iterable[Dict[str, Any]], output_file: str, output_format: str = "insert",
+              batch_size: int = 100) -> int:
+        """
+        Write entries to a file in one of OUTPUT_FORMATS.
+        
+        Args:
+            data: Iterable of dictionaries or a BookingTable containing timetable data
+            output_file: Output file path
+            output_format: One of OUTPUT_FORMATS
+            batch_size: Rows per INSERT statement, or rows formatted per write
+            
+        Returns:
+            Number of rows written
+        """
+        if output_format == "insert":
+            return self.write_insert_statements(data, output_file, batch_size=batch_size)
+        if output_format in ("copy", "copy-csv"):
+            return self.write_copy(data, output_file, csv_format=output_format == "copy-csv",
+                                   batch_size=batch_size)
+        if output_format == "csv":
+            return self.write_csv(data, output_file, batch_size=batch_size)
+        raise ValueError(f"Unknown output format: {output_format} (expected one of {', '.join(OUTPUT_FORMATS)})")
+    
+    def iter_copy_lines(self, data: Iterable[Dict[str, Any]], csv_format: bool = False,
+                        batch_size: int = 1000) -> Iterator[str]:
+        """
+        Generate a COPY ... FROM STDIN block lazily.
+        
+        Postgres loads COPY data without parsing an SQL expression per value,
+        which is much faster than multi-row INSERTs. The block can be run with
+        psql -f. In text format tabs, newlines, carriage returns and
+        backslashes are escaped and NULL is \\N; in CSV format NULL is an
+        unquoted empty field and empty strings are quoted.
+        
+        Args:
+            data: Iterable of dictionaries or a BookingTable containing timetable data
+            csv_format: Use FORMAT csv instead of the text format
+            batch_size: Rows formatted at a time
+            
+        Yields:
+            The COPY command, chunks of data lines, then the \\. terminator
+        """
+        started = False
+        for columns, chunk, _ in self._iter_copy_chunks(data, csv_format, batch_size):
+            if not started:
+                yield self._copy_command(columns, csv_format)
+                started = True
+            yield chunk
+        if started:
+            yield "\\.\n"
+    
+    def write_copy(self, data: Iterable[Dict[str, Any]], output_file: str, csv_format: bool = False,
+                   batch_size: int = 1000) -> int:
+        """
+        Stream a COPY ... FROM STDIN block to a file.
+        
+        Args:
+            data: Iterable of dictionaries or a BookingTable containing timetable data
+            output_file: Output file path
+            csv_format: Use FORMAT csv instead of the text format
+            batch_size: Rows formatted at a time
+            
+        Returns:
+            Number of rows written
+        """
+        rows = 0
+        try:
+            with open(output_file, 'w', newline='') as file:
+                for columns, chunk, count in self._iter_copy_chunks(data, csv_format, batch_size):
+                    if not rows:
+                        file.write(self._copy_command(columns, csv_format))
+                    file.write(chunk)
+                    rows += count
+                if rows:
+                    file.write("\\.\n")
+            print(f"COPY data saved to {output_file}")
+        except Exception as e:
+            raise Exception(f"Failed to save COPY data to file: {e}")
+        
+        return rows
+    
+    def write_csv(self, data: Iterable[Dict[str, Any]], output_file: str,
+                  script_file: Optional[str] = None, batch_size: int = 1000) -> int:
+        """
+        Write a standalone CSV file with a header, plus a psql load script.
+        
+        The script runs \\copy with the CSV path relative to the script, so
+        run it from its own directory: psql -f <script_file>.
+        
+        Args:
+            data: Iterable of dictionaries or a BookingTable containing timetable data
+            output_file: CSV file path
+            script_file: Load script path (default: <output_file stem>_load.sql)
+            batch_size: Rows formatted at a time
+            
+        Returns:
+            Number of rows written
+        """
+        if script_file is None:
+            script_file = os.path.splitext(output_file)[0] + "_load.sql"
+        
+        rows = 0
+        columns = None
+        try:
+            with open(output_file, 'w', newline='') as file:
+                for columns, chunk, count in self._iter_copy_chunks(data, True, batch_size):
+                    if not rows:
+                        file.write(','.join(columns) + "\n")
+                    file.write(chunk)
+                    rows += count
+            
+            if columns is not None:
+                csv_path = os.path.relpath(os.path.abspath(output_file),
+                                           os.path.dirname(os.path.abspath(script_file)))
+                with open(script_file, 'w') as file:
+                    file.write(f"-- Load {os.path.basename(output_file)} into {self.table_name}\n")
+                    file.write(f"\\copy {self.table_name} ({', '.join(columns)}) FROM '{csv_path}' "
+                               f"WITH (FORMAT csv, HEADER true)\n")
+            print(f"CSV saved to {output_file}, load script saved to {script_file}")
+        except Exception as e:
+            raise Exception(f"Failed to save CSV to file: {e}")
+        
+        return rows
+    
+    def _copy_command(self, columns: List[str], csv_format: bool) -> str:
+        options = " WITH (FORMAT csv)" if csv_format else ""
+        return f"COPY {self.table_name} ({', '.join(columns)}) FROM STDIN{options};\n"
+    
+    def _iter_copy_chunks(self, data: Iterable[Dict[str, Any]], csv_format: bool,
+                          batch_size: int) -> Iterator[Tuple[List[str], str, int]]:
+        """
+        Format entries as COPY data lines, a batch at a time.
+        
+        Args:
+            data: Iterable of dictionaries or a BookingTable containing timetable data
+            csv_format: Format as CSV rather than COPY text
+            batch_size: Rows formatted at a time
+            
+        Yields:
+            Tuples of (columns, newline-terminated data lines, row count)
+        """
+        separator = ',' if csv_format else '\t'
+        if isinstance(data, BookingTable) and 'date' in data.columns and self.columns is None:
+            # Columnar fast path: each distinct value is formatted once
+            columns = list(data.columns)
+            formatters = [self._copy_formatter(col, csv_format) for col in columns]
+            for i in range(0, len(data), batch_size):
+                batch = data[i:i + batch_size]
+                formatted = [batch.map_column(col, fmt) for col, fmt in zip(columns, formatters)]
+                lines = [separator.join(values) for values in zip(*formatted)]
+                yield columns, '\n'.join(lines) + '\n', len(batch)
+            return
+        
+        formatters = None
+        for columns, batch in self._iter_batches(data, batch_size):
+            if formatters is None:
+                formatters = [(col, self._copy_formatter(col, csv_format)) for col in columns]
+            lines = [separator.join([fmt(entry.get(col, '')) for col, fmt in formatters]) for entry in batch]
+            yield columns, '\n'.join(lines) + '\n', len(batch)
+    
+    def _copy_formatter(self, col: str, csv_format: bool) -> Callable[[Any], str]:
+        """
+        Build the COPY value formatter for a column.
+        
+        Values follow the INSERT output: a None in a date column becomes
+        today's date, other None values become NULL, a column an entry lacks
+        is an empty string, and booleans become true/false. Date columns are
+        those column_types marks as "date", plus the date column.
+        
+        Args:
+            col: Column name
+            csv_format: Format for CSV rather than COPY text
+            
+        Returns:
+            Function formatting one value
+        """
+        null = '' if csv_format else '\\N'
+        if self.column_types.get(col, "date" if col == 'date' else "text") == "date":
+            null = datetime.date.today().isoformat()
+        
+        def format_value(value: Any) -> str:
+            if value is None:
+                return null
+            if isinstance(value, bool):
+                return 'true' if value else 'false'
+            if isinstance(value, (int, float)):
+                return str(value)
+            
+            text = str(value)
+            if csv_format:
+                # An unquoted empty field would load as NULL
+                if text == '' or any(char in text for char in _CSV_SPECIAL):
+                    return '"' + text.replace('"', '""') + '"'
+                return text
+            return text.translate(_COPY_TEXT_ESCAPES)
+        
+        return format_value
+    
+    def _iter_batches(self, data: Iterable[Dict[str, Any]],
+                      batch_size: int) -> Iterator[Tuple[List[str], List[Dict[str, Any]]]]:
+        """
+        Split entries into batches and resolve the column list.
+        
+        Args:
+            data: Iterable of dictionaries or a BookingTable containing timetable data
+            batch_size: Number of rows per batch
+            
+        Yields:
+            Tuples of (columns, batch of entry dictionaries)
+        """
+        if isinstance(data, BookingTable):
+            batches = (data[i:i + batch_size].to_dicts() for i in range(0, len(data), batch_size))
+        else:
+            iterator = iter(data)
+            batches = iter(lambda: list(islice(iterator, batch_size)), [])
+        
+        columns = None
+        add_date = False
+        for batch in batches:
+            if columns is None:
+                # Use the configured columns, or those of the first data entry
+                columns = list(self.columns) if self.columns is not None else list(batch[0].keys())
                 
-                value_rows.append(f"({', '.join(values)})")
+                # Ensure 'date' is in the columns
+                if 'date' not in columns:
+                    columns.append('date')
+                    add_date = True
+            
+            if add_date:
+                # Add current date as fallback
+                for entry in batch:
+                    entry['date'] = datetime.date.today().isoformat()
+            
+            yield columns, batch
+    
+    def _iter_value_rows(self, data: Iterable[Dict[str, Any]],
+                         batch_size: int) -> Iterator[Tuple[List[str], List[str]]]:
+        """
+        Format entries as INSERT value rows, a batch at a time.
+        
+        Args:
+            data: Iterable of dictionaries or a BookingTable containing timetable data
+            batch_size: Number of rows per batch
             
-            # Join all value rows with commas
-            insert_stmt += ',\n'.join(value_rows) + ";"
-            statements.append(insert_stmt)
+        Yields:
+            Tuples of (columns, formatted "(...)" value rows)
+        """
+        if isinstance(data, BookingTable) and 'date' in data.columns and self.columns is None:
+            # Columnar fast path: each distinct value is formatted once
+            columns = list(data.columns)
+            formatters = self._compile_formatters(columns, data[:batch_size].to_dicts())
+            for i in range(0, len(data), batch_size):
+                batch = data[i:i + batch_size]
+                formatted = [batch.map_column(col, fmt) for col, fmt in zip(columns, formatters)]
+                yield columns, ["(" + ", ".join(values) + ")" for values in zip(*formatted)]
+            return
+        
+        formatters = None
+        for columns, batch in self._iter_batches(data, batch_size):
+            if formatters is None:
+                formatters = list(zip(columns, self._compile_formatters(columns, batch)))
+            yield columns, ["(" + ", ".join([fmt(entry.get(col, '')) for col, fmt in formatters]) + ")"
+                            for entry in batch]
+    
+    def _compile_formatters(self, columns: List[str],
+                            sample: List[Dict[str, Any]]) -> List[Callable[[Any], str]]:
+        """
+        Build one SQL literal formatter per column.
+        
+        Args:
+            columns: Column names
+            sample: Entries used to infer the types of unlisted columns
+            
+        Returns:
+            Formatters in column order
+        """
+        # Fallback for missing dates, computed once rather than per value
+        today = f"'{datetime.date.today().isoformat()}'"
+        formatters = []
+        for col in columns:
+            col_type = self.column_types.get(col) or self._infer_type(col, sample)
+            formatters.append(self._value_formatter(col_type, today))
+        return formatters
+    
+    @staticmethod
+    def _infer_type(col: str, sample: List[Dict[str, Any]]) -> str:
+        """
+        Infer a column type from its first non-null value.
+        
+        Args:
+            col: Column name
+            sample: Entry dictionaries
+            
+        Returns:
+            One of COLUMN_TYPES
+        """
+        if col == 'date':
+            return "date"
+        for entry in sample:
+            value = entry.get(col)
+            if value is None:
+                continue
+            if isinstance(value, bool):
+                return "bool"
+            if isinstance(value, int):
+                return "int"
+            if isinstance(value, float):
+                return "float"
+            return "text"
+        return "text"
+    
+    @staticmethod
+    def _value_formatter(col_type: str, today: str) -> Callable[[Any], str]:
+        """
+        Build the SQL literal formatter for a column type.
+        
+        The formatter handles the column's expected type directly and hands
+        anything else to the general rules: NULL (today's date for a date
+        column, which is NOT NULL), TRUE/FALSE, bare numbers, or a quoted
+        string with single quotes doubled.
+        
+        Args:
+            col_type: One of COLUMN_TYPES
+            today: Quoted literal used for missing dates
+            
+        Returns:
+            Function formatting one value
+        """
+        null = today if col_type == "date" else 'NULL'
+        
+        def format_any(value: Any) -> str:
+            if value is None:
+                return null
+            if isinstance(value, bool):
+                return 'TRUE' if value else 'FALSE'
+            if isinstance(value, (int, float)):
+                return str(value)
+            return "'" + str(value).replace("'", "''") + "'"
+        
+        if col_type in ("text", "date"):
+            def format_text(value: Any) -> str:
+                if value.__class__ is str:
+                    return "'" + value.replace("'", "''") + "'"
+                return format_any(value)
+            return format_text
         
-        return statements
+        if col_type == "bool":
+            def format_bool(value: Any) -> str:
+                if value is True:
+                    return 'TRUE'
+                if value is False:
+                    return 'FALSE'
+                return format_any(value)
+            return format_bool
+        
+        def format_number(value: Any) -> str:
+            if value.__class__ is int or value.__class__ is float:
+                return str(value)
+            return format_any(value)
+        return format_number
+    
+    def _format_insert(self, columns: List[str], rows: List[str]) -> str:
+        """
+        Format one multi-row insert statement.
+        
+        Args:
+            columns: Column names
+            rows: Formatted "(...)" value rows
+            
+        Returns:
+            SQL insert statement
+        """
+        insert_stmt = f"INSERT INTO {self.table_name} ({', '.join(columns)}) VALUES\n"
+        return insert_stmt + ',\n'.join(rows) + ";"
     
-    def save_to_file(self, statements: List[str], output_file: str) -> None:
+    def save_to_file(self, statements: Iterable[str], output_file: str) -> None:
         """
         Save SQL statements to a file.
         
         Args:
-            statements: List of SQL statements
+            statements: SQL statements (a list or a lazy iterator)
             output_file: Output file path
         """
         try:
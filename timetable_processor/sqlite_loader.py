@@ -0,0 +1,294 @@
+"""
+Module for loading timetable data into a local SQLite database.
+"""
+import datetime
+import os
+import random
+import sqlite3
+import statistics
+import time
+from itertools import chain, repeat
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence, Tuple
+
+from booking_table import BookingTable
+from sql_generator import TIMETABLE_COLUMN_TYPES
+
+# Columns of the bookings table, in the order of output/inserts.sql, then
+# the slot bounds process_timetable also emits
+BOOKINGS_SCHEMA = (
+    ("room_no", "TEXT NOT NULL"),
+    ("date", "TEXT NOT NULL"),
+    ("time_slot", "TEXT NOT NULL"),
+    ("booked_by", "TEXT"),
+    ("reason", "TEXT"),
+    ("status", "TEXT NOT NULL DEFAULT 'pending'"),
+    ("approved_by", "TEXT"),
+    ("is_recurring", "INTEGER NOT NULL DEFAULT 0"),
+    ("class", "TEXT"),
+    ("day_of_week", "TEXT"),
+    ("start_time", "TEXT"),
+    ("end_time", "TEXT"),
+)
+
+# Storage of other columns, by sql_generator column type; dates are ISO text
+SQLITE_TYPES = {"text": "TEXT", "date": "TEXT", "bool": "INTEGER", "int": "INTEGER", "float": "REAL"}
+
+# Set on every connection: WAL so readers never block the load, fsync only
+# at checkpoints, and a 64 MiB page cache plus memory-mapped reads
+PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("temp_store", "MEMORY"),
+    ("cache_size", -64 * 1024),
+    ("mmap_size", 256 * 1024 * 1024),
+)
+
+# The frontend's TimeSlots.js reads these columns of one room on one date
+LOOKUP_COLUMNS = ("time_slot", "status", "reason", "booked_by", "is_recurring", "class")
+
+
+class SQLiteLoader:
+    """
+    Class for loading timetable data into a local SQLite database.
+
+    Creates the bookings schema of output/inserts.sql, with an id primary
+    key like the Supabase table, so the frontend's queries can be tried
+    offline.
+    """
+
+    def __init__(self, db_path: str, table_name: str = "bookings",
+                 column_types: Optional[Dict[str, str]] = None, debug: bool = False):
+        """
+        Initialize the SQLiteLoader.
+
+        Args:
+            db_path: Path of the database file; created if missing
+            table_name: Name of the table to load data into
+            column_types: Column name to one of sql_generator.COLUMN_TYPES,
+                used for columns the bookings schema does not have;
+                defaults to TIMETABLE_COLUMN_TYPES
+            debug: Enable debug mode for additional logging
+        """
+        self.db_path = db_path
+        self.table_name = table_name
+        self.column_types = TIMETABLE_COLUMN_TYPES if column_types is None else column_types
+        self.debug = debug
+        self._connection = None
+
+    def __enter__(self) -> 'SQLiteLoader':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """
+        The open connection, in autocommit mode with PRAGMAS applied.
+        """
+        if self._connection is None:
+            # Autocommit, so load_data controls the transaction itself
+            self._connection = sqlite3.connect(self.db_path, isolation_level=None)
+            for name, value in PRAGMAS:
+                self._connection.execute(f"PRAGMA {name} = {value}")
+        return self._connection
+
+    def close(self) -> None:
+        """
+        Close the connection.
+        """
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def create_schema(self, columns: Sequence[str] = ()) -> None:
+        """
+        Create the table if it does not exist and add any missing columns.
+
+        Args:
+            columns: Columns the data will fill; those outside the bookings
+                schema are added with their SQLITE_TYPES storage
+        """
+        table = _quote(self.table_name)
+        definitions = ["id INTEGER PRIMARY KEY"] + [f"{_quote(name)} {decl}" for name, decl in BOOKINGS_SCHEMA]
+        self.connection.execute(f"CREATE TABLE IF NOT EXISTS {table} ({', '.join(definitions)})")
+
+        existing = {row[1] for row in self.connection.execute(f"PRAGMA table_info({table})")}
+        for name in columns:
+            if name not in existing:
+                col_type = SQLITE_TYPES.get(self.column_types.get(name, "text"), "TEXT")
+                self.connection.execute(f"ALTER TABLE {table} ADD COLUMN {_quote(name)} {col_type}")
+                existing.add(name)
+
+    def create_indexes(self) -> None:
+        """
+        Create the index behind the frontend's lookup of one room on one date.
+        """
+        self.connection.execute(f"CREATE INDEX IF NOT EXISTS {_quote(self.table_name + '_room_date_idx')} "
+                                f"ON {_quote(self.table_name)} (room_no, date)")
+
+    def load_data(self, data: Iterable[Dict[str, Any]], replace: bool = False,
+                  build_indexes: bool = True) -> Dict[str, Any]:
+        """
+        Load timetable data in one transaction.
+
+        Rows go through a single executemany, so any iterable of entries is
+        loaded without holding it in memory. The indexes are created after
+        the rows when the table is new, which is faster than updating them
+        row by row. A missing date becomes today's date, like in the SQL
+        output.
+
+        Args:
+            data: List of dictionaries, a BookingTable, or any iterable of entries
+            replace: Delete the rows already in the table first
+            build_indexes: Create the lookup index
+
+        Returns:
+            Dictionary with load results: success, message, rows, seconds
+            and rows_per_second
+        """
+        start = time.perf_counter()
+        columns, rows = self._iter_rows(data)
+        connection = self.connection
+        try:
+            self.create_schema(columns)
+            connection.execute("BEGIN")
+            if replace:
+                connection.execute(f"DELETE FROM {_quote(self.table_name)}")
+            loaded = 0
+            if columns:
+                placeholders = ", ".join("?" for _ in columns)
+                cursor = connection.executemany(
+                    f"INSERT INTO {_quote(self.table_name)} ({', '.join(_quote(c) for c in columns)}) "
+                    f"VALUES ({placeholders})", rows)
+                loaded = cursor.rowcount
+            if build_indexes:
+                self.create_indexes()
+            connection.execute("COMMIT")
+        except sqlite3.Error as e:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            return {"success": False, "message": f"Load failed: {e}", "rows": 0,
+                    "seconds": time.perf_counter() - start, "rows_per_second": 0.0}
+
+        seconds = time.perf_counter() - start
+        if self.debug:
+            print(f"Loaded {loaded} rows into {self.db_path} in {seconds:.3f}s")
+        return {
+            "success": True,
+            "message": f"Loaded {loaded} rows into {self.table_name}",
+            "rows": loaded,
+            "seconds": seconds,
+            "rows_per_second": loaded / seconds if seconds > 0 else 0.0,
+        }
+
+    def lookup(self, room_no: str, date: str) -> List[Dict[str, Any]]:
+        """
+        Bookings of one room on one date, as the frontend's TimeSlots.js reads them.
+
+        Args:
+            room_no: Room number
+            date: Date in YYYY-MM-DD format
+
+        Returns:
+            List of dictionaries with the LOOKUP_COLUMNS
+        """
+        rows = self.connection.execute(self._lookup_sql(), (room_no, date)).fetchall()
+        return [dict(zip(LOOKUP_COLUMNS, row)) for row in rows]
+
+    def measure_lookups(self, samples: int = 200, seed: int = 0) -> Dict[str, Any]:
+        """
+        Time the per-room, per-date lookup on room/date pairs from the table.
+
+        Args:
+            samples: Number of lookups timed
+            seed: Random seed for picking the pairs
+
+        Returns:
+            Dictionary with queries, median_ms, p95_ms, max_ms, uses_index
+            and the query plan
+        """
+        pairs = self.connection.execute(
+            f"SELECT DISTINCT room_no, date FROM {_quote(self.table_name)}").fetchall()
+        plan = " ".join(row[-1] for row in self.connection.execute(
+            "EXPLAIN QUERY PLAN " + self._lookup_sql(), ("", "")))
+        if not pairs:
+            return {"queries": 0, "median_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0,
+                    "uses_index": "USING INDEX" in plan, "plan": plan}
+
+        rng = random.Random(seed)
+        sql = self._lookup_sql()
+        timings = []
+        for _ in range(samples):
+            params = rng.choice(pairs)
+            query_start = time.perf_counter()
+            self.connection.execute(sql, params).fetchall()
+            timings.append((time.perf_counter() - query_start) * 1000)
+        timings.sort()
+        return {
+            "queries": len(timings),
+            "median_ms": statistics.median(timings),
+            "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+            "max_ms": timings[-1],
+            "uses_index": "USING INDEX" in plan,
+            "plan": plan,
+        }
+
+    def _lookup_sql(self) -> str:
+        return (f"SELECT {', '.join(_quote(c) for c in LOOKUP_COLUMNS)} FROM {_quote(self.table_name)} "
+                f"WHERE room_no = ? AND date = ?")
+
+    def _iter_rows(self, data: Iterable[Dict[str, Any]]) -> Tuple[List[str], Iterator[tuple]]:
+        """
+        Column names and value tuples of the entries.
+
+        Args:
+            data: List of dictionaries, a BookingTable, or any iterable of entries
+
+        Returns:
+            Tuple of (columns, iterator of row tuples); the columns come from
+            the first entry, plus a date column if it has none, and are empty
+            if there is no entry
+        """
+        today = datetime.date.today().isoformat()
+
+        def fill_date(value: Any) -> Any:
+            return today if value is None else value
+
+        if isinstance(data, BookingTable):
+            columns = list(data.columns)
+            values = [data.map_column(c, fill_date) if c == "date" else data.column(c) for c in columns]
+            if columns and "date" not in columns:
+                columns.append("date")
+                values.append(repeat(today))
+            return columns, zip(*values)
+
+        entries = iter(data)
+        first = next(entries, None)
+        if first is None:
+            return [], iter(())
+        columns = list(first.keys())
+        rows = (tuple(entry.get(c) for c in columns) for entry in chain([first], entries))
+        if "date" not in columns:
+            # Like the SQL output, entries without a date are booked for today
+            return columns + ["date"], (row + (today,) for row in rows)
+        date_index = columns.index("date")
+        return columns, (row[:date_index] + (fill_date(row[date_index]),) + row[date_index + 1:] for row in rows)
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+if __name__ == "__main__":
+    # Example usage
+    import json
+    from processor import TimetableProcessor
+
+    processor = TimetableProcessor()
+    data = processor.process_timetable("examples/sample.xlsx", as_table=True)
+
+    os.makedirs("output", exist_ok=True)
+    with SQLiteLoader("output/timetable.db") as loader:
+        print(json.dumps(loader.load_data(data, replace=True), indent=2))
+        print(json.dumps(loader.measure_lookups(), indent=2))
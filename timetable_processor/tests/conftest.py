@@ -0,0 +1,37 @@
+"""
+Shared test setup: the modules are imported flat, as main.py imports them.
+"""
+import datetime
+import os
+import sys
+
+from openpyxl import Workbook
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if PACKAGE_DIR not in sys.path:
+    sys.path.insert(0, PACKAGE_DIR)
+
+SAMPLE_WORKBOOK = os.path.join(PACKAGE_DIR, "examples", "sample.xlsx")
+
+
+# Day cells mixing text, numbers, dates and booleans
+MIXED_ROWS = [
+    ["Period", "Monday", "Tuesday", "Wednesday"],
+    ["08:00-09:00", 101, "DP (NA)(65)", 2.5],
+    ["09:00-10:00", None, 7, None],
+    ["10:00-11:00", "ML (LS)", datetime.datetime(2025, 1, 27), 12.0],
+    ["11:00-12:00", "OS (PT)", None, True],
+]
+
+
+def write_mixed_workbook(file_path: str) -> None:
+    """
+    Write MIXED_ROWS to a sheet named "mixed".
+    """
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = "mixed"
+    for row in MIXED_ROWS:
+        sheet.append(row)
+    workbook.save(file_path)
@@ -0,0 +1,45 @@
+"""
+Tests for the booking cell parser and the cache version that tracks it.
+"""
+import pytest
+
+import cache
+from cache import ResultCache
+from conftest import SAMPLE_WORKBOOK
+from engines import BookingCellParser, parse_booking_fields
+
+
+@pytest.mark.parametrize("cell, expected", [
+    ("DP (NA)(65)", ("DP", "NA", "65")),
+    ("DP (NA) (65)", ("DP", "NA", "65")),
+    ("ML (LS)", ("ML", "LS", "")),
+    ("  Library  ", ("Library", "", "")),
+    ("Project (RS)(Lab 1) ", ("Project", "RS", "Lab 1")),
+    ("Seminar (open", ("Seminar (open", "", "")),
+])
+def test_parse_booking_fields(cell, expected):
+    assert parse_booking_fields(cell) == expected
+
+
+def test_subject_is_never_an_empty_prefix():
+    # The unanchored pattern matched "" before the subject of every cell
+    for cell in ("DP (NA)(65)", "ML", "Project (RS)(Lab 1)"):
+        assert parse_booking_fields(cell)[0]
+
+
+def test_cell_parser_matches_parse_booking_fields():
+    parser = BookingCellParser()
+
+    for cell in ("DP (NA)(65)", "DP (NA)(65)", "ML (LS)"):
+        assert parser.parse(cell) == parse_booking_fields(cell)
+    assert len(parser.fields) == 2
+
+
+def test_cache_key_changes_with_processor_version(tmp_path, monkeypatch):
+    result_cache = ResultCache(str(tmp_path))
+    options = {"default_date": "2025-01-27"}
+    key = result_cache.make_key(SAMPLE_WORKBOOK, options)
+
+    monkeypatch.setattr(cache, "PROCESSOR_VERSION", cache.PROCESSOR_VERSION + ".1")
+
+    assert result_cache.make_key(SAMPLE_WORKBOOK, options) != key
@@ -0,0 +1,47 @@
+"""
+Tests for the dictionary-encoded BookingTable.
+"""
+import math
+import pickle
+
+from booking_table import BookingTable
+
+
+def test_values_of_different_types_keep_their_own_codes():
+    entries = [{"a": 1}, {"a": True}, {"a": 1.0}, {"a": "1"}]
+    table = BookingTable.from_dicts(entries)
+
+    result = table.to_dicts()
+    assert result == entries
+    assert [type(entry["a"]) for entry in result] == [int, bool, float, str]
+
+
+def test_nan_values_share_one_code():
+    table = BookingTable.from_dicts([{"a": float("nan")}, {"a": float("nan")}, {"a": "x"}])
+
+    categories = table.categories("a")
+    assert len(categories) == 2
+    assert math.isnan(categories[0])
+
+
+def test_slice_does_not_share_new_values_with_its_source():
+    table = BookingTable.from_dicts([{"a": "x"}, {"a": "y"}])
+    head = table[0:1]
+
+    head.append({"a": "z"})
+    table.append({"a": "w"})
+
+    assert table.column("a") == ["x", "y", "w"]
+    assert head.column("a") == ["x", "z"]
+    assert "z" not in table.categories("a")
+    assert "w" not in head.categories("a")
+
+
+def test_pickle_round_trip_keeps_types():
+    table = BookingTable.from_dicts([{"a": True}, {"a": 1}, {"a": "x"}])
+
+    loaded = pickle.loads(pickle.dumps(table))
+    loaded.append({"a": 1})
+
+    assert loaded.to_dicts() == [{"a": True}, {"a": 1}, {"a": "x"}, {"a": 1}]
+    assert len(loaded.categories("a")) == 3
@@ -0,0 +1,57 @@
+"""
+Tests for the command-line interface.
+"""
+import json
+import sys
+
+import pytest
+
+import main
+from availability import PERIODS
+from conftest import SAMPLE_WORKBOOK, write_mixed_workbook
+
+
+def _run(monkeypatch, *argv):
+    monkeypatch.setattr(sys, "argv", ["main.py", *argv])
+    return main.main()
+
+
+def test_help_lists_the_query_command(monkeypatch, capsys):
+    with pytest.raises(SystemExit):
+        _run(monkeypatch, "--help")
+
+    assert "query" in capsys.readouterr().out
+
+
+def test_query_command_answers_as_json(monkeypatch, capsys):
+    assert _run(monkeypatch, "query", "--file", SAMPLE_WORKBOOK, "--period", "morning", "--no-cache") == 0
+
+    assert "free_rooms" in json.loads(capsys.readouterr().out)
+
+
+def test_query_rejects_unknown_periods(monkeypatch, capsys):
+    with pytest.raises(SystemExit):
+        _run(monkeypatch, "query", "--file", SAMPLE_WORKBOOK, "--period", "night")
+
+    error = capsys.readouterr().err
+    assert all(period in error for period in PERIODS)
+
+
+def test_processing_still_requires_an_input(monkeypatch, capsys):
+    with pytest.raises(SystemExit):
+        _run(monkeypatch, "--format", "csv")
+
+    assert "--file" in capsys.readouterr().err
+
+
+def test_lite_engine_writes_the_same_csv_as_the_rows_engine(monkeypatch, tmp_path):
+    workbook = str(tmp_path / "mixed.xlsx")
+    write_mixed_workbook(workbook)
+    outputs = {}
+    for engine in ("rows", "lite"):
+        outputs[engine] = str(tmp_path / f"{engine}.csv")
+        assert _run(monkeypatch, "--file", workbook, "--engine", engine, "--format", "csv", "--date", "2025-01-27",
+                    "--no-cache", "--output", outputs[engine]) == 0
+
+    with open(outputs["rows"]) as rows, open(outputs["lite"]) as lite:
+        assert lite.read() == rows.read()
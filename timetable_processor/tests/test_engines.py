@@ -0,0 +1,132 @@
+"""
+Equivalence tests for the extraction engines, readers and processing paths.
+
+Every path must produce the same entries, and the booking fields must be
+filled: an earlier BOOKING_PATTERN matched the empty string, so paths that
+all left reason, booked_by and room_no blank still agreed with each other.
+"""
+import csv
+
+import pytest
+
+from batch import merge_results, process_files
+from benchmark import write_campus_workbook, write_timetable_workbook
+from booking_table import BookingTable
+from cache import ResultCache
+from conftest import MIXED_ROWS, SAMPLE_WORKBOOK, write_mixed_workbook
+from engines import ENGINES, cell_text, create_processor
+from readers import READERS
+
+DEFAULT_DATE = "2025-01-27"
+
+
+@pytest.fixture(scope="module")
+def workbooks(tmp_path_factory):
+    tmp_dir = tmp_path_factory.mktemp("workbooks")
+    generated = str(tmp_dir / "generated.xlsx")
+    write_timetable_workbook(generated, 120)
+    campus = str(tmp_dir / "campus.xlsx")
+    write_campus_workbook(campus, n_classes=3, n_rows=30)
+    mixed = str(tmp_dir / "mixed.xlsx")
+    write_mixed_workbook(mixed)
+    return {"sample": SAMPLE_WORKBOOK, "generated": generated, "campus": campus, "mixed": mixed}
+
+
+def _entries(workbook: str, engine: str = "rows", reader: str = "pandas", **kwargs):
+    processor = create_processor(engine=engine, reader=reader)
+    return processor.process_timetable(workbook, default_date=DEFAULT_DATE, **kwargs)
+
+
+def _assert_booking_fields_filled(entries):
+    assert entries
+    for field in ("reason", "booked_by", "room_no"):
+        assert any(entry[field] for entry in entries), f"{field} is blank in every entry"
+
+
+@pytest.mark.parametrize("name", ["sample", "generated", "campus", "mixed"])
+def test_engines_agree(workbooks, name):
+    expected = _entries(workbooks[name], "rows")
+    _assert_booking_fields_filled(expected)
+
+    for engine in ENGINES:
+        assert _entries(workbooks[name], engine) == expected, f"{engine} engine disagrees"
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_engines_keep_cells_that_are_not_text(workbooks, engine):
+    entries = _entries(workbooks["mixed"], engine)
+
+    assert entries == _entries(workbooks["mixed"], "rows")
+    cells = {(entry["day_of_week"], entry["start_time"]): entry["reason"] for entry in entries}
+    assert cells["Monday", "08:00"] == "101"
+    assert cells["Tuesday", "09:00"] == "7"
+    assert cells["Tuesday", "10:00"] == "2025-01-27 00:00:00"
+    assert cells["Wednesday", "08:00"] == "2.5"
+    assert cells["Wednesday", "10:00"] == "12"
+    # Text cells after a number in the same row are kept
+    assert cells["Tuesday", "08:00"] == "DP"
+    assert len(entries) == 2 * 9
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("reader", READERS)
+def test_every_reader_gives_the_same_entries(workbooks, tmp_path, engine, reader):
+    if reader == "calamine":
+        pytest.importorskip("python_calamine")
+    workbook = workbooks["mixed"]
+    if reader == "csv":
+        # The sheet as a spreadsheet program exports it
+        workbook = str(tmp_path / "mixed.csv")
+        with open(workbook, "w", newline="") as file:
+            csv.writer(file).writerows([["" if value is None else cell_text(value) for value in row]
+                                        for row in MIXED_ROWS])
+
+    assert _entries(workbook, engine, reader) == _entries(workbooks["mixed"])
+
+
+@pytest.mark.parametrize("name", ["sample", "generated", "campus"])
+def test_readers_agree(workbooks, name):
+    expected = _entries(workbooks[name], reader="pandas")
+
+    assert _entries(workbooks[name], reader="openpyxl") == expected
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_streaming_matches_materialised(workbooks, engine):
+    processor = create_processor(engine=engine)
+
+    streamed = list(processor.iter_timetable(workbooks["campus"], default_date=DEFAULT_DATE))
+
+    assert streamed == _entries(workbooks["campus"], engine)
+
+
+def test_booking_table_matches_entries(workbooks):
+    table = _entries(workbooks["campus"], as_table=True)
+
+    assert isinstance(table, BookingTable)
+    assert table.to_dicts() == _entries(workbooks["campus"])
+
+
+def test_sheet_workers_match_single_process(workbooks):
+    assert _entries(workbooks["campus"], sheet_workers=2) == _entries(workbooks["campus"])
+
+
+def test_batch_matches_single_files(workbooks):
+    paths = [workbooks["sample"], workbooks["campus"]]
+    options = {"engine": "rows", "reader": "pandas", "default_date": DEFAULT_DATE}
+
+    merged = merge_results(process_files(paths, options, workers=2))
+
+    assert merged.to_dicts() == _entries(paths[0]) + _entries(paths[1])
+
+
+def test_cache_hit_matches_miss(workbooks, tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    processor = create_processor()
+
+    miss = cache.process(processor, workbooks["campus"], default_date=DEFAULT_DATE)
+    hit = cache.process(processor, workbooks["campus"], default_date=DEFAULT_DATE)
+
+    assert (cache.misses, cache.hits) == (1, 1)
+    assert hit.to_dicts() == miss.to_dicts() == _entries(workbooks["campus"])
+    _assert_booking_fields_filled(hit.to_dicts())
@@ -0,0 +1,85 @@
+"""
+Tests that every engine and reader locates sheet layouts the same way.
+"""
+import pytest
+from openpyxl import Workbook
+
+from benchmark import _sheet_rows, make_timetable_frame
+from engines import ENGINES, create_processor
+from layout import HEADER_SEARCH_ROWS, clear_layout_cache, detect_rows_layout
+from lite import LiteProcessor
+
+DEFAULT_DATE = "2025-01-27"
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+
+
+def _write_sheet(path, title_rows: int, time_label: str = "Period") -> str:
+    # Header and data rows without the "No." column, so the time column comes first
+    rows = [row[1:] for row in _sheet_rows(make_timetable_frame(10, 0.6, 0), 2, 0, ["Saturday"])[2:]]
+    rows[0][0] = time_label
+    rows = [[None, f"Timetable, part {i + 1}"] for i in range(title_rows)] + rows
+    workbook = Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    workbook.save(str(path))
+    return str(path)
+
+
+def _results(path):
+    results = {}
+    for engine in ENGINES:
+        for reader in ("pandas", "openpyxl"):
+            try:
+                results[engine, reader] = create_processor(engine=engine, reader=reader).process_timetable(
+                    path, default_date=DEFAULT_DATE)
+            except ValueError as e:
+                results[engine, reader] = str(e)
+    return results
+
+
+@pytest.mark.parametrize("header_row", range(HEADER_SEARCH_ROWS))
+def test_engines_and_readers_agree_on_the_header_row(tmp_path, header_row):
+    results = _results(_write_sheet(tmp_path / "sheet.xlsx", header_row))
+
+    expected = results["rows", "pandas"]
+    assert isinstance(expected, list) and expected
+    assert all(result == expected for result in results.values())
+
+
+def test_header_below_the_search_rows_is_rejected_by_every_engine(tmp_path):
+    results = _results(_write_sheet(tmp_path / "sheet.xlsx", HEADER_SEARCH_ROWS))
+
+    assert all(isinstance(result, str) and "Could not identify" in result for result in results.values())
+
+
+def test_engines_agree_on_an_unlabelled_time_column(tmp_path):
+    results = _results(_write_sheet(tmp_path / "sheet.xlsx", 2, time_label="Slot"))
+
+    expected = results["rows", "pandas"]
+    assert isinstance(expected, list) and expected
+    assert all(result == expected for result in results.values())
+
+
+def test_rows_layout_is_cached_per_template():
+    clear_layout_cache()
+    head = [["Timetable 2025"], ["Time", "Monday", "Tuesday (lab)"]]
+
+    layout, cached = detect_rows_layout(head, DAYS)
+    assert not cached
+    assert (layout.header_row, layout.time_index, layout.day_indexes) == (1, 0, [1, 2])
+    assert layout.day_names == ["Monday", "Tuesday"]
+
+    # A new year in the title is the same template
+    _, cached = detect_rows_layout([["Timetable 2026"], head[1]], DAYS)
+    assert cached
+
+
+def test_lite_engine_uses_the_layout_cache(tmp_path):
+    clear_layout_cache()
+    processor = LiteProcessor()
+
+    processor.process_timetable(_write_sheet(tmp_path / "sheet.xlsx", 2), default_date=DEFAULT_DATE)
+    processor.process_timetable(str(tmp_path / "sheet.xlsx"), default_date=DEFAULT_DATE)
+
+    counters = processor.metrics.counters
+    assert (counters["layout_cache_misses"], counters["layout_cache_hits"]) == (1, 1)
@@ -0,0 +1,78 @@
+"""
+Tests that the SQL output formats agree on columns and missing values.
+"""
+import datetime
+
+import pytest
+
+from booking_table import BookingTable
+from sql_generator import TIMETABLE_COLUMN_TYPES, SQLGenerator
+
+ENTRIES = [
+    {"room_no": "64", "date": "2025-01-27", "reason": "DP", "approved_by": None, "is_recurring": True},
+    {"room_no": "65", "date": None, "reason": "ML", "is_recurring": False},
+]
+
+
+def _copy_lines(generator: SQLGenerator, data, csv_format: bool = False):
+    lines = "".join(generator.iter_copy_lines(data, csv_format=csv_format)).splitlines()
+    return lines[0], lines[1:-1]
+
+
+@pytest.mark.parametrize("csv_format", [False, True])
+def test_copy_uses_configured_columns_for_booking_tables(csv_format):
+    generator = SQLGenerator("bookings", columns=["reason", "room_no", "date"])
+    separator = "," if csv_format else "\t"
+
+    from_table = _copy_lines(generator, BookingTable.from_dicts(ENTRIES[:1]), csv_format)
+    from_dicts = _copy_lines(generator, ENTRIES[:1], csv_format)
+
+    assert from_table == from_dicts
+    command, rows = from_table
+    assert "(reason, room_no, date)" in command
+    assert rows == [separator.join(["DP", "64", "2025-01-27"])]
+
+
+def test_insert_uses_configured_columns_for_booking_tables():
+    generator = SQLGenerator("bookings", columns=["reason", "room_no"])
+
+    from_table = generator.generate_insert_statements(BookingTable.from_dicts(ENTRIES[:1]))
+    from_dicts = generator.generate_insert_statements(ENTRIES[:1])
+
+    assert from_table == from_dicts
+    assert "(reason, room_no, date)" in from_table[0]
+
+
+def test_missing_keys_are_empty_strings_in_every_format():
+    generator = SQLGenerator("bookings", column_types=TIMETABLE_COLUMN_TYPES)
+    today = datetime.date.today().isoformat()
+
+    insert = generator.generate_insert_statements(ENTRIES)[0]
+    _, copy_rows = _copy_lines(generator, ENTRIES)
+    _, csv_rows = _copy_lines(generator, ENTRIES, csv_format=True)
+
+    # Second entry: no approved_by key, date None
+    assert insert.splitlines()[-1] == f"('65', '{today}', 'ML', '', FALSE);"
+    assert copy_rows[1] == "\t".join(["65", today, "ML", "", "false"])
+    assert csv_rows[1] == ",".join(["65", today, "ML", '""', "false"])
+    # First entry: approved_by present but None is NULL
+    assert copy_rows[0].split("\t")[3] == "\\N"
+    assert csv_rows[0].split(",")[3] == ""
+
+
+def test_booking_table_and_dicts_give_the_same_copy_output():
+    generator = SQLGenerator("bookings")
+    table = BookingTable.from_dicts(ENTRIES, columns=["room_no", "date", "reason", "approved_by", "is_recurring"])
+
+    assert _copy_lines(generator, table) == _copy_lines(generator, table.to_dicts())
+    # Columns a BookingTable entry lacks are stored as empty strings
+    assert table[1]["approved_by"] == ""
+
+
+def test_copy_fills_none_in_columns_typed_as_dates():
+    generator = SQLGenerator("bookings", column_types={"recurrence_end": "date"})
+    today = datetime.date.today().isoformat()
+
+    _, rows = _copy_lines(generator, [{"date": "2025-01-27", "recurrence_end": None, "reason": None}])
+
+    assert rows == ["\t".join(["2025-01-27", today, "\\N"])]
@@ -0,0 +1,38 @@
+"""
+Tests for loading timetable data into SQLite.
+"""
+import datetime
+
+import pytest
+
+from booking_table import BookingTable
+from sqlite_loader import SQLiteLoader
+
+ENTRIES = [
+    {"room_no": "64", "time_slot": "8:00-9:00", "reason": "DP", "status": "booked"},
+    {"room_no": "64", "time_slot": "9:00-10:00", "reason": "ML", "status": "booked"},
+]
+
+
+@pytest.mark.parametrize("as_table", [False, True])
+def test_entries_without_a_date_are_loaded_for_today(tmp_path, as_table):
+    data = BookingTable.from_dicts(ENTRIES, columns=list(ENTRIES[0])) if as_table else ENTRIES
+    today = datetime.date.today().isoformat()
+
+    with SQLiteLoader(str(tmp_path / "timetable.db")) as loader:
+        result = loader.load_data(data)
+
+        assert result["success"], result["message"]
+        assert result["rows"] == 2
+        assert sorted(row["reason"] for row in loader.lookup("64", today)) == ["DP", "ML"]
+
+
+def test_none_dates_are_loaded_for_today(tmp_path):
+    today = datetime.date.today().isoformat()
+    entries = [dict(ENTRIES[0], date=None), dict(ENTRIES[1], date="2025-01-27")]
+
+    with SQLiteLoader(str(tmp_path / "timetable.db")) as loader:
+        assert loader.load_data(entries)["success"]
+
+        assert [row["reason"] for row in loader.lookup("64", today)] == ["DP"]
+        assert [row["reason"] for row in loader.lookup("64", "2025-01-27")] == ["ML"]
@@ -0,0 +1,66 @@
+"""
+Tests that the streaming pipeline from workbook to SQL file keeps memory flat.
+"""
+import tracemalloc
+
+import pytest
+
+from benchmark import write_timetable_workbook
+from engines import ENGINES, STREAM_CHUNK_ROWS, create_processor
+from sql_generator import SQLGenerator
+
+# A workbook and one twice its size, each several chunks long
+SIZES = (4 * STREAM_CHUNK_ROWS, 8 * STREAM_CHUNK_ROWS)
+
+
+@pytest.fixture(scope="module")
+def workbooks(tmp_path_factory):
+    tmp_dir = tmp_path_factory.mktemp("workbooks")
+    paths = {}
+    for n_rows in SIZES:
+        paths[n_rows] = str(tmp_dir / f"timetable-{n_rows}.xlsx")
+        write_timetable_workbook(paths[n_rows], n_rows)
+    return paths
+
+
+def _streaming_peak(engine: str, workbook: str, output_file: str) -> int:
+    """
+    Peak memory of the whole streaming pipeline, sheet reading included.
+    """
+    processor = create_processor(engine=engine)
+    generator = SQLGenerator("bookings")
+    tracemalloc.start()
+    try:
+        rows = generator.write_insert_statements(
+            processor.iter_timetable(workbook, default_date="2025-01-27"), output_file)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert rows > 0
+    return peak
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_streaming_peak_memory_is_flat_in_workbook_size(workbooks, tmp_path, engine):
+    output_file = str(tmp_path / "inserts.sql")
+
+    peaks = [_streaming_peak(engine, workbooks[n_rows], output_file) for n_rows in SIZES]
+
+    # Twice the rows may cost at most half as much memory again
+    assert peaks[1] < 1.5 * peaks[0], f"streaming peaks {peaks} grew with the workbook"
+
+
+def test_materialised_peak_memory_grows_with_workbook_size(workbooks):
+    # Guards the flat-memory test: the measurement does see entries held in memory
+    processor = create_processor()
+    peaks = []
+    for n_rows in SIZES:
+        tracemalloc.start()
+        try:
+            data = processor.process_timetable(workbooks[n_rows], default_date="2025-01-27")
+            peaks.append(tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+        assert data
+
+    assert peaks[1] > 1.8 * peaks[0]
@@ -0,0 +1,175 @@
+"""
+Tests for SupabaseUploader.sync_data against the in-memory PostgREST mock.
+"""
+import json
+import os
+
+import pytest
+
+from conftest import SAMPLE_WORKBOOK
+from engines import create_processor
+from mock_postgrest import MockPostgREST
+from uploader import SYNC_KEY, SupabaseUploader
+
+TABLE = "bookings"
+
+
+def _entries():
+    return [
+        {"room_no": "64", "date": "2025-01-27", "day_of_week": "Monday", "time_slot": "08:00 - 08:30",
+         "reason": "DP", "booked_by": "NA"},
+        {"room_no": "65", "date": "2025-01-27", "day_of_week": "Monday", "time_slot": "08:30 - 09:00",
+         "reason": "ML", "booked_by": "LS"},
+        # Commas, parentheses and quotes must survive the delete filter
+        {"room_no": 'Lab (1), "A"', "date": "2025-01-28", "day_of_week": "Tuesday", "time_slot": "09:00 - 09:30",
+         "reason": "CN", "booked_by": "RS"},
+    ]
+
+
+@pytest.fixture
+def server():
+    with MockPostgREST() as server:
+        yield server
+
+
+@pytest.fixture
+def sync(server, tmp_path):
+    uploader = SupabaseUploader(server.url, "test-key", TABLE, max_retries=0)
+    snapshot_dir = str(tmp_path / "snapshots")
+
+    def run(entries):
+        before = len(server.requests)
+        result = uploader.sync_data(entries, snapshot_dir=snapshot_dir)
+        return result, server.requests[before:]
+
+    yield run
+    uploader.close()
+
+
+def _columns(row):
+    return row["room_no"], row["date"], row["day_of_week"], row["time_slot"], row["reason"]
+
+
+def _stored(server):
+    return sorted(_columns(row) for row in server.rows(TABLE))
+
+
+def _expected(entries):
+    return sorted(_columns(row) for row in entries)
+
+
+def test_first_sync_inserts_every_row(server, sync):
+    result, requests = sync(_entries())
+
+    assert result["success"]
+    assert (result["inserted"], result["updated"], result["deleted"], result["unchanged"]) == (3, 0, 0, 0)
+    assert [request["method"] for request in requests] == ["POST"]
+    assert f"on_conflict={'%2C'.join(SYNC_KEY)}" in requests[0]["path"]
+    assert _stored(server) == _expected(_entries())
+
+
+def test_unchanged_rerun_sends_no_requests(server, sync):
+    sync(_entries())
+
+    result, requests = sync(_entries())
+
+    assert result["success"]
+    assert (result["inserted"], result["updated"], result["deleted"], result["unchanged"]) == (0, 0, 0, 3)
+    assert requests == []
+
+
+def test_changed_row_is_upserted(server, sync):
+    sync(_entries())
+    entries = _entries()
+    entries[1]["reason"] = "BDA"
+
+    result, requests = sync(entries)
+
+    assert (result["inserted"], result["updated"], result["deleted"], result["unchanged"]) == (0, 1, 0, 2)
+    assert [request["method"] for request in requests] == ["POST"]
+    assert "resolution=merge-duplicates" in requests[0]["headers"]["Prefer"]
+    assert _stored(server) == _expected(entries)
+
+
+def test_removed_row_is_deleted_by_key_filter(server, sync):
+    sync(_entries())
+    entries = _entries()
+    removed = entries.pop(2)
+
+    result, requests = sync(entries)
+
+    assert (result["inserted"], result["updated"], result["deleted"], result["unchanged"]) == (0, 0, 1, 2)
+    assert [request["method"] for request in requests] == ["DELETE"]
+    assert "or=" in requests[0]["path"]
+    assert removed["room_no"] not in [row["room_no"] for row in server.rows(TABLE)]
+    assert _stored(server) == _expected(entries)
+
+
+def test_failed_batch_is_retried_on_next_sync(server, sync):
+    server.fail_next(1)
+
+    result, _ = sync(_entries())
+    assert not result["success"]
+
+    result, requests = sync(_entries())
+    assert result["success"]
+    assert result["inserted"] == 3
+    assert len(requests) == 1
+
+
+def test_unreadable_snapshot_is_reported_and_rebuilt(server, sync, tmp_path):
+    sync(_entries())
+    snapshot_path = os.path.join(str(tmp_path / "snapshots"), f"{TABLE}.json")
+    with open(snapshot_path, "w") as file:
+        file.write("{not json")
+
+    result, requests = sync(_entries())
+
+    assert result["success"]
+    assert result["inserted"] == 3
+    assert any("unreadable snapshot" in warning for warning in result["warnings"])
+    assert [request["method"] for request in requests] == ["POST"]
+    # Upserts merge with the rows already stored
+    assert _stored(server) == _expected(_entries())
+
+    with open(snapshot_path) as file:
+        assert len(json.load(file)["rows"]) == 3
+    result, requests = sync(_entries())
+    assert result["warnings"] == []
+    assert requests == []
+
+
+def test_weekdays_sharing_a_room_and_slot_are_all_synced(server, sync):
+    # A sheet stamps every weekday with the same date
+    entries = _entries() + [dict(_entries()[0], day_of_week="Tuesday", reason="OS")]
+
+    result, _ = sync(entries)
+
+    assert result["success"]
+    assert (result["inserted"], result["duplicates"], result["warnings"]) == (4, 0, [])
+    assert _stored(server) == _expected(entries)
+
+    entries.pop()
+    result, requests = sync(entries)
+    assert (result["deleted"], result["unchanged"]) == (1, 3)
+    assert [request["method"] for request in requests] == ["DELETE"]
+    assert _stored(server) == _expected(entries)
+
+
+def test_sample_workbook_keys_are_unique(server, sync):
+    entries = create_processor().process_timetable(SAMPLE_WORKBOOK, default_date="2025-01-27")
+
+    result, _ = sync(entries)
+
+    assert result["duplicates"] == 0
+    assert len(server.rows(TABLE)) == len(entries)
+
+
+def test_duplicate_keys_are_reported(server, sync):
+    entries = _entries() + [dict(_entries()[0], reason="OS")]
+
+    result, _ = sync(entries)
+
+    assert result["duplicates"] == 1
+    assert len(result["warnings"]) == 1
+    assert ("64", "2025-01-27", "Monday", "08:00 - 08:30", "OS") in _stored(server)
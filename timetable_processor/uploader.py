@@ -3,8 +3,87 @@ Module for uploading timetable data to a Supabase database.
 """
 import os
 import json
-import requests
-from typing import List, Dict, Any, Optional
+import bisect
+import datetime
+import hashlib
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Any, Callable, Iterable, Optional, Sequence, Tuple, Union
+
+from booking_table import BookingTable
+from journal import UploadJournal
+from payload import PayloadEncoder
+
+# Columns identifying a booking for delta sync. Every weekday column of a
+# sheet shares one date, so the day is needed to tell the days apart.
+SYNC_KEY = ("room_no", "date", "day_of_week", "time_slot")
+
+DEFAULT_SNAPSHOT_DIR = os.environ.get(
+    "TIMETABLE_SNAPSHOT_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "timetable_processor", "snapshots")
+)
+
+DEFAULT_JOURNAL_DIR = os.environ.get(
+    "TIMETABLE_JOURNAL_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "timetable_processor", "journals")
+)
+
+# Statuses worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+class AdaptiveBatchSizer:
+    """
+    Picks the next upload batch size from the batches already sent.
+
+    Each completed batch gives a per-record latency and payload size; the
+    next size is the largest that should stay within target_seconds and
+    max_bytes, growing at most 2x per batch. Failed batches halve the size.
+    """
+
+    def __init__(self, initial: int = 50, min_size: int = 1, max_size: int = 1000,
+                 target_seconds: float = 1.0, max_bytes: int = 1024 * 1024):
+        """
+        Initialize the AdaptiveBatchSizer.
+
+        Args:
+            initial: Size of the first batches
+            min_size: Smallest batch size
+            max_size: Largest batch size
+            target_seconds: Request latency to aim for
+            max_bytes: Largest request body to aim for
+        """
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_seconds = target_seconds
+        self.max_bytes = max_bytes
+        self.size = max(min_size, min(initial, max_size))
+
+    def observe(self, records: int, seconds: float, payload_bytes: int, success: bool) -> None:
+        """
+        Update the batch size from a completed batch.
+
+        Args:
+            records: Rows in the batch
+            seconds: Latency of the final attempt
+            payload_bytes: Size of the request body
+            success: Whether the batch was accepted
+        """
+        if not success:
+            self.size = max(self.min_size, self.size // 2)
+            return
+        if records <= 0:
+            return
+
+        limits = [self.max_size, self.size * 2]
+        if seconds > 0:
+            limits.append(int(self.target_seconds * records / seconds))
+        if payload_bytes > 0:
+            limits.append(int(self.max_bytes * records / payload_bytes))
+        self.size = max(self.min_size, min(limits))
 
 
 class SupabaseUploader:
@@ -12,7 +91,9 @@ class SupabaseUploader:
     Class for uploading timetable data to a Supabase database.
     """
 
-    def __init__(self, supabase_url: str, supabase_key: str, table_name: str = "timetable"):
+    def __init__(self, supabase_url: str, supabase_key: str, table_name: str = "timetable",
+                 max_workers: int = 4, max_retries: int = 5, backoff: float = 0.5,
+                 max_backoff: float = 30.0, timeout: float = 30.0, compress: bool = False):
         """
         Initialize the SupabaseUploader.
         
@@ -20,24 +101,72 @@ class SupabaseUploader:
             supabase_url: Supabase project URL
             supabase_key: Supabase API key
             table_name: Name of the table to insert data into
+            max_workers: Maximum number of requests in flight
+            max_retries: Retries for a batch after a retryable status or connection error
+            backoff: Base delay in seconds for exponential backoff
+            max_backoff: Upper bound for a single backoff delay
+            timeout: Timeout in seconds for each request
+            compress: Gzip-compress request bodies (the endpoint, or a proxy in
+                front of it, must accept Content-Encoding: gzip)
         """
         self.supabase_url = supabase_url.rstrip('/')
         self.supabase_key = supabase_key
         self.table_name = table_name
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.compress = compress
         
         # API endpoint for the table
         self.endpoint = f"{self.supabase_url}/rest/v1/{self.table_name}"
-    
-    # In the upload_data method of SupabaseUploader class:
 
-    def upload_data(self, data: List[Dict[str, Any]], 
-                batch_size: int = 50) -> Dict[str, Any]:
+        # One pooled session so batches reuse connections instead of paying
+        # TCP/TLS setup each time. requests is imported here so commands that
+        # never upload do not load it.
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self._request_error = requests.RequestException
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close(self) -> None:
+        """
+        Close the pooled connections.
+        """
+        self.session.close()
+
+    def upload_data(self, data: Union[List[Dict[str, Any]], BookingTable],
+                batch_size: int = 50, adaptive: bool = True,
+                journal: Optional[UploadJournal] = None, resume: bool = False,
+                on_conflict: Optional[Sequence[str]] = None) -> Dict[str, Any]:
         """
         Upload timetable data to Supabase.
+
+        Up to max_workers batches are in flight at once. Retryable failures
+        (429 and transient 5xx) are retried with exponential backoff and
+        jitter. With adaptive sizing, batch_size is only the starting size
+        and later batches follow the observed latency and payload size.
+
+        With a journal, every batch gets a deterministic ID (its first row
+        and a hash of its rows) and its acknowledgement is recorded durably.
+        Resuming skips every row range the interrupted run got acknowledged,
+        provided the rows are unchanged, and only sends the gaps. A batch that
+        landed just before a crash but was never acknowledged is sent again,
+        so pass on_conflict to make those resends idempotent.
         
         Args:
-            data: List of dictionaries containing timetable data
-            batch_size: Number of rows per batch upload
+            data: List of dictionaries or a BookingTable containing timetable data
+            batch_size: Number of rows per batch upload (initial size if adaptive)
+            adaptive: Adjust the batch size as responses come back
+            journal: Journal recording batch acknowledgements
+            resume: Skip batches the journal already records as acknowledged
+            on_conflict: Unique key columns; rows already present are skipped
+                instead of inserted again
             
         Returns:
             Dictionary with upload results
@@ -45,64 +174,439 @@ class SupabaseUploader:
         if not data:
             return {"success": False, "message": "No data to upload", "details": []}
         
-        # Ensure all records have a date
-        for entry in data:
-            if 'date' not in entry or not entry['date']:
-                entry['date'] = datetime.date.today().isoformat()
+        # Ensure all records have a date (BookingTable rows always carry one)
+        if not isinstance(data, BookingTable):
+            for entry in data:
+                if 'date' not in entry or not entry['date']:
+                    entry['date'] = datetime.date.today().isoformat()
         
-        # Set up headers
-        headers = {
-            "apikey": self.supabase_key,
-            "Authorization": f"Bearer {self.supabase_key}",
-            "Content-Type": "application/json",
-            "Prefer": "return=minimal"  # For better performance
-        }
-        
-        results = []
-        
-        # Process data in batches
-        for i in range(0, len(data), batch_size):
-            batch = data[i:i + batch_size]
-            
-            try:
-                # Send batch to Supabase
-                response = requests.post(
-                    self.endpoint,
-                    headers=headers,
-                    data=json.dumps(batch)
-                )
-                
-                # Check response
-                if response.status_code in (200, 201):
-                    results.append({
-                        "batch": i // batch_size + 1,
-                        "success": True,
-                        "records": len(batch)
-                    })
-                else:
-                    results.append({
-                        "batch": i // batch_size + 1,
-                        "success": False,
-                        "status_code": response.status_code,
-                        "message": response.text
-                    })
-            except Exception as e:
-                results.append({
-                    "batch": i // batch_size + 1,
-                    "success": False,
-                    "error": str(e)
-                })
+        sizer = AdaptiveBatchSizer(batch_size) if adaptive else None
+        encoder = PayloadEncoder(compress=self.compress)
+        headers = dict(self._headers(), **encoder.headers)
+        params = {}
+        if on_conflict:
+            params["on_conflict"] = ",".join(on_conflict)
+            headers["Prefer"] = "resolution=ignore-duplicates,return=minimal"
+
+        # Acknowledged row ranges from the interrupted run, by first row
+        acknowledged = {}
+        if journal is not None:
+            if resume:
+                acknowledged = {entry["start"]: entry for entry in journal.acknowledged(self.endpoint).values()}
+            else:
+                journal.reset(self.endpoint)
+        acked_starts = sorted(acknowledged)
+        skipped = []
+
+        def batches():
+            start = 0
+            number = 1
+            while start < len(data):
+                entry = acknowledged.get(start)
+                if entry is not None:
+                    batch = data[start:start + entry["records"]]
+                    body, stats = encoder.encode(batch)
+                    batch_id = f"{start}-{stats['digest'][:32]}"
+                    if batch_id == entry["batch_id"]:
+                        skipped.append({"batch": number, "success": True, "records": len(batch),
+                                        "batch_id": batch_id, "skipped": True})
+                        start += len(batch)
+                        number += 1
+                        continue
+
+                size = sizer.size if sizer else batch_size
+                # Stop short of the next range that is already acknowledged
+                following = bisect.bisect_right(acked_starts, start)
+                if following < len(acked_starts):
+                    size = min(size, acked_starts[following] - start)
+
+                batch = data[start:start + size]
+                body, stats = encoder.encode(batch)
+                batch_id = f"{start}-{stats['digest'][:32]}"
+                if journal is not None:
+                    journal.record(self.endpoint, batch_id, "sent", start=start, records=len(batch))
+                yield {"batch": number, "batch_id": batch_id, "start": start, "records": len(batch),
+                       "stats": stats, "kwargs": {"data": body, "params": params}}
+                start += len(batch)
+                number += 1
+
+        def observe(job: Dict[str, Any], result: Dict[str, Any]) -> None:
+            result["batch_id"] = job["batch_id"]
+            if journal is not None:
+                journal.record(self.endpoint, job["batch_id"], "acked" if result["success"] else "failed",
+                               start=job["start"], records=job["records"])
+            if sizer:
+                sizer.observe(job["records"], result.get("seconds", 0.0),
+                              job["stats"]["bytes"], result["success"])
+
+        results = self._run_batches("post", batches(), headers, on_result=observe)
+        results = sorted(results + skipped, key=lambda r: r["batch"])
         
         # Summarize results
         success_count = sum(1 for r in results if r.get("success", False))
         total_batches = len(results)
+        message = f"Uploaded {success_count}/{total_batches} batches successfully"
+        if skipped:
+            message += f" ({len(skipped)} already acknowledged)"
         
         return {
             "success": success_count == total_batches,
-            "message": f"Uploaded {success_count}/{total_batches} batches successfully",
+            "message": message,
+            "skipped": len(skipped),
+            **self._payload_totals(results),
+            **self._request_totals(results),
             "details": results
         }
     
+    def sync_data(self, data: Union[List[Dict[str, Any]], BookingTable],
+                  snapshot_dir: str = DEFAULT_SNAPSHOT_DIR,
+                  key_columns: Sequence[str] = SYNC_KEY,
+                  batch_size: int = 50) -> Dict[str, Any]:
+        """
+        Push only the changes since the last sync to Supabase.
+
+        A snapshot of the rows last pushed to this endpoint and table is kept
+        in snapshot_dir. New and changed rows are upserted with on_conflict on
+        key_columns, and rows that disappeared are deleted in batched filters.
+        The snapshot only records batches the server accepted, so a failed
+        run is retried on the next sync.
+
+        Args:
+            data: List of dictionaries or a BookingTable containing timetable data
+            snapshot_dir: Directory holding one snapshot file per table
+            key_columns: Columns identifying a row; must match a unique
+                constraint on the table
+            batch_size: Number of rows per upsert or delete request
+
+        Returns:
+            Dictionary with sync results, in the upload_data format plus
+            inserted/updated/deleted/unchanged counts and a list of warnings
+        """
+        key_columns = list(key_columns)
+        rows = data.to_dicts() if isinstance(data, BookingTable) else data
+        today = datetime.date.today().isoformat()
+
+        current: Dict[str, Tuple[Dict[str, Any], str]] = {}
+        duplicates = 0
+        for row in rows:
+            if not row.get('date'):
+                row = dict(row, date=today)
+            key = self._row_key(row, key_columns)
+            if key in current:
+                # PostgREST rejects an upsert touching the same key twice; last row wins
+                duplicates += 1
+            current[key] = (row, self._row_digest(row))
+
+        warnings = []
+        if duplicates:
+            warnings.append(f"{duplicates} rows share a key on ({', '.join(key_columns)}); "
+                            f"only the last of each was synced. Use a wider key to keep them all.")
+
+        snapshot_path = os.path.join(snapshot_dir, f"{self.table_name}.json")
+        previous = self._load_snapshot(snapshot_path, key_columns, warnings)
+
+        inserts = [key for key in current if key not in previous]
+        updates = [key for key in current if key in previous and previous[key] != current[key][1]]
+        deletes = [key for key in previous if key not in current]
+        unchanged = len(current) - len(inserts) - len(updates)
+
+        synced = dict(previous)
+        changed = inserts + updates
+
+        encoder = PayloadEncoder(compress=self.compress)
+
+        def upserts():
+            for i in range(0, len(changed), batch_size):
+                keys = changed[i:i + batch_size]
+                body, stats = encoder.encode([current[key][0] for key in keys])
+                yield {
+                    "records": len(keys),
+                    "keys": keys,
+                    "stats": stats,
+                    "kwargs": {"params": {"on_conflict": ",".join(key_columns)}, "data": body},
+                }
+
+        def removals():
+            for i in range(0, len(deletes), batch_size):
+                keys = deletes[i:i + batch_size]
+                yield {
+                    "records": len(keys),
+                    "keys": keys,
+                    "kwargs": {"params": {"or": self._delete_filter(keys, key_columns)}},
+                }
+
+        def record(job: Dict[str, Any], result: Dict[str, Any]) -> None:
+            if not result["success"]:
+                return
+            for key in job["keys"]:
+                if key in current:
+                    synced[key] = current[key][1]
+                else:
+                    del synced[key]
+
+        upsert_headers = dict(self._headers(), **encoder.headers,
+                              Prefer="resolution=merge-duplicates,return=minimal")
+        results = self._run_batches("post", upserts(), upsert_headers, on_result=record)
+        results += self._run_batches("delete", removals(), self._headers(), on_result=record,
+                                     first_batch=len(results) + 1)
+
+        self._save_snapshot(snapshot_path, key_columns, synced)
+
+        success_count = sum(1 for r in results if r.get("success", False))
+        total_batches = len(results)
+
+        return {
+            "success": success_count == total_batches,
+            "message": f"Synced {success_count}/{total_batches} batches successfully "
+                       f"({len(inserts)} inserted, {len(updates)} updated, "
+                       f"{len(deletes)} deleted, {unchanged} unchanged)",
+            "inserted": len(inserts),
+            "updated": len(updates),
+            "deleted": len(deletes),
+            "unchanged": unchanged,
+            "duplicates": duplicates,
+            "warnings": warnings,
+            **self._payload_totals(results),
+            **self._request_totals(results),
+            "details": results
+        }
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "apikey": self.supabase_key,
+            "Authorization": f"Bearer {self.supabase_key}",
+            "Content-Type": "application/json",
+            "Prefer": "return=minimal"
+        }
+
+    def _run_batches(self, method: str, jobs: Iterable[Dict[str, Any]], headers: Dict[str, str],
+                     on_result: Optional[Callable[[Dict[str, Any], Dict[str, Any]], None]] = None,
+                     first_batch: int = 1) -> List[Dict[str, Any]]:
+        """
+        Send batches concurrently, keeping at most max_workers in flight.
+
+        Jobs are pulled from the iterable only when a slot frees up, so a
+        generator can size later batches from the results of earlier ones.
+
+        Args:
+            method: HTTP method for every batch
+            jobs: Dictionaries with the batch's "records" count and request
+                "kwargs", and optionally its "batch" number
+            headers: Request headers
+            on_result: Called as on_result(job, result) in the calling thread
+            first_batch: Number given to the first batch
+
+        Returns:
+            Batch results ordered by batch number
+        """
+        results = []
+        jobs = iter(jobs)
+        number = first_batch
+        pending = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                while len(pending) < self.max_workers:
+                    job = next(jobs, None)
+                    if job is None:
+                        break
+                    number = job.get("batch", number)
+                    future = executor.submit(self._send, method, number, job["records"],
+                                             headers=headers, **job["kwargs"])
+                    pending[future] = job
+                    number += 1
+
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = pending.pop(future)
+                    result = future.result()
+                    result.update(job.get("stats", {}))
+                    result.pop("rows", None)
+                    result.pop("digest", None)
+                    results.append(result)
+                    if on_result:
+                        on_result(job, result)
+
+        return sorted(results, key=lambda r: r["batch"])
+
+    @staticmethod
+    def _payload_totals(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Sum the payload stats of the batches.
+
+        Args:
+            results: Batch results carrying PayloadEncoder stats
+
+        Returns:
+            Dictionary with bytes_before, bytes_after and serialize_seconds
+        """
+        return {
+            "bytes_before": sum(r.get("raw_bytes", 0) for r in results),
+            "bytes_after": sum(r.get("bytes", 0) for r in results),
+            "serialize_seconds": sum(r.get("serialize_seconds", 0.0) for r in results),
+        }
+
+    @staticmethod
+    def _request_totals(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Count the requests behind the batches.
+
+        Args:
+            results: Batch results; batches skipped on resume made no request
+
+        Returns:
+            Dictionary with batches_sent, retries and rows_acknowledged
+        """
+        sent = [r for r in results if not r.get("skipped")]
+        return {
+            "batches_sent": len(sent),
+            "retries": sum(r.get("attempts", 1) - 1 for r in sent),
+            "rows_acknowledged": sum(r.get("records", 0) for r in sent if r.get("success")),
+        }
+
+    def _send(self, method: str, batch_number: int, records: int, **kwargs) -> Dict[str, Any]:
+        """
+        Send one batch, retrying retryable failures with backoff.
+
+        Args:
+            method: HTTP method
+            batch_number: 1-based batch number for the result
+            records: Number of rows in the batch
+            **kwargs: Arguments for the request
+
+        Returns:
+            Batch result dictionary
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, self.endpoint, timeout=self.timeout, **kwargs)
+            except self._request_error as e:
+                if attempt <= self.max_retries:
+                    time.sleep(self._backoff_delay(attempt))
+                    continue
+                return {"batch": batch_number, "success": False, "error": str(e), "attempts": attempt}
+            seconds = time.perf_counter() - start
+
+            if response.status_code in (200, 201, 204):
+                return {"batch": batch_number, "success": True, "records": records,
+                        "attempts": attempt, "seconds": seconds}
+
+            if response.status_code in RETRYABLE_STATUSES and attempt <= self.max_retries:
+                time.sleep(self._backoff_delay(attempt, response.headers.get("Retry-After")))
+                continue
+
+            return {
+                "batch": batch_number,
+                "success": False,
+                "status_code": response.status_code,
+                "message": response.text,
+                "attempts": attempt,
+                "seconds": seconds
+            }
+
+    def _backoff_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        Delay before the next attempt: the server's Retry-After if given,
+        otherwise exponential backoff with full jitter.
+
+        Args:
+            attempt: Number of the attempt that just failed
+            retry_after: Retry-After header value, in seconds or as an HTTP date
+
+        Returns:
+            Delay in seconds
+        """
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    when = parsedate_to_datetime(retry_after)
+                    delay = (when - datetime.datetime.now(when.tzinfo)).total_seconds()
+                except (TypeError, ValueError):
+                    delay = None
+            if delay is not None:
+                return min(max(delay, 0.0), self.max_backoff)
+
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+
+    @staticmethod
+    def _row_key(row: Dict[str, Any], key_columns: List[str]) -> str:
+        return json.dumps([str(row.get(column, '')) for column in key_columns])
+
+    @staticmethod
+    def _row_digest(row: Dict[str, Any]) -> str:
+        encoded = json.dumps(row, sort_keys=True, default=str).encode()
+        return hashlib.sha1(encoded).hexdigest()
+
+    @staticmethod
+    def _delete_filter(keys: List[str], key_columns: List[str]) -> str:
+        """
+        Build a PostgREST or=(and(...),...) filter matching the given keys.
+
+        Args:
+            keys: Row keys from _row_key
+            key_columns: Columns the keys are made of
+
+        Returns:
+            Filter expression for the or query parameter
+        """
+        clauses = []
+        for key in keys:
+            values = json.loads(key)
+            conditions = []
+            for column, value in zip(key_columns, values):
+                # Quote values so commas, dots and parentheses are taken literally
+                escaped = value.replace('\\', '\\\\').replace('"', '\\"')
+                conditions.append(f'{column}.eq."{escaped}"')
+            clauses.append(f"and({','.join(conditions)})")
+        return f"({','.join(clauses)})"
+
+    def _load_snapshot(self, path: str, key_columns: List[str], warnings: List[str]) -> Dict[str, str]:
+        """
+        Load the row digests last pushed to this endpoint.
+
+        A snapshot for another endpoint or key is ignored, so the first sync
+        against a new database upserts every row.
+
+        Args:
+            path: Snapshot file path
+            key_columns: Columns identifying a row
+            warnings: List an unreadable snapshot is reported to
+
+        Returns:
+            Dictionary of row key to row digest
+        """
+        try:
+            with open(path, encoding="utf-8") as file:
+                snapshot = json.load(file)
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            warnings.append(f"Ignoring unreadable snapshot {path}; every row is upserted again")
+            return {}
+
+        if snapshot.get("endpoint") != self.endpoint or snapshot.get("key_columns") != key_columns:
+            return {}
+        return snapshot.get("rows", {})
+
+    def _save_snapshot(self, path: str, key_columns: List[str], rows: Dict[str, str]) -> None:
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump({"endpoint": self.endpoint, "key_columns": key_columns, "rows": rows}, file)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
     def verify_connection(self) -> bool:
         """
         Verify the connection to Supabase.
@@ -117,9 +621,10 @@ class SupabaseUploader:
                 "Authorization": f"Bearer {self.supabase_key}"
             }
             
-            response = requests.head(
+            response = self.session.head(
                 self.endpoint,
-                headers=headers
+                headers=headers,
+                timeout=self.timeout
             )
             
             return response.status_code in (200, 204)